@@ -3,9 +3,15 @@
 __author__ = """Uynaj GI"""
 __email__ = 'suquan12148@outlook.com'
 __version__ = '1.0.0'
-__all__ = ['algorithm', 'model', 'method']
+__all__ = ['algorithm', 'model', 'method', 'trajectory', 'snapshot', 'archive', 'checkpoint', 'static', 'stats', 'histogram']
 
-from . import algorithm, model, method
+from . import algorithm, model, method, trajectory, snapshot, archive, checkpoint, static, stats, histogram
 from .algorithm import *  # NOQA
 from .model import *  # NOQA
 from .method import *  # NOQA
+from .trajectory import *  # NOQA
+from .snapshot import *  # NOQA
+from .archive import *  # NOQA
+from .checkpoint import *  # NOQA
+from .static import *  # NOQA
+from .histogram import *  # NOQA
@@ -42,8 +42,8 @@ class Anneal(Metropolis):
 
     """
 
-    def __init__(self, model: object):
-        super().__init__(model)
+    def __init__(self, model: object, block_size: int = 4096, seed: int = None):
+        super().__init__(model, block_size=block_size, seed=seed)
         self.name = "Anneal"
 
     # def iter_sample(self, T: float, uid: str = None, ac_from="class") -> object:
@@ -58,7 +58,18 @@ class Anneal(Metropolis):
     #     return uid
 
     def equil_sample(
-        self, targetT: float, max_iter: int = 1000, highT=None, dencyT=0.9, uid: str = None, ac_from="class"
+        self,
+        targetT: float,
+        max_iter: int = 1000,
+        highT=None,
+        dencyT=0.9,
+        uid: str = None,
+        ac_from="class",
+        sweeps: int = None,
+        therm_sweeps: int = 0,
+        measure_every: int = 1,
+        order: str = "random",
+        snapshot_every: int = None,
     ):
         """
         Equilibrium sampling
@@ -78,6 +89,16 @@ class Anneal(Metropolis):
             uid. The default is None.
         ac_from : str, optional
             Acceptance criterion. The default is "class".
+        sweeps : int, optional
+            Measured sweeps at each temperature. The default is None, see Metropolis.equil_sample.
+        therm_sweeps : int, optional
+            Thermalization sweeps at each temperature. The default is 0.
+        measure_every : int, optional
+            Record one row every measure_every proposals or sweeps. The default is 1.
+        order : str, optional
+            The order of the proposals of a sweep. The default is "random".
+        snapshot_every : int, optional
+            Store one snapshot every snapshot_every proposals or sweeps. The default is with every row.
 
         Returns
         -------
@@ -86,7 +107,8 @@ class Anneal(Metropolis):
             uid
         """
 
-        uid = self._setup_uid(uid)
+        if measure_every < 1:
+            raise ValueError("measure_every must be a positive integer")
         if highT is None:
             highT = targetT / (0.9**10)
         tempT = copy.deepcopy(highT)
@@ -99,10 +121,13 @@ class Anneal(Metropolis):
                     )
                 )
         T = copy.deepcopy(highT)
-        while T > targetT:
-            super().equil_sample(T, max_iter=max_iter, uid=uid, ac_from=ac_from)
-            T = max(T * dencyT, targetT)
-        return uid
+        # one session for the whole schedule, only its temperature changes
+        with self.run(T, uid=uid, ac_from=ac_from) as r:
+            while T > targetT:
+                r.T = T
+                self._schedule(r, max_iter, sweeps, therm_sweeps, measure_every, order, snapshot_every)
+                T = max(T * dencyT, targetT)
+        return r.uid
 
     def param_sample(
         self,
@@ -111,6 +136,11 @@ class Anneal(Metropolis):
         stable: float = 0.0,
         max_iter: int = 1000,
         ac_from: str = "class",
+        sweeps: int = None,
+        therm_sweeps: int = 0,
+        measure_every: int = 1,
+        order: str = "random",
+        snapshot_every: int = None,
     ):
         """_summary_
 
@@ -123,16 +153,25 @@ class Anneal(Metropolis):
         self.parameter = _rename(param_name)
         param_lst = super()._init_paramlst(param)
         uid_lst = []
+        schedule = dict(
+            max_iter=max_iter,
+            ac_from=ac_from,
+            sweeps=sweeps,
+            therm_sweeps=therm_sweeps,
+            measure_every=measure_every,
+            order=order,
+            snapshot_every=snapshot_every,
+        )
         for param in tqdm(param_lst):
             uid = self._setup_uid(None)
             uid_lst.append(uid)
             if self.parameter == "T":
                 if self.model.type == "ising" or self.model.type == "potts":
                     self.model.H = stable
-                self.equil_sample(param, max_iter=max_iter, uid=uid, ac_from=ac_from)
+                self.equil_sample(param, uid=uid, **schedule)
             elif self.parameter == "H":
                 self.model.H = param
-                self.equil_sample(stable, max_iter=max_iter, uid=uid, ac_from=ac_from)
+                self.equil_sample(stable, uid=uid, **schedule)
         uid_param_dict: Dict = {
             "uid": uid_lst,
             "{param}".format(param=self.parameter): param_lst,
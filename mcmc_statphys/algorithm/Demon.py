@@ -11,12 +11,15 @@ import copy
 import numpy as np
 import pandas as pd
 import uuid
-from tqdm import tqdm
+from ..checkpoint import Checkpointable
+from ..snapshot import Snapshots
+from ..trajectory import Trajectory
+from .Session import Session
 
 __all__ = ["Demon"]
 
 
-class Demon(object):
+class Demon(Checkpointable):
     """
     Demon algorithm
     ===============
@@ -36,34 +39,117 @@ class Demon(object):
         self.Es = 0
         self.Ed = 0
         self._rowmodel = copy.deepcopy(self.model)
+        self._active_uid = None  # the uid whose latest state the model and the demon hold
+        self._demon_energy = {}  # the demon energy of the runs the model left
         self._init_data()
 
     def _setup_uid(self, uid):
+        if uid != self._active_uid and self._active_uid in self.trajectory.runs:
+            # keep the latest state of the run the model leaves
+            self.snapshots.keep(self._active_uid, self.model.spin)
+            self._demon_energy[self._active_uid] = self.Ed
         if uid is None:
             uid = (uuid.uuid1()).hex
+        elif uid == self._active_uid and uid in self.trajectory.runs:
+            # the model and the demon already hold the latest state of the run
+            pass
         else:
-            if not self.data.empty:
-                if uid not in self.data.index.get_level_values("uid").values:
+            if len(self.trajectory.runs) > 0:
+                if uid not in self.trajectory.runs:
                     self._reset_model()
                 else:
-                    self.model.set_spin(self.data.loc[uid].loc[self.data.loc[uid].index.max()].spin)
+                    self.model.set_spin(self.snapshots.state(uid))
+                    self.Ed = self._demon_energy.get(uid, self.trajectory.last(uid, "Ed"))
+        self.Es = self.model.energy
+        self._active_uid = uid
         return uid
 
     def _init_data(self):
-        self.data: pd.DataFrame = pd.DataFrame(columns=["uid", "iter", "H", "Es", "Ed", "spin"])
-        self.data.set_index(["uid", "iter"], inplace=True)
+        self.trajectory: Trajectory = Trajectory(columns=["H", "Es", "Ed"])
+        self.snapshots: Snapshots = self.model._init_snapshots()
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """
+        The recorded rows as a DataFrame indexed by (uid, iter), see Trajectory.to_dataframe
+        """
+        return self.trajectory.to_dataframe()
+
+    @data.setter
+    def data(self, data: pd.DataFrame):
+        """
+        Replace the recorded rows by a Trajectory or a DataFrame indexed by (uid, iter)
+        """
+        if not isinstance(data, Trajectory):
+            if "spin" in data.columns:
+                # older data keeps the spin in every row
+                self.snapshots = self.model._init_snapshots()
+                for (uid, iter), spin in data["spin"].items():
+                    self.snapshots.add(uid, iter, spin)
+                data = data.drop(columns="spin")
+            data = Trajectory.from_dataframe(data)
+        self.trajectory = data
+        self._active_uid = None
 
     def _save_date(self, uid):
-        if uid not in self.data.index.get_level_values("uid").values:
-            self.data.loc[(uid, 1), :] = [self.model.H, self.Es, self.Ed, 0]
-            self.data.at[(uid, 1), "spin"] = copy.deepcopy(self.model.spin)
-        else:
-            iterplus = self.data.loc[uid].index.max() + 1
-            self.data.loc[(uid, iterplus), :] = [self.model.H, self.Es, self.Ed, 0]
-            self.data.at[(uid, iterplus), "spin"] = copy.deepcopy(self.model.spin)
+        H = self.trajectory.static.ref(uid, "H", self.model.H)
+        self.trajectory.append(uid, H=H, Es=self.Es, Ed=self.Ed)
+
+    def _record(self, T, uid: str) -> None:
+        self._save_date(uid)
+
+    def _snapshot(self, uid: str) -> None:
+        run = self.trajectory.runs.get(uid)
+        self.snapshots.add(uid, 0 if run is None else run.iter, self.model.spin)
 
     def _reset_model(self):
         self.model = copy.deepcopy(self._rowmodel)
+        self._active_uid = None
+
+    def _update(self, T=None, ac_from=None, site: int = None) -> None:
+        """
+        One demon move, nothing is recorded
+
+        Parameters
+        ----------
+        T : None
+            Unused, the demon sets the temperature
+        ac_from : None
+            Unused
+        site : int, optional
+            The flat index of the proposed site, random by default
+        """
+        if site is None:
+            site = self.model._random_site()
+        new_site, delta_E = self.model._propose(site)
+        # the demon takes the energy released and pays for the energy absorbed
+        if delta_E <= 0 or self.Ed >= delta_E:
+            self.model._accept(site, new_site, delta_E)
+            self.Ed -= delta_E
+            self.Es += delta_E
+
+    def _sweep(self, T=None, ac_from=None, order: str = "random") -> None:
+        """
+        N demon moves at random sites, nothing is recorded
+        """
+        for _ in range(self.model.N):
+            self._update()
+
+    def run(self, uid: str = None) -> Session:
+        """
+        Open a sampling session, the uid is resolved and its state restored once
+
+        Parameters
+        ----------
+        uid : str, optional
+            uid, by default None
+
+        Returns
+        -------
+        Session
+            The session, see Session.step and Session.sweep
+        """
+        return Session(self, uid=uid, ac_from=None)
 
     def iter_sample(self, uid: str = None) -> str:
         """
@@ -79,21 +165,7 @@ class Demon(object):
         str
             uid
         """
-        uid = self._setup_uid(uid)
-        self.Es = self.model.energy
-        temp_model = copy.deepcopy(self.model)
-        delta_E = self.model._random_walk()
-        if delta_E <= 0:
-            self.Ed += abs(delta_E)
-            self.Es -= abs(delta_E)
-        else:
-            if self.Ed >= abs(delta_E):
-                self.Ed -= abs(delta_E)
-                self.Es += abs(delta_E)
-            else:
-                self.model = temp_model
-        self._save_date(uid)
-        return uid
+        return self.run(uid).step()
 
     def equil_sample(
         self,
@@ -115,10 +187,7 @@ class Demon(object):
         str
             uid
         """
-        uid = self._setup_uid(uid)
-        for iter in tqdm(range(max_iter), leave=False):
-            self.iter_sample(uid)
-        return uid
+        return self.run(uid).step(max_iter, progress=True)
 
     def get_temperature(self, uid: str, t0: int = 1) -> list:
         """
@@ -139,7 +208,7 @@ class Demon(object):
         J = self.model.Jij
         lst = []
         Tst = []
-        forlst = self.data.loc[uid]["Ed"].tolist()[t0:]
+        forlst = self.trajectory.column(uid, "Ed").tolist()[t0:]
         for i in forlst:
             lst.append(i)
             T = (1 / (J * 4) * np.log(1 + 4 * J / np.mean(lst))) ** (-1)
@@ -2,13 +2,15 @@ import copy
 import uuid
 import pandas as pd
 import numpy as np
-from tqdm import tqdm
+from ..checkpoint import Checkpointable
+from ..trajectory import Trajectory
 from .Metropolis import _sample_acceptance
+from .Session import Session
 
 __all__ = ["HamiltonianMC"]
 
 
-class HamiltonianMC:
+class HamiltonianMC(Checkpointable):
     def __init__(self, model, positive_C=1.05, learning_rate=0.01):
         if model.type != "SK":
             raise ValueError("The model must be SKmodel")
@@ -19,6 +21,7 @@ class HamiltonianMC:
         self._init_positive()
         self._init_p()
         self._init_q()
+        self._active_uid = None  # the uid whose latest state q and p hold
         self._init_data()
 
     def _init_q(self):
@@ -30,13 +33,17 @@ class HamiltonianMC:
     def _setup_uid(self, uid):
         if uid is None:
             uid = (uuid.uuid1()).hex
+        elif uid == self._active_uid and uid in self.trajectory.runs:
+            # q and p already hold the latest state of the run
+            pass
         else:
-            if uid not in self.data.index.get_level_values("uid").values:
+            if uid not in self.trajectory.runs:
                 self._init_q()
                 self._init_p()
             else:
-                self.q = copy.deepcopy(self.data.loc[uid].loc[self.data.loc[uid].index.max()]["q"])
-                self.p = copy.deepcopy(self.data.loc[uid].loc[self.data.loc[uid].index.max()]["p"])
+                self.q = self.trajectory.last(uid, "q").copy()
+                self.p = self.trajectory.last(uid, "p").copy()
+        self._active_uid = uid
         return uid
 
     def _init_positive(self):
@@ -47,19 +54,32 @@ class HamiltonianMC:
             )
 
     def _init_data(self):
-        self.data: pd.DataFrame = pd.DataFrame(columns=["uid", "iter", "T", "H", "q", "p"])
-        self.data.set_index(["uid", "iter"], inplace=True)
+        self.trajectory: Trajectory = Trajectory(columns=["T", "H", "q", "p"])
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """
+        The recorded rows as a DataFrame indexed by (uid, iter), see Trajectory.to_dataframe
+        """
+        return self.trajectory.to_dataframe()
+
+    @data.setter
+    def data(self, data: pd.DataFrame):
+        """
+        Replace the recorded rows by a Trajectory or a DataFrame indexed by (uid, iter)
+        """
+        self.trajectory = data if isinstance(data, Trajectory) else Trajectory.from_dataframe(data)
+        self._active_uid = None
 
     def _save_date(self, T, uid):
-        if uid not in self.data.index.get_level_values("uid").values:
-            self.data.loc[(uid, 1), :] = [T, self.model.H, 0, 0]
-            self.data.at[(uid, 1), "q"] = copy.deepcopy(self.q)
-            self.data.at[(uid, 1), "p"] = copy.deepcopy(self.p)
-        else:
-            iterplus = self.data.loc[uid].index.max() + 1
-            self.data.loc[(uid, iterplus), :] = [T, self.model.H, 0, 0]
-            self.data.at[(uid, iterplus), "q"] = copy.deepcopy(self.q)
-            self.data.at[(uid, iterplus), "p"] = copy.deepcopy(self.p)
+        self.trajectory.append(uid, T=T, H=self.model.H, q=self.q, p=self.p)
+
+    def _record(self, T, uid):
+        self._save_date(T, uid)
+
+    def _snapshot(self, uid):
+        # q 和 p 已经保存在每一行中
+        pass
 
     def _hamiltonian(self, T, J=1):
         ham = (
@@ -82,8 +102,7 @@ class HamiltonianMC:
         self.q += self.learning_rate * self.p
         self.p -= self.learning_rate / 2 * self._grid_p(T)
 
-    def iter_sample(self, T: float, uid: str = None, ac_from="class") -> str:
-        uid = self._setup_uid(uid)
+    def _update(self, T, ac_from="class", site=None):
         # 保存上一次的状态
         q_old = copy.deepcopy(self.q)
         p_old = copy.deepcopy(self.p)
@@ -96,14 +115,19 @@ class HamiltonianMC:
         if not _sample_acceptance(delta_E, T, form=ac_from):
             self.q = q_old
             self.p = p_old
-        self._save_date(T, uid)
-        return uid
+
+    def _sweep(self, T, ac_from="class", order="random"):
+        # 一次 leapfrog 更新全部 N 个坐标
+        self._update(T, ac_from=ac_from)
+
+    def run(self, T: float, uid: str = None, ac_from="class") -> Session:
+        return Session(self, T=T, uid=uid, ac_from=ac_from)
+
+    def iter_sample(self, T: float, uid: str = None, ac_from="class") -> str:
+        return self.run(T, uid, ac_from=ac_from).step()
 
     def equil_sample(self, T: float, max_iter: int = 1000, uid: str = None, ac_from="class") -> str:
-        uid = self._setup_uid(uid)
-        for iter in tqdm(range(max_iter), leave=False):
-            self.iter_sample(T, uid, ac_from=ac_from)
-        return uid
+        return self.run(T, uid, ac_from=ac_from).step(max_iter, progress=True)
 
     def get_energy(self, uid: str, t0: int = 0) -> float:
         pass
@@ -6,10 +6,10 @@
 @作者    :結凪
 """
 
+from typing import Tuple
 import numpy as np
 from .Metropolis import Metropolis
 from .Metropolis import _sample_acceptance
-import copy
 
 __all__ = ["Kawasaki"]
 
@@ -21,13 +21,14 @@ class Kawasaki(Metropolis):
     TODO: 未完成简介
     """
 
-    def __init__(self, model: object, M: int):
-        if abs(M) > model.N:
-            raise ValueError("M must be less than N")
+    def __init__(self, model: object, M: int, block_size: int = 4096, seed: int = None):
+        if abs(M) >= model.N:
+            raise ValueError("|M| must be less than N, both spin species are needed for an exchange")
         self.M = M
         model = self._init_model(model)
-        super().__init__(model)
+        super().__init__(model, block_size=block_size, seed=seed)
         self.name = "Kawasaki"
+        self._species = None  # (model, up sites, down sites), see _random_pair
 
     def _init_model(self, model):
         plus = int((model.N + self.M) / 2)
@@ -41,21 +42,102 @@ class Kawasaki(Metropolis):
         model.spin = model.spin.reshape(shape)
         model._get_total_energy()
         model._get_total_magnetization()
-        if model.magnetization != self.M:
-            print("we change the magnetization to {}".format(model.magnetization))
+        # M and N of different parity, the nearest magnetization is kept
+        self.M = model.magnetization
         return model
 
-    def iter_sample(self, T: float, uid: str = None, ac_from="class") -> str:
-        uid = self._setup_uid(uid)
-        _plus = np.argwhere(self.model.spin == 1)
-        _minus = np.argwhere(self.model.spin == -1)
-        # 从 plus 中随机选取一个
-        _site = _plus[np.random.choice(np.arange(len(_plus)))]
-        _site2 = _minus[np.random.choice(np.arange(len(_minus)))]
-        _temp_model = copy.deepcopy(self.model)
-        _delta_E = self.model._change_delta_energy(_site)
-        _delta_E += self.model._change_delta_energy(_site2)
-        if not _sample_acceptance(_delta_E, T, form=ac_from):
-            self.model = _temp_model
-        self._save_date(T, uid)
+    def _setup_uid(self, uid):
+        uid = super()._setup_uid(uid)
+        self._species = None  # the spin may have been restored or reset
         return uid
+
+    def _sites(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The flat indices of the up spins and of the down spins, kept up to date by
+        the accepted exchanges
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The up sites and the down sites
+        """
+        if self._species is None or self._species[0] is not self.model:
+            spin = self.model._flat_spin()
+            self._species = (self.model, np.flatnonzero(spin == 1), np.flatnonzero(spin == -1))
+        return self._species[1], self._species[2]
+
+    def _random_pair(self) -> Tuple[int, int]:
+        """
+        Draw a random up spin and a random down spin, one draw each
+
+        Returns
+        -------
+        Tuple[int, int]
+            The position of the pair in the up and the down sites, see _sites
+        """
+        up, down = self._sites()
+        return self.random.integers(len(up)), self.random.integers(len(down))
+
+    def _propose_swap(self, site: int, site2: int) -> Tuple[Tuple[int, int], Tuple[float, float]]:
+        """
+        Propose to exchange two opposite spins, without changing the model
+
+        Parameters
+        ----------
+        site : int
+            The flat index of the first spin
+        site2 : int
+            The flat index of the second spin, opposite to the first
+
+        Returns
+        -------
+        Tuple[Tuple[int, int], Tuple[float, float]]
+            The proposed spins and the delta energy of the two flips, the second
+            one computed after the first
+        """
+        new_site, delta_E = self.model._propose(site)
+        new_site2, delta_E2 = self.model._propose(site2)
+        # the bond between two opposite neighbors is unchanged by the exchange
+        delta_E2 += 4 * self.model.J * np.count_nonzero(self.model.neighbors[site] == site2)
+        return (new_site, new_site2), (delta_E, delta_E2)
+
+    def _update(self, T: float, ac_from="class", site: int = None) -> None:
+        """
+        One spin exchange, nothing is recorded
+
+        Parameters
+        ----------
+        T : float
+            Sample temperature
+        ac_from : str, optional
+            Acceptance form, "class" or "bath", by default "class"
+        site : int, optional
+            Unused, the exchanged pair is always random
+        """
+        up, down = self._sites()
+        if len(up) == 0 or len(down) == 0:
+            # one spin species, no exchange is possible
+            return
+        i, j = self._random_pair()
+        _site, _site2 = up[i], down[j]
+        (_new, _new2), (_delta_E, _delta_E2) = self._propose_swap(_site, _site2)
+        if _sample_acceptance(_delta_E + _delta_E2, T, form=ac_from, rand=self.random.random()):
+            self.model._accept(_site, _new, _delta_E)
+            self.model._accept(_site2, _new2, _delta_E2)
+            up[i], down[j] = _site2, _site
+
+    def _sweep(self, T: float, ac_from="class", order: str = "random") -> None:
+        """
+        N spin exchanges, nothing is recorded
+
+        Parameters
+        ----------
+        T : float
+            Sample temperature
+        ac_from : str, optional
+            Acceptance form, "class" or "bath", by default "class"
+        order : str, optional
+            Unused, the exchanged pairs are random
+        """
+        for _ in range(self.model.N):
+            self._update(T, ac_from=ac_from)
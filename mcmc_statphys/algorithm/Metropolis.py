@@ -7,6 +7,7 @@
 """
 
 import copy
+from collections import OrderedDict
 from typing import List, Tuple, Dict, Union
 import os
 import numpy as np
@@ -15,10 +16,23 @@ from tqdm import tqdm
 import matplotlib.pyplot as plt
 from matplotlib import animation
 from matplotlib.animation import HTMLWriter
-import statsmodels.tsa.stattools as stattools
+from scipy.special import expit
+import pandas as pd
+from ..checkpoint import Checkpointable
+from ..snapshot import Snapshots
+from ..stats import DERIVED, MOMENTS, Moments, acf, autocorrelation_table, binning, derived, integrated_time
+from ..stats import jackknife, moment_series, reweight
+from ..trajectory import RunRegistry, Trajectory
+from ..histogram import WHAM
+from ..model.Ising import Ising
+from .RandomStream import RandomStream
+from .Session import Session
 
 __all__ = ["Metropolis"]
 
+# the models with the sublattices of the checkerboard sweep
+_CHECKERBOARD_TYPES = ["ising", "rfising", "potts", "packedising", "replicaising"]
+
 
 def _is_Flat(sequence: np.ndarray, epsilon: float = 0.1) -> bool:
     """Determine whether the sequence is flat / cn: 判断序列是否平坦
@@ -33,7 +47,7 @@ def _is_Flat(sequence: np.ndarray, epsilon: float = 0.1) -> bool:
     return np.std(sequence) / np.mean(sequence) < epsilon
 
 
-def _sample_acceptance(delta_E: float, sample_Temperture: float, form: str = "class") -> bool:
+def _sample_acceptance(delta_E: float, sample_Temperture: float, form: str = "class", rand: float = None) -> bool:
     """
     Determine whether to accept the sample
 
@@ -45,16 +59,92 @@ def _sample_acceptance(delta_E: float, sample_Temperture: float, form: str = "cl
         Sample temperature
     form: str
         Acceptance form, "class" or "bath"
+    rand: float
+        A uniform in [0, 1), drawn from np.random if None
 
     Returns
     -------
     bool
         Whether to accept the sample
     """
+    if rand is None:
+        rand = np.random.rand()
     if form == "class":
-        return np.random.rand() < np.exp(-delta_E / sample_Temperture)
+        return rand < np.exp(-delta_E / sample_Temperture)
     elif form == "bath":
-        return np.random.rand() < 1 / (1 + np.exp(delta_E / sample_Temperture))
+        return rand < 1 / (1 + np.exp(delta_E / sample_Temperture))
+
+
+def _acceptance_probability(delta_E: np.ndarray, sample_Temperture: float, form: str = "class") -> np.ndarray:
+    """
+    Acceptance probability of many proposals at once
+
+    Parameters
+    ----------
+    delta_E: np.ndarray
+        Energy difference of each proposal
+    sample_Temperture: float
+        Sample temperature
+    form: str
+        Acceptance form, "class" or "bath"
+
+    Returns
+    -------
+    np.ndarray
+        The acceptance probability of each proposal
+    """
+    if form == "class":
+        return np.exp(-np.maximum(delta_E, 0) / sample_Temperture)
+    elif form == "bath":
+        return expit(-delta_E / sample_Temperture)
+    else:
+        raise ValueError("Invalid acceptance form")
+
+
+# least recently used tables are evicted, e.g. the temperatures of an annealing schedule
+_ACCEPTANCE_TABLES_SIZE = 256
+_acceptance_tables: "OrderedDict[tuple, Union[np.ndarray, None]]" = OrderedDict()
+
+
+def _acceptance_table(model: object, sample_Temperture: float, form: str = "class") -> Union[np.ndarray, None]:
+    """
+    Acceptance probability of each delta energy level of the model
+
+    The tables are cached per (model type, J, H, z, T, form) and shared by every
+    algorithm, e.g. the points of param_sample and the replicas of Tempering. The
+    cache keeps the _ACCEPTANCE_TABLES_SIZE most recently used tables, it is an LRU
+    like functools.lru_cache but the levels are computed from the model, which is
+    not part of the key.
+
+    Parameters
+    ----------
+    model: object
+        The model, see _delta_levels of the model
+    sample_Temperture: float
+        Sample temperature
+    form: str
+        Acceptance form, "class" or "bath"
+
+    Returns
+    -------
+    Union[np.ndarray, None]
+        The acceptance probability of each level, None if the levels are not discrete
+    """
+    if not hasattr(model, "_delta_levels") or np.ndim(model.H) != 0:
+        return None
+    key = (model.type, model.J, model.H, model.z, sample_Temperture, form)
+    if key in _acceptance_tables:
+        _acceptance_tables.move_to_end(key)
+        return _acceptance_tables[key]
+    levels = model._delta_levels()
+    table = None
+    if levels is not None:
+        table = _acceptance_probability(levels, sample_Temperture, form=form)
+        table.flags.writeable = False
+    _acceptance_tables[key] = table
+    if len(_acceptance_tables) > _ACCEPTANCE_TABLES_SIZE:
+        _acceptance_tables.popitem(last=False)
+    return table
 
 
 def _rename(column: str) -> str:
@@ -103,7 +193,7 @@ def _rename(column: str) -> str:
     return column
 
 
-class Metropolis:
+class Metropolis(Checkpointable):
     """
     Metropolis algorithm
     ====================
@@ -131,27 +221,156 @@ class Metropolis:
 
     """
 
-    def __init__(self, model: object):
+    def __init__(self, model: object, block_size: int = 4096, seed: int = None):
+        """
+        Parameters
+        ----------
+        model : object
+            The model
+        block_size : int, optional
+            The number of random sites and uniforms drawn at once, by default 4096
+        seed : int, optional
+            The seed of the random stream, by default drawn from np.random. The stream
+            draws the sites, the uniforms and the proposed spins of the Ising family,
+            the initial spin of a model is drawn by the model from np.random
+        """
         self.model = model
         self._rowmodel = copy.deepcopy(model)  # row model
+        self.random = RandomStream(seed=seed, block_size=block_size)
+        self._attach(model)
         self.name = "Metroplis"
-        self.data = self.model._init_data()
+        self.trajectory = self.model._init_data()
+        self.snapshots: Snapshots = self.model._init_snapshots()
+        self._active_uid = None  # the uid whose latest state the model holds
         self.param_list = []
+        self.moments: Dict[str, Moments] = {}  # uid -> streaming moments of E and M, see stats.Moments
+        self.burn_in: int = 0  # rows skipped by the moments of a new run
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """
+        The recorded rows as a DataFrame indexed by (uid, iter), see Trajectory.to_dataframe
+
+        The spin is not a column, see snapshots.
+        """
+        return self.trajectory.to_dataframe()
+
+    @data.setter
+    def data(self, data: Union[Trajectory, pd.DataFrame]) -> None:
+        """
+        Replace the recorded rows by a Trajectory or a DataFrame indexed by (uid, iter)
+        """
+        if isinstance(data, Trajectory):
+            self.trajectory = data
+        else:
+            if "spin" in data.columns:
+                # older data keeps the spin in every row
+                self.snapshots = self.model._init_snapshots()
+                for (uid, iter), spin in data["spin"].items():
+                    self.snapshots.add(uid, iter, spin)
+                data = data.drop(columns="spin")
+            self.trajectory = Trajectory.from_dataframe(data)
+        self._active_uid = None
+
+    @property
+    def runs(self) -> RunRegistry:
+        """
+        The registry of the runs, uid -> last iteration, row range and latest state
+        """
+        return self.trajectory.runs
+
+    def _attach(self, model: object) -> None:
+        """
+        Let the model draw its proposals from the random stream
+
+        The sites are drawn by the sampler when the model draws a flat site as Ising
+        does, else by ``model._random_site``, e.g. the pairs of Staurss.
+
+        Parameters
+        ----------
+        model : object
+            The model
+        """
+        model.random = self.random
+        self._flat_sites = getattr(type(model), "_random_site", None) is Ising._random_site
 
     def _reset_model(self):
         self.model = copy.deepcopy(self._rowmodel)
+        self._attach(self.model)
+        self._active_uid = None
 
     def _setup_uid(self, uid):
+        if uid != self._active_uid and self._active_uid in self.runs:
+            # keep the latest state of the run the model leaves
+            self.snapshots.keep(self._active_uid, self.model.spin)
         if uid is None:
             uid = (uuid.uuid1()).hex
+        elif uid == self._active_uid and uid in self.runs:
+            # the model already holds the latest state of the run
+            pass
         else:
-            if not self.data.empty:
-                if uid not in self.data.index.get_level_values("uid").values:
+            if len(self.runs) > 0:
+                if uid not in self.runs:
                     self._reset_model()
                 else:
-                    self.model.set_spin(self.data.loc[uid].loc[self.data.loc[uid].index.max()].spin)
+                    self.model.set_spin(self.snapshots.state(uid))
+        self._active_uid = uid
         return uid
 
+    def _record(self, T: Union[float, np.ndarray], uid: str) -> None:
+        """
+        Record one row of the current state of the model
+
+        Parameters
+        ----------
+        T : Union[float, np.ndarray]
+            Sample temperature
+        uid : str
+            uid
+        """
+        self.trajectory = self.model._save_date(T=T, uid=uid, data=self.trajectory)
+        if hasattr(self.model, "energy") and hasattr(self.model, "magnetization"):
+            if uid not in self.moments:
+                self.moments[uid] = Moments(burn_in=self.burn_in)
+            self.moments[uid].push(self.model.energy, self.model.magnetization, T)
+
+    def _snapshot(self, uid: str) -> None:
+        """
+        Store one snapshot of the spin of the model, labelled with the last row of the run
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        """
+        run = self.runs.get(uid)
+        self.snapshots.add(uid, 0 if run is None else run.iter, self.model.spin)
+
+    def run(self, T: Union[float, np.ndarray], uid: str = None, ac_from="class") -> Session:
+        """
+        Open a sampling session, the uid is resolved and its state restored once
+
+        Parameters
+        ----------
+        T : Union[float, np.ndarray]
+            Sample temperature
+        uid : str, optional
+            uid, by default None
+        ac_from : str, optional
+            Acceptance form, "class" or "bath", by default "class"
+
+        Returns
+        -------
+        Session
+            The session, see Session.step and Session.sweep
+
+        Example
+        -------
+        >>> with f.run(T=2.0, uid="test") as r:
+        ...     r.sweep(100, order="checkerboard")
+        """
+        return Session(self, T=T, uid=uid, ac_from=ac_from)
+
     def _init_paramlst(self, param: Tuple[float, float, int]) -> np.array:
         """
         init param list
@@ -169,6 +388,90 @@ class Metropolis:
         param_max, param_min, param_num = param
         return np.linspace(param_max, param_min, param_num)
 
+    def _update(self, T: Union[float, np.ndarray], ac_from="class", site: int = None) -> None:
+        """
+        One single-site proposal, nothing is recorded
+
+        The site of a ReplicaIsing is proposed in every replica, each accepts it on its own.
+
+        Parameters
+        ----------
+        T : Union[float, np.ndarray]
+            Sample temperature, or the temperature of each replica of a ReplicaIsing
+        ac_from : str, optional
+            Acceptance form, "class" or "bath", by default "class"
+        site : int, optional
+            The flat index of the proposed site, random by default
+        """
+        if site is None:
+            site = self.random.integers(self.model.N) if self._flat_sites else self.model._random_site()
+        if self.model.type == "replicaising":
+            # the site is proposed in every replica at once
+            self._update_block(np.array([site]), *self._block_table(T, ac_from=ac_from), ac_from=ac_from)
+            return
+        table = _acceptance_table(self.model, T, form=ac_from)
+        new_site, delta_E = self.model._propose(site)
+        level = None if table is None else self.model._get_level(site, new_site)
+        if level is not None:
+            accept = self.random.random() < table[level]
+        else:
+            accept = _sample_acceptance(delta_E, T, form=ac_from, rand=self.random.random())
+        if accept:
+            self.model._accept(site, new_site, delta_E)
+
+    def _sweep_sites(self, order: str = "sequential") -> np.ndarray:
+        """
+        The sites proposed in one sweep
+
+        Parameters
+        ----------
+        order : str, optional
+            "sequential" or "permutation", by default "sequential"
+
+        Returns
+        -------
+        np.ndarray
+            The flat index of every site, in lattice order or shuffled
+
+        Raises
+        ------
+        ValueError
+            Unknown order.
+        """
+        if order == "sequential":
+            return np.arange(self.model.N)
+        elif order == "permutation":
+            return self.random.generator.permutation(self.model.N)
+        raise ValueError("order must be sequential, permutation, random or checkerboard")
+
+    def _sweep(self, T: Union[float, np.ndarray], ac_from="class", order: str = "random") -> None:
+        """
+        One sweep, N proposals, nothing is recorded
+
+        Parameters
+        ----------
+        T : Union[float, np.ndarray]
+            Sample temperature
+        ac_from : str, optional
+            Acceptance form, "class" or "bath", by default "class"
+        order : str, optional
+            "sequential", "permutation", "random" or "checkerboard", by default "random"
+            With "random" every proposal picks a site at random, with "sequential"
+            and "permutation" every site is proposed exactly once. "checkerboard"
+            falls back to "random" when the model has no two sublattices, e.g. an
+            odd L or an XY, Heisenberg or SK model, see _bipartite.
+        """
+        if order == "checkerboard" and not self._bipartite():
+            order = "random"
+        if order == "checkerboard":
+            self._checkerboard(T, ac_from=ac_from)
+        elif order == "random":
+            for _ in range(self.model.N):
+                self._update(T, ac_from=ac_from)
+        else:
+            for site in self._sweep_sites(order).tolist():
+                self._update(T, ac_from=ac_from, site=site)
+
     def iter_sample(self, T: float, uid: str = None, ac_from="class") -> str:
         """
         Iterative sampling
@@ -187,18 +490,146 @@ class Metropolis:
         str
             uid
         """
-        uid = self._setup_uid(uid)
-        temp_model = copy.deepcopy(self.model)
-        delta_E = self.model._random_walk()
-        if not _sample_acceptance(delta_E, T, form=ac_from):
-            self.model = temp_model
-        self.data = self.model._save_date(T=T, uid=uid, data=self.data)
-        return uid
+        return self.run(T, uid=uid, ac_from=ac_from).step()
+
+    def sweep(self, T: Union[float, np.ndarray], uid: str = None, ac_from="class", order: str = "checkerboard") -> str:
+        """
+        One sweep, every site is proposed once on average, then one row is recorded
 
-    def equil_sample(self, T: float, max_iter: int = 1000, uid: str = None, ac_from="class") -> str:
+        Parameters
+        ----------
+        T : Union[float, np.ndarray]
+            Sample temperature, or the temperature of each replica of a ReplicaIsing
+        uid : str, optional
+            uid, by default None
+        ac_from : str, optional
+            Acceptance form, "class" or "bath", by default "class"
+        order : str, optional
+            "checkerboard", "sequential", "permutation" or "random", by default "checkerboard"
+            The checkerboard falls back to "random" when the model has no two sublattices.
+
+        Returns
+        -------
+        str
+            uid
+        """
+        return self.run(T, uid=uid, ac_from=ac_from).sweep(order=order)
+
+    def _bipartite(self) -> bool:
+        """
+        Whether the model can be swept by the checkerboard, see _checkerboard
+
+        Returns
+        -------
+        bool
+            An Ising, RFIsing, Potts, PackedIsing or ReplicaIsing model with an even L
+        """
+        return self.model.type in _CHECKERBOARD_TYPES and self.model.L % 2 == 0
+
+    def _checkerboard(self, T: Union[float, np.ndarray], ac_from="class") -> None:
+        """
+        Checkerboard sweep, every site is proposed once, nothing is recorded
+
+        The even sites are updated all at once, then the odd sites. The sites of
+        one sublattice do not interact, so their proposals are independent.
+
+        Parameters
+        ----------
+        T : Union[float, np.ndarray]
+            Sample temperature, or the temperature of each replica of a ReplicaIsing
+        ac_from : str, optional
+            Acceptance form, "class" or "bath", by default "class"
+
+        Raises
+        ------
+        ValueError
+            The model is not Ising, RFIsing, Potts, PackedIsing or ReplicaIsing.
+        """
+        if self.model.type not in _CHECKERBOARD_TYPES:
+            raise ValueError("The checkerboard sweep needs an Ising, RFIsing, Potts, PackedIsing or ReplicaIsing model")
+        table, sample_T = self._block_table(T, ac_from=ac_from)
+        if self.model.type == "packedising":
+            for color in [0, 1]:
+                self.model._update_sublattice(color, table)
+            return
+        for sites in self.model._sublattices():
+            self._update_block(sites, table, sample_T, ac_from=ac_from)
+
+    def _block_table(
+        self, T: Union[float, np.ndarray], ac_from="class"
+    ) -> Tuple[Union[np.ndarray, None], Union[float, np.ndarray]]:
+        """
+        The acceptance table and the temperature of the block proposals
+
+        Parameters
+        ----------
+        T : Union[float, np.ndarray]
+            Sample temperature, or the temperature of each replica of a ReplicaIsing
+        ac_from : str, optional
+            Acceptance form, "class" or "bath", by default "class"
+
+        Returns
+        -------
+        Tuple[Union[np.ndarray, None], Union[float, np.ndarray]]
+            The table, one row per replica for many temperatures, and the temperature
+            broadcast against the delta energy of _propose_block
+        """
+        if np.ndim(T) == 0:
+            return _acceptance_table(self.model, T, form=ac_from), T
+        tables = [_acceptance_table(self.model, T_item, form=ac_from) for T_item in T]
+        table = None if any(item is None for item in tables) else np.stack(tables)
+        return table, np.asarray(T)[:, None]
+
+    def _update_block(
+        self,
+        sites: np.ndarray,
+        table: Union[np.ndarray, None],
+        sample_T: Union[float, np.ndarray],
+        ac_from="class",
+    ) -> None:
+        """
+        Propose the independent sites all at once, nothing is recorded
+
+        Parameters
+        ----------
+        sites : np.ndarray
+            The flat indices of the sites, no two of them are neighbors
+        table : Union[np.ndarray, None]
+            The acceptance table, see _block_table
+        sample_T : Union[float, np.ndarray]
+            Sample temperature, see _block_table
+        ac_from : str, optional
+            Acceptance form, "class" or "bath", by default "class"
+        """
+        new_spin, delta_E, level = self.model._propose_block(sites)
+        if table is not None and level is not None:
+            probability = table[level] if table.ndim == 1 else np.take_along_axis(table, level, axis=1)
+        else:
+            probability = _acceptance_probability(delta_E, sample_T, form=ac_from)
+        accept = self.random.random(np.shape(delta_E)) < probability
+        self.model._accept_block(sites, new_spin, delta_E, accept)
+
+    def equil_sample(
+        self,
+        T: float,
+        max_iter: int = 1000,
+        uid: str = None,
+        ac_from="class",
+        sweeps: int = None,
+        therm_sweeps: int = 0,
+        measure_every: int = 1,
+        order: str = "random",
+        snapshot_every: int = None,
+    ) -> str:
         """
         Equilibrium sampling
 
+        Without ``sweeps`` the run is ``max_iter`` single proposals. With ``sweeps``
+        the run is ``therm_sweeps`` sweeps that are not recorded, then ``sweeps``
+        sweeps of N proposals each. In both cases one row is recorded every
+        ``measure_every`` steps and one snapshot of the spin every ``snapshot_every``
+        steps.
+
         Parameters
         ----------
         T : float
@@ -209,16 +640,70 @@ class Metropolis:
             uid, by default None
         ac_from : str, optional
             Acceptance form, "class" or "bath", by default "class"
+        sweeps : int, optional
+            The number of measured sweeps, by default None
+        therm_sweeps : int, optional
+            The number of thermalization sweeps, by default 0
+        measure_every : int, optional
+            Record one row every measure_every proposals or sweeps, by default 1
+        order : str, optional
+            The order of the proposals of a sweep, "sequential", "permutation",
+            "random" or "checkerboard", by default "random"
+        snapshot_every : int, optional
+            Store one snapshot every snapshot_every proposals or sweeps, 0 for none,
+            by default with every row
 
         Returns
         -------
         str
             uid
+
+        Raises
+        ------
+        ValueError
+            measure_every is not positive.
         """
-        uid = self._setup_uid(uid)
-        for iter in tqdm(range(max_iter), leave=False):
-            self.iter_sample(T, uid, ac_from=ac_from)
-        return uid
+        if measure_every < 1:
+            raise ValueError("measure_every must be a positive integer")
+        with self.run(T, uid=uid, ac_from=ac_from) as r:
+            self._schedule(r, max_iter, sweeps, therm_sweeps, measure_every, order, snapshot_every)
+        return r.uid
+
+    def _schedule(
+        self,
+        r: Session,
+        max_iter: int,
+        sweeps: int = None,
+        therm_sweeps: int = 0,
+        measure_every: int = 1,
+        order: str = "random",
+        snapshot_every: int = None,
+    ) -> None:
+        """
+        Run the schedule of equil_sample in a session
+
+        Parameters
+        ----------
+        r : Session
+            The session
+        max_iter : int
+            The number of single proposals, if sweeps is None
+        sweeps : int, optional
+            The number of measured sweeps, by default None
+        therm_sweeps : int, optional
+            The number of thermalization sweeps, by default 0
+        measure_every : int, optional
+            Record one row every measure_every proposals or sweeps, by default 1
+        order : str, optional
+            The order of the proposals of a sweep, by default "random"
+        snapshot_every : int, optional
+            Store one snapshot every snapshot_every proposals or sweeps, by default with every row
+        """
+        if sweeps is None:
+            r.step(max_iter, measure_every=measure_every, snapshot_every=snapshot_every, progress=True)
+        else:
+            r.thermalize(therm_sweeps, order=order, progress=True)
+            r.sweep(sweeps, order=order, measure_every=measure_every, snapshot_every=snapshot_every, progress=True)
 
     def param_sample(
         self,
@@ -227,6 +712,11 @@ class Metropolis:
         stable: float = 0.0,
         max_iter: int = 1000,
         ac_from: str = "class",
+        sweeps: int = None,
+        therm_sweeps: int = 0,
+        measure_every: int = 1,
+        order: str = "random",
+        snapshot_every: int = None,
     ) -> Dict:
         """
         Parameter sampling
@@ -243,6 +733,16 @@ class Metropolis:
             Max iteration, by default 1000
         ac_from : str, optional
             Acceptance form, "class" or "bath", by default "class"
+        sweeps : int, optional
+            The number of measured sweeps, by default None, see equil_sample
+        therm_sweeps : int, optional
+            The number of thermalization sweeps, by default 0
+        measure_every : int, optional
+            Record one row every measure_every proposals or sweeps, by default 1
+        order : str, optional
+            The order of the proposals of a sweep, by default "random"
+        snapshot_every : int, optional
+            Store one snapshot every snapshot_every proposals or sweeps, by default with every row
 
         Returns
         -------
@@ -252,16 +752,25 @@ class Metropolis:
         self.parameter = _rename(param_name)
         param_lst = self._init_paramlst(param)
         uid_lst = []
+        schedule = dict(
+            max_iter=max_iter,
+            ac_from=ac_from,
+            sweeps=sweeps,
+            therm_sweeps=therm_sweeps,
+            measure_every=measure_every,
+            order=order,
+            snapshot_every=snapshot_every,
+        )
         for param in tqdm(param_lst):
             uid = self._setup_uid(None)
             uid_lst.append(uid)
             if self.parameter == "T":
                 if self.model.type == "ising" or self.model.type == "potts":
                     self.model.H = stable
-                self.equil_sample(param, max_iter=max_iter, uid=uid, ac_from=ac_from)
+                self.equil_sample(param, uid=uid, **schedule)
             elif self.parameter == "H":
                 self.model.H = param
-                self.equil_sample(stable, max_iter=max_iter, uid=uid, ac_from=ac_from)
+                self.equil_sample(stable, uid=uid, **schedule)
         uid_param_dict: Dict = {
             "uid": uid_lst,
             "{param}".format(param=self.parameter): param_lst,
@@ -292,17 +801,10 @@ class Metropolis:
         ValueError
             The key of the dict is not 'uid'.
         """
-        # TODO: SVD 优化
         if isinstance(uid, str):
-            data = self.data
-            column: str = "spin"
-            spin_lst = data.loc[uid][column][t0:]
-            spin_matrix = []
-            for spin in spin_lst:
-                spin = spin.reshape(-1)
-                spin_matrix.append(spin)
-            spin_matrix = np.matrix(spin_matrix)
-            _, s, _ = np.linalg.svd(spin_matrix, full_matrices=True)
+            spins = self.snapshots.spins(uid, t0)
+            spin_matrix = np.asarray(spins, dtype=np.float64).reshape(len(spins), -1)
+            s = np.linalg.svd(spin_matrix, compute_uv=False)
             if norm:
                 return s / np.linalg.norm(s)
             else:
@@ -343,7 +845,7 @@ class Metropolis:
             mean
         """
         column = _rename(column)
-        return np.mean(self.data.loc[uid][column][t0:] ** n)
+        return np.mean(np.power(self.getcolumn(uid, column, t0), n, dtype=np.float64), axis=0)
 
     def std(self, uid: str, column: str, t0: int = 0) -> float:
         """
@@ -364,7 +866,7 @@ class Metropolis:
             standard deviation
         """
         column = _rename(column)
-        return np.std(self.data.loc[uid][column][t0:])
+        return np.std(self.getcolumn(uid, column, t0), axis=0)
 
     def var(self, uid: str, column: str, t0: int = 0) -> float:
         """
@@ -385,7 +887,7 @@ class Metropolis:
             variance
         """
         column = _rename(column)
-        return np.var(self.data.loc[uid][column][t0:])
+        return np.var(self.getcolumn(uid, column, t0), axis=0)
 
     def norm(self, uid: str, column: str, t0: int = 0, ord: int = 2) -> float:
         """
@@ -408,7 +910,7 @@ class Metropolis:
             norm
         """
         column = _rename(column)
-        return np.linalg.norm(self.data.loc[uid][column][t0:], ord=ord)
+        return np.linalg.norm(self.getcolumn(uid, column, t0), ord=ord)
 
     def diff(self, uid: str, column: str, t0: int = 0, n: int = 1) -> np.array:
         """
@@ -431,7 +933,7 @@ class Metropolis:
             difference
         """
         column = _rename(column)
-        return np.diff(self.data.loc[uid][column][t0:], n)
+        return np.diff(self.getcolumn(uid, column, t0), n, axis=0)
 
     def cv(self, uid: str, column: str, t0: int = 0) -> float:
         """
@@ -472,6 +974,58 @@ class Metropolis:
         """
         return 1 - self.mean(uid, "magnetization", t0, n=4) / (3 * self.mean(uid, "magnetization", t0, n=2) ** 2)
 
+    def specific_heat(self, uid: str, T: float = None) -> float:
+        """
+        Specific heat per site from the streaming moments, O(1), see stats.Moments
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        T : float, optional
+            temperature, by default the one of the latest row
+
+        Returns
+        -------
+        float
+            specific heat, the rows of the first burn_in are skipped
+        """
+        return self.moments[uid].specific_heat(self.model.N, T)
+
+    def susceptibility(self, uid: str, T: float = None) -> float:
+        """
+        Susceptibility per site from the streaming moments, O(1), see stats.Moments
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        T : float, optional
+            temperature, by default the one of the latest row
+
+        Returns
+        -------
+        float
+            susceptibility, the rows of the first burn_in are skipped
+        """
+        return self.moments[uid].susceptibility(self.model.N, T)
+
+    def binder(self, uid: str) -> float:
+        """
+        Binder cumulant from the streaming moments, O(1), see stats.Moments and u4
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        float
+            U4, the rows of the first burn_in are skipped
+        """
+        return self.moments[uid].binder()
+
     def getcolumn(self, uid: str, column: str, t0: int = 0) -> np.array:
         """
         Get column
@@ -481,7 +1035,7 @@ class Metropolis:
         uid : str
             uid
         column : str
-            column
+            column, "spin" reads the snapshots
         t0 : int, optional
             start time, by default 0
 
@@ -491,11 +1045,13 @@ class Metropolis:
             column
         """
         column = _rename(column)
-        return self.data.loc[uid][column][t0:]
+        if column == "spin":
+            return self.snapshots.spins(uid, t0)
+        return self.trajectory.column(uid, column)[t0:]
 
-    def autocorrelation(self, uid: str, column: str) -> Tuple[float, np.array]:
+    def autocorrelation(self, uid: str, column: str, t0: int = 0, c: float = 6.0) -> Tuple[float, np.array]:
         """
-        Autocorrelation
+        Autocorrelation, by FFT, see stats.acf
 
         Parameters
         ----------
@@ -503,16 +1059,293 @@ class Metropolis:
             uid
         column : str
             column
+        t0 : int, optional
+            start time, by default 0
+        c : float, optional
+            The factor of the automatic window of tau, by default 6.0
 
         Returns
         -------
         Tuple[float, np.array]
-            tau, autocorrelation
+            tau, the integrated autocorrelation time with Sokal's window, see
+            stats.integrated_time, and the autocorrelation of every lag
         """
         column = _rename(column)
-        autocorrelation_list = stattools.acf(self.getcolumn(uid, column), nlags=len((self.getcolumn(uid, column))))
-        tau = np.argmin(np.abs(autocorrelation_list - np.exp(-1)))
-        return (tau, autocorrelation_list)
+        autocorrelation_list = acf(self.getcolumn(uid, column, t0))
+        tau, _, _ = integrated_time(autocorrelation_list, c=c)
+        return (float(tau), autocorrelation_list)
+
+    def autocorrelation_time(self, uid: str, columns: List[str] = None, t0: int = 0, c: float = 6.0) -> pd.DataFrame:
+        """
+        Integrated autocorrelation time of every scalar column of the run, in one FFT
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        columns : List[str], optional
+            columns, by default every scalar column
+        t0 : int, optional
+            start time, by default 0
+        c : float, optional
+            The factor of the automatic window, by default 6.0
+
+        Returns
+        -------
+        pd.DataFrame
+            tau, tau_err, window and ess, the effective sample size, of each column,
+            see stats.autocorrelation_table
+        """
+        arrays = self.trajectory.arrays(uid)
+        if columns is not None:
+            arrays = {column: arrays[column] for column in map(_rename, columns)}
+        return autocorrelation_table({column: values[t0:] for column, values in arrays.items()}, c=c)
+
+    def _uids(self, uid: Union[str, dict, List[str]]) -> List[str]:
+        if isinstance(uid, str):
+            return [uid]
+        elif isinstance(uid, dict):
+            if "uid" not in uid.keys():
+                raise ValueError("The key of the dict is not 'uid'.")
+            return list(uid["uid"])
+        return list(uid)
+
+    def _moment_series(self, uid: str, t0: int = 0) -> Dict[str, np.ndarray]:
+        arrays = self.trajectory.arrays(uid)
+        return moment_series(arrays["energy"][t0:], np.stack(arrays["magnetization"][t0:]))
+
+    def binning(
+        self, uid: str, columns: List[str] = None, t0: int = 0, min_bins: int = 32, streaming: bool = False
+    ) -> pd.DataFrame:
+        """
+        Standard error of the mean at every logarithmic bin level, see stats.binning
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        columns : List[str], optional
+            columns, by default energy and magnetization; with streaming the moments
+            of stats.MOMENTS, by default all
+        t0 : int, optional
+            start time, by default 0, unused with streaming
+        min_bins : int, optional
+            the last level keeps at least so many bins, by default 32
+        streaming : bool, optional
+            use the streaming moments of the run instead of the rows, by default False
+
+        Returns
+        -------
+        pd.DataFrame
+            the error of each column, indexed by the bin size
+        """
+        if streaming:
+            columns = list(MOMENTS) if columns is None else list(columns)
+            sizes, errors = self.moments[uid].binning(columns, min_bins=min_bins)
+        else:
+            columns = ["energy", "magnetization"] if columns is None else [_rename(column) for column in columns]
+            arrays = self.trajectory.arrays(uid)
+            sizes, errors = binning(np.stack([arrays[column][t0:] for column in columns], axis=1), min_bins=min_bins)
+        return pd.DataFrame(errors, index=pd.Index(sizes, name="bin"), columns=columns)
+
+    def jackknife(
+        self,
+        uid: Union[str, dict, List[str]],
+        func: callable,
+        moments: List[str],
+        t0: int = 0,
+        blocks: int = 32,
+        streaming: bool = False,
+    ) -> Union[Tuple[float, float], pd.DataFrame]:
+        """
+        Jackknife estimate and error of a function of the means of moments of E and M
+
+        Parameters
+        ----------
+        uid : Union[str, dict, List[str]]
+            uid, uid list or the dict of param_sample
+        func : callable
+            f(mean_1, mean_2, ...), the means of moments in order, e.g.
+            lambda m2, m4: 1 - m4 / (3 * m2**2) for ["M2", "M4"]
+        moments : List[str]
+            moments of stats.MOMENTS
+        t0 : int, optional
+            start time, by default 0, unused with streaming
+        blocks : int, optional
+            number of blocks, by default 32, with streaming those of the moments
+        streaming : bool, optional
+            use the streaming moments of the run instead of the rows, by default False
+
+        Returns
+        -------
+        Union[Tuple[float, float], pd.DataFrame]
+            estimate and error of a uid, else a DataFrame of value and error indexed by uid
+
+        Raises
+        ------
+        ValueError
+            The key of the dict is not 'uid'.
+        """
+        table = pd.DataFrame(columns=["value", "error"], index=pd.Index(self._uids(uid), name="uid"), dtype=float)
+        for uid_item in table.index:
+            if streaming:
+                table.loc[uid_item] = self.moments[uid_item].jackknife(func, moments)
+            else:
+                series = self._moment_series(uid_item, t0)
+                table.loc[uid_item] = jackknife(func, *[series[name] for name in moments], blocks=blocks)
+        if isinstance(uid, str):
+            return tuple(table.iloc[0])
+        return table
+
+    def observables(
+        self, uid: Union[str, dict, List[str]], t0: int = 0, blocks: int = 32, streaming: bool = False
+    ) -> pd.DataFrame:
+        """
+        Specific heat, susceptibility and Binder cumulant with jackknife errors
+
+        Parameters
+        ----------
+        uid : Union[str, dict, List[str]]
+            uid, uid list or the dict of param_sample
+        t0 : int, optional
+            start time, by default 0, unused with streaming
+        blocks : int, optional
+            number of blocks, by default 32, with streaming those of the moments
+        streaming : bool, optional
+            use the streaming moments of the runs instead of the rows, by default False
+
+        Returns
+        -------
+        pd.DataFrame
+            T, specific_heat, susceptibility, binder and their errors, indexed by uid
+
+        Raises
+        ------
+        ValueError
+            The key of the dict is not 'uid'.
+        """
+        N = self.model.N
+        rows = []
+        for uid_item in self._uids(uid):
+            T = self.moments[uid_item].T if streaming else self.trajectory.arrays(uid_item)["T"][-1]
+            T = float(T)
+            row = {"T": T}
+            for name, func, moments in (
+                ("specific_heat", lambda e, e2: (e2 - e**2) / (N * T**2), ["E", "E2"]),
+                ("susceptibility", lambda m, m2: (m2 - m**2) / (N * T), ["|M|", "M2"]),
+                ("binder", lambda m2, m4: 1 - m4 / (3 * m2**2), ["M2", "M4"]),
+            ):
+                row[name], row[name + "_err"] = self.jackknife(uid_item, func, moments, t0, blocks, streaming)
+            rows.append(row)
+        return pd.DataFrame(rows, index=pd.Index(self._uids(uid), name="uid"))
+
+    def reweight(
+        self,
+        uid: str,
+        T_new: np.ndarray,
+        observables: List[str] = None,
+        t0: int = 0,
+        min_overlap: float = 0.5,
+    ) -> pd.DataFrame:
+        """
+        Reweight the rows of a run to other temperatures, see stats.reweight
+
+        Parameters
+        ----------
+        uid : str
+            uid of a run at one temperature
+        T_new : np.ndarray
+            new temperatures
+        observables : List[str], optional
+            moments of stats.MOMENTS, specific_heat, susceptibility, binder or scalar
+            columns, by default E, |M|, specific_heat, susceptibility and binder
+        t0 : int, optional
+            start time, by default 0
+        min_overlap : float, optional
+            the least overlap of the reweighted and the sampled energy histograms of a
+            reliable temperature, by default 0.5
+
+        Returns
+        -------
+        pd.DataFrame
+            the observables, overlap, ess and reliable, indexed by T; the reliable range
+            is ``table.index[table.reliable]``
+
+        Raises
+        ------
+        ValueError
+            The run was not sampled at one temperature.
+        """
+        if observables is None:
+            observables = ["E", "|M|"] + list(DERIVED)
+        arrays = self.trajectory.arrays(uid)
+        T = np.asarray(arrays["T"][t0:], dtype=np.float64)
+        if len(T) == 0 or np.any(T != T[0]):
+            raise ValueError("{uid} was not sampled at one temperature".format(uid=uid))
+        moments = self._moment_series(uid, t0)
+        series = dict(moments)
+        for column in observables:
+            if column not in moments and column not in DERIVED:
+                series[column] = arrays[_rename(column)][t0:]
+        table = reweight(moments["E"], T[0], T_new, series)
+        values = derived({name: table[name].to_numpy() for name in MOMENTS}, self.model.N, table.index.to_numpy())
+        for name in DERIVED:
+            table[name] = values[name]
+        table["reliable"] = table["overlap"] >= min_overlap
+        return table[list(observables) + ["overlap", "ess", "reliable"]]
+
+    def wham(
+        self,
+        uid: Union[dict, List[str]],
+        columns: List[str] = None,
+        t0: int = 0,
+        correlated: bool = True,
+        method: str = "iterate",
+        tol: float = 1e-10,
+    ) -> WHAM:
+        """
+        Multiple-histogram reweighting of the runs of a temperature sweep, see WHAM
+
+        Parameters
+        ----------
+        uid : Union[dict, List[str]]
+            the dict of param_sample over T, or a uid list of runs at one temperature each
+        columns : List[str], optional
+            scalar columns to reweight besides the moments of stats.MOMENTS, by default none
+        t0 : int, optional
+            start time, by default 0
+        correlated : bool, optional
+            divide the rows of each run by its statistical inefficiency, by default True
+        method : str, optional
+            "iterate" or "newton", by default "iterate"
+        tol : float, optional
+            the largest change of the free energies at convergence, by default 1e-10
+
+        Returns
+        -------
+        WHAM
+            the solved equations, see WHAM.curves and WHAM.density_of_states
+
+        Raises
+        ------
+        ValueError
+            The dict is not a sweep over T, or a run was not sampled at one temperature.
+        """
+        if isinstance(uid, dict) and "T" not in uid.keys():
+            raise ValueError("WHAM reweights a sweep over T, not over {keys}".format(keys=list(uid.keys())[1:]))
+        energy, T, series = [], [], []
+        for uid_item in self._uids(uid):
+            arrays = self.trajectory.arrays(uid_item)
+            T_run = np.asarray(arrays["T"][t0:], dtype=np.float64)
+            if len(T_run) == 0 or np.any(T_run != T_run[0]):
+                raise ValueError("{uid} was not sampled at one temperature".format(uid=uid_item))
+            moments = self._moment_series(uid_item, t0)
+            for column in columns or []:
+                moments[column] = arrays[_rename(column)][t0:]
+            energy.append(moments["E"])
+            T.append(T_run[0])
+            series.append(moments)
+        return WHAM(energy, T, series, N=self.model.N, correlated=correlated).solve(method=method, tol=tol)
 
     def curve(self, uid: str, column: str, t0: int = 0):
         """
@@ -531,10 +1364,9 @@ class Metropolis:
         ----------
         matplotlib.pyplot.plot
         """
-        data = self.data
         column = _rename(column)
-        array = data.loc[uid][column][t0:]
-        index = data.loc[uid].index
+        array = self.getcolumn(uid, column, t0)
+        index = np.arange(1, self.trajectory.size(uid) + 1)[t0:]
         plt.plot(index, array)
 
     def scatter(self, uid, column, t0: int = 0):
@@ -554,10 +1386,9 @@ class Metropolis:
         ----------
         matplotlib.pyplot.scatter
         """
-        data = self.data
         column = _rename(column)
-        array = data.loc[uid][column][t0:]
-        index = data.loc[uid].index
+        array = self.getcolumn(uid, column, t0)
+        index = np.arange(1, self.trajectory.size(uid) + 1)[t0:]
         plt.scatter(index, array)
 
     # def param_plot(self, uid_dict: Dict[str, np.array], column: str, per: bool = True):
@@ -631,14 +1462,14 @@ class Metropolis:
         uid : str
             uid
         iter : int
-            iter
+            iter, the last snapshot at or before it is shown
         cmap : str, optional
             cmap, by default "gray"
         Attributes
         ----------
         matplotlib.pyplot.imshow
         """
-        spin = self.data.loc[(uid, iter), "spin"]
+        spin = self.snapshots.get(uid, iter)
         plt.imshow(spin, cmap=cmap)
         plt.axis("off")
         plt.axis("equal")
@@ -661,7 +1492,8 @@ class Metropolis:
         matplotlib.animation.FuncAnimation
         """
         fig, ax = plt.subplots(figsize=(5, 5))
-        spin_lst = self.data.loc[uid, "spin"].tolist()
+        spin_lst = self.snapshots.spins(uid)
+        iter_lst = self.snapshots.iters(uid)
 
         def init():
             ax.imshow(spin_lst[0], cmap="gray")
@@ -671,7 +1503,7 @@ class Metropolis:
         def update(iter):
             ax.clear()
             ax.imshow(spin_lst[iter], cmap="gray")
-            ax.set_title("iter: {}".format(iter))
+            ax.set_title("iter: {}".format(iter_lst[iter]))
             ax.axis("off")
             return ax
 
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+"""
+@文件    :RandomStream.py
+@时间    :2026/10/17 19:02:31
+@作者    :結凪
+"""
+
+from typing import Dict, Iterator, Tuple, Union
+import numpy as np
+
+__all__ = ["RandomStream"]
+
+
+class RandomStream(object):
+    """
+    Random stream
+    =============
+
+    Example
+    -------
+    >>> import mcmc_statphys as mcsp
+    >>> r = mcsp.algorithm.RandomStream(seed=42, block_size=4096)
+    >>> site = r.integers(100)
+    >>> u = r.random()
+
+    Description
+    -----------
+
+    The random numbers of a sampler are drawn from a ``numpy.random.Generator`` in
+    blocks of ``block_size`` and handed out one by one, so a proposal does not pay
+    the overhead of a numpy call for its site and its uniform. A block is refilled
+    when it runs out. The numbers have the same distribution as single draws.
+    """
+
+    def __init__(self, seed: Union[int, None] = None, block_size: int = 4096):
+        """
+        initialize the stream
+
+        Parameters
+        ----------
+        seed : Union[int, None], optional
+            The seed of the generator, by default drawn from np.random, so that
+            np.random.seed still makes a run reproducible
+        block_size : int, optional
+            The number of values drawn at once, by default 4096
+        """
+        if block_size < 1:
+            raise ValueError("block_size must be a positive integer")
+        if seed is None:
+            seed = np.random.randint(0, 2**31)
+        self.generator: np.random.Generator = np.random.default_rng(seed)
+        self.block_size: int = int(block_size)
+        self._integers: Dict[int, Iterator[int]] = {}
+        self._uniforms: Iterator[float] = iter(())
+
+    def integers(self, high: int) -> int:
+        """
+        Draw a random integer in [0, high)
+
+        Parameters
+        ----------
+        high : int
+            The exclusive upper bound, e.g. the number of sites
+
+        Returns
+        -------
+        int
+            The random integer
+        """
+        try:
+            return next(self._integers[high])
+        except (KeyError, StopIteration):
+            self._integers[high] = iter(self.generator.integers(0, high, size=self.block_size).tolist())
+            return next(self._integers[high])
+
+    def random(self, size: Union[int, Tuple[int, ...], None] = None) -> Union[float, np.ndarray]:
+        """
+        Draw uniforms in [0, 1)
+
+        Parameters
+        ----------
+        size : Union[int, Tuple[int, ...], None], optional
+            The shape of an array of uniforms, by default a single uniform
+
+        Returns
+        -------
+        Union[float, np.ndarray]
+            The uniform, or an array of them drawn at once
+        """
+        if size is not None:
+            return self.generator.random(size)
+        try:
+            return next(self._uniforms)
+        except StopIteration:
+            self._uniforms = iter(self.generator.random(self.block_size).tolist())
+            return next(self._uniforms)
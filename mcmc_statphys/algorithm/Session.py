@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+"""
+@文件    :Session.py
+@时间    :2026/10/17 21:05:43
+@作者    :結凪
+"""
+
+from typing import Iterable, Union
+import numpy as np
+from tqdm import tqdm
+from ..checkpoint import _sampling
+
+__all__ = ["Session"]
+
+
+class Session(object):
+    """
+    Sampling session
+    ================
+
+    Example
+    -------
+    >>> import mcmc_statphys as mcsp
+    >>> f = mcsp.algorithm.Metropolis(mcsp.model.Ising(L=10))
+    >>> with f.run(T=2.0, uid="test") as r:
+    ...     r.thermalize(100, order="checkerboard")
+    ...     r.sweep(1000, order="checkerboard", measure_every=10)
+    ...     r.step(500)
+
+    Description
+    -----------
+
+    A session resolves its uid and restores the state of the run once, when it is
+    opened. The steps and sweeps of the session then only do the incremental work
+    of the updates and append the measured rows, the spin is not restored and the
+    total energy is not recomputed. If another uid was sampled by the algorithm in
+    between, the state of the session is restored once more before its next call.
+
+    Rows of scalar observables are recorded every ``measure_every`` updates or
+    sweeps and snapshots of the spin every ``snapshot_every``, by default with
+    every row. The sink and the checkpointer of the algorithm, if any, are told
+    about every row and every update, see ChunkSink and Checkpointer.
+
+    The algorithm provides ``_setup_uid(uid)``, ``_update(T, ac_from)``,
+    ``_sweep(T, ac_from, order)``, ``_record(T, uid)`` and ``_snapshot(uid)``, see
+    ``Metropolis``.
+    """
+
+    def __init__(self, algorithm: object, T: Union[float, np.ndarray] = None, uid: str = None, ac_from="class"):
+        """
+        open the session
+
+        Parameters
+        ----------
+        algorithm : object
+            The algorithm, e.g. Metropolis
+        T : Union[float, np.ndarray], optional
+            Sample temperature, may be changed between the calls, by default None
+        uid : str, optional
+            uid, by default a new one
+        ac_from : str, optional
+            Acceptance form, "class" or "bath", by default "class"
+        """
+        self.algorithm = algorithm
+        self.T = T
+        self.ac_from = ac_from
+        self.uid: str = algorithm._setup_uid(uid)
+
+    def __enter__(self) -> "Session":
+        return self
+
+    def __exit__(self, *args) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return "Session(algorithm={name!r}, T={T!r}, uid={uid!r})".format(
+            name=self.algorithm.name, T=self.T, uid=self.uid
+        )
+
+    def _resume(self) -> None:
+        """
+        Restore the state of the session if the algorithm sampled another uid since
+        """
+        if self.algorithm._active_uid != self.uid:
+            self.algorithm._setup_uid(self.uid)
+
+    @staticmethod
+    def _range(n: int, progress: bool) -> Iterable[int]:
+        return tqdm(range(n), leave=False) if progress else range(n)
+
+    def _measure(self, iter: int, measure_every: int, snapshot_every: int) -> None:
+        """
+        Record the row and the snapshot due after the update or sweep iter, the
+        sink of the algorithm, if any, collects the new row
+        """
+        recorded = (iter + 1) % measure_every == 0
+        if recorded:
+            self.algorithm._record(self.T, self.uid)
+        if snapshot_every and (iter + 1) % snapshot_every == 0:
+            self.algorithm._snapshot(self.uid)
+        sink = getattr(self.algorithm, "sink", None)
+        if recorded and sink is not None:
+            sink.collect(self.uid)
+
+    def _tick(self, updates: int) -> None:
+        """
+        Report the updates to the checkpointer of the algorithm, if any
+        """
+        checkpointer = getattr(self.algorithm, "checkpointer", None)
+        if checkpointer is not None:
+            checkpointer.tick(updates)
+
+    def step(self, n: int = 1, measure_every: int = 1, snapshot_every: int = None, progress: bool = False) -> str:
+        """
+        n single updates, one row is recorded every measure_every updates
+
+        Parameters
+        ----------
+        n : int, optional
+            The number of updates, by default 1
+        measure_every : int, optional
+            Record one row every measure_every updates, by default 1
+        snapshot_every : int, optional
+            Store one snapshot every snapshot_every updates, 0 for none, by default measure_every
+        progress : bool, optional
+            Show a progress bar, by default False
+
+        Returns
+        -------
+        str
+            uid
+
+        Raises
+        ------
+        ValueError
+            measure_every is not positive.
+        """
+        if measure_every < 1:
+            raise ValueError("measure_every must be a positive integer")
+        if snapshot_every is None:
+            snapshot_every = measure_every
+        self._resume()
+        algorithm, T, ac_from = self.algorithm, self.T, self.ac_from
+        with _sampling(algorithm):
+            for iter in self._range(n, progress):
+                algorithm._update(T, ac_from=ac_from)
+                self._measure(iter, measure_every, snapshot_every)
+                self._tick(1)
+        return self.uid
+
+    def sweep(
+        self, n: int = 1, order: str = "random", measure_every: int = 1, snapshot_every: int = None, progress: bool = False
+    ) -> str:
+        """
+        n sweeps, one row is recorded every measure_every sweeps
+
+        Parameters
+        ----------
+        n : int, optional
+            The number of sweeps, by default 1
+        order : str, optional
+            The order of the proposals of a sweep, see the _sweep of the algorithm, by default "random"
+        measure_every : int, optional
+            Record one row every measure_every sweeps, by default 1
+        snapshot_every : int, optional
+            Store one snapshot every snapshot_every sweeps, 0 for none, by default measure_every
+        progress : bool, optional
+            Show a progress bar, by default False
+
+        Returns
+        -------
+        str
+            uid
+
+        Raises
+        ------
+        ValueError
+            measure_every is not positive.
+        """
+        if measure_every < 1:
+            raise ValueError("measure_every must be a positive integer")
+        if snapshot_every is None:
+            snapshot_every = measure_every
+        self._resume()
+        algorithm, T, ac_from = self.algorithm, self.T, self.ac_from
+        with _sampling(algorithm):
+            for iter in self._range(n, progress):
+                algorithm._sweep(T, ac_from=ac_from, order=order)
+                self._measure(iter, measure_every, snapshot_every)
+                self._tick(algorithm.model.N)
+        return self.uid
+
+    def thermalize(self, n: int = 1, order: str = "random", progress: bool = False) -> str:
+        """
+        n sweeps that are not recorded
+
+        Parameters
+        ----------
+        n : int, optional
+            The number of sweeps, by default 1
+        order : str, optional
+            The order of the proposals of a sweep, by default "random"
+        progress : bool, optional
+            Show a progress bar, by default False
+
+        Returns
+        -------
+        str
+            uid
+        """
+        self._resume()
+        algorithm, T, ac_from = self.algorithm, self.T, self.ac_from
+        with _sampling(algorithm):
+            for _ in self._range(n, progress):
+                algorithm._sweep(T, ac_from=ac_from, order=order)
+                self._tick(algorithm.model.N)
+        return self.uid
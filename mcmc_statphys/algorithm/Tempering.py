@@ -11,7 +11,7 @@ import copy
 from tqdm import tqdm
 import numpy as np
 import uuid
-import pandas as pd
+from ..checkpoint import _sampling
 from .Metropolis import Metropolis
 
 __all__ = ["Tempering"]
@@ -51,6 +51,7 @@ class Tempering(Metropolis):
     def __init__(self, model: object):
         super().__init__(model)
         self.name = "Tempering"
+        self.ladder: Dict = None  # The unfinished ladder of param_sample
 
     # def iter_sample(self, T: float, uid: str = None, ac_from="class") -> str:
     #     uid = self._setup_uid(uid)
@@ -64,24 +65,85 @@ class Tempering(Metropolis):
     #     return uid
 
     def param_sample(
-        self, T: tuple, H0: float = 0.0, max_iter: int = 1000, eq_iter: int = 1000, ac_from: str = "class"
+        self, T: tuple = None, H0: float = 0.0, max_iter: int = 1000, eq_iter: int = 1000, ac_from: str = "class"
     ) -> Dict[str, float]:
-        self.model.H = H0
-        Tmin, Tmax, Tlen = T
-        T_lst = np.linspace(Tmin, Tmax, Tlen)
-        algo_lst = [Metropolis(copy.deepcopy(self.model)) for T in T_lst]
-        uid_lst = [uuid.uuid1().hex for T in T_lst]
-        for iter in tqdm(range(max_iter), leave=False):
-            for i_algo in range(len(algo_lst)):
-                algo_lst[i_algo].equil_sample(T=T_lst[i_algo], max_iter=eq_iter, uid=uid_lst[i_algo], ac_from=ac_from)
-            for i_T in range(len(T_lst) - 1):
-                Delta = (1 / T_lst[i_T + 1] - 1 / T_lst[i_T]) * (
-                    algo_lst[i_T].model.energy - algo_lst[i_T + 1].model.energy
-                )
-                if np.exp(-Delta) > np.random.rand():
-                    uid_lst[i_T], uid_lst[i_T + 1] = uid_lst[i_T + 1], uid_lst[i_T]
-                    algo_lst[i_T], algo_lst[i_T + 1] = algo_lst[i_T + 1], algo_lst[i_T]
-        self.data = pd.concat([algo.data for algo in algo_lst])
+        """
+        Parallel tempering over a ladder of temperatures
+
+        The ladder, the replicas, their uids and the exchange rounds done, is kept in
+        self.ladder until the last round, a checkpoint written during the exchange
+        rounds holds it. After ``Tempering.resume(path)``, param_sample() without T
+        continues the unfinished ladder.
+
+        Parameters
+        ----------
+        T : tuple, optional
+            (Tmin, Tmax, Tlen) of the ladder, None continues the unfinished ladder, by default None
+        H0 : float, optional
+            The external field, by default 0.0
+        max_iter : int, optional
+            The number of exchange rounds, by default 1000
+        eq_iter : int, optional
+            The number of single updates of every replica between two exchange rounds, by default 1000
+        ac_from : str, optional
+            The acceptance, see Metropolis, by default "class"
+
+        Returns
+        -------
+        Dict[str, float]
+            The uids and the temperatures of the ladder
+
+        Raises
+        ------
+        ValueError
+            T is None and there is no unfinished ladder.
+        """
+        if T is None:
+            if self.ladder is None:
+                raise ValueError("There is no unfinished ladder to continue, T is needed")
+        else:
+            self.model.H = H0
+            Tmin, Tmax, Tlen = T
+            T_lst = np.linspace(Tmin, Tmax, Tlen)
+            algo_lst = [Metropolis(copy.deepcopy(self.model)) for T in T_lst]
+            for algo in algo_lst:
+                algo.burn_in = self.burn_in
+            self.ladder = {
+                "replicas": algo_lst,
+                "uid": [uuid.uuid1().hex for T in T_lst],
+                "T": T_lst,
+                "iter": 0,
+                "max_iter": max_iter,
+                "eq_iter": eq_iter,
+                "ac_from": ac_from,
+            }
+        ladder = self.ladder
+        algo_lst, uid_lst, T_lst = ladder["replicas"], ladder["uid"], ladder["T"]
+        with _sampling(self):
+            for iter in tqdm(range(ladder["iter"], ladder["max_iter"]), leave=False):
+                for i_algo in range(len(algo_lst)):
+                    algo_lst[i_algo].equil_sample(
+                        T=T_lst[i_algo], max_iter=ladder["eq_iter"], uid=uid_lst[i_algo], ac_from=ladder["ac_from"]
+                    )
+                for i_T in range(len(T_lst) - 1):
+                    Delta = (1 / T_lst[i_T + 1] - 1 / T_lst[i_T]) * (
+                        algo_lst[i_T].model.energy - algo_lst[i_T + 1].model.energy
+                    )
+                    if np.exp(-Delta) > np.random.rand():
+                        uid_lst[i_T], uid_lst[i_T + 1] = uid_lst[i_T + 1], uid_lst[i_T]
+                        algo_lst[i_T], algo_lst[i_T + 1] = algo_lst[i_T + 1], algo_lst[i_T]
+                ladder["iter"] = iter + 1
+                checkpointer = getattr(self, "checkpointer", None)
+                if checkpointer is not None:
+                    checkpointer.tick(ladder["eq_iter"] * len(algo_lst))
+        self.ladder = None
+        self.trajectory = self.model._init_data()
+        self.snapshots = self.model._init_snapshots()
+        self._active_uid = None
+        for algo in algo_lst:
+            self.trajectory.extend(algo.trajectory)
+            self.snapshots.extend(algo.snapshots)
+            self.moments.update(algo.moments)
         uid_param_dict: Dict = {"uid": uid_lst, "T": T_lst}
         self.param_list.append(uid_param_dict)
         return uid_param_dict
@@ -8,13 +8,13 @@
 
 
 import numpy as np
-import copy
 from tqdm import tqdm
+from ..checkpoint import Checkpointable, _sampling
 
 __all__ = ["WangLandau"]
 
 
-class WangLandau:
+class WangLandau(Checkpointable):
     """
     Wang and Landau algorithm
     =========================
@@ -49,6 +49,7 @@ class WangLandau:
         self.hist = []
         self.logF = 1
         self.overlap = overlap * self.model.N
+        self.count = 0  # proposals since logF was last halved
 
     def _flat(self, array: np.array, epsilon: float = 0.8) -> bool:
         """
@@ -83,23 +84,23 @@ class WangLandau:
         np.array
             The log of density of states
         """
-        count = 0
         total = int(np.log(epsilon) / np.log(0.5)) + 1
-        with tqdm(total=total) as pbar:
+        checkpointer = getattr(self, "checkpointer", None)
+        with _sampling(self), tqdm(total=total) as pbar:
             while self.logF > epsilon:
                 if not self.elst:
                     self.elst.append(self.model.energy)
                     self.logG.append(1)
                     self.hist.append(1)
                 else:
-                    temp_model = copy.deepcopy(self.model)
-                    self.model._random_walk()
-                    index_old = np.argmin(np.abs(self.elst - temp_model.energy))
-                    index_new = np.argmin(np.abs(self.elst - self.model.energy))
+                    site = self.model._random_site()
+                    new_site, delta_E = self.model._propose(site)
+                    index_old = np.argmin(np.abs(np.asarray(self.elst) - self.model.energy))
+                    index_new = np.argmin(np.abs(np.asarray(self.elst) - (self.model.energy + delta_E)))
                     if not np.log(np.random.rand()) < self.logG[index_old] - self.logG[index_new]:
-                        self.model = temp_model
                         index = index_old
                     else:
+                        self.model._accept(site, new_site, delta_E)
                         index = index_new
                     if abs(self.elst[index] - self.model.energy) > self.overlap:
                         if self.elst[index] - self.model.energy > 0:
@@ -113,22 +114,24 @@ class WangLandau:
                     else:
                         self.hist[index] += 1
                         self.logG[index] += self.logF
-                count += 1
-                if count % 1000 == 0:
+                self.count += 1
+                if checkpointer is not None:
+                    checkpointer.tick(1)
+                if self.count % 1000 == 0:
                     narray = np.array(self.hist)
                     pbar.set_description(
                         "Now count: {c}e3; The logF is {f}; Min_h is {m}; 80% mean is {e}".format(
-                            c=count // 1000,
+                            c=self.count // 1000,
                             f=self.logF,
                             m=min(narray[narray > 0]),
                             e=np.round(0.8 * np.mean(narray[narray > 0]), 3),
                         )
                     )
-                if self._flat(self.hist) and count > 1e4:
+                if self._flat(self.hist) and self.count > 1e4:
                     self.hist = np.zeros(len(self.hist)).tolist()
                     self.logF /= 2
                     pbar.update(1)
-                    count = 0
+                    self.count = 0
                     self.logG = np.array(self.logG)
                     self.logG -= min(self.logG)
                     self.logG = self.logG.tolist()
@@ -44,60 +44,72 @@ class Wolff(Metropolis):
 
     """
 
-    def __init__(self, model: object):
+    def __init__(self, model: object, block_size: int = 4096, seed: int = None):
         # TODO: 增加对于其他模型的支持
         if model.type != "ising" and model.type != "rfising":
             raise ValueError("The model must be Ising")
-        super().__init__(model)
+        super().__init__(model, block_size=block_size, seed=seed)
         self.name = "Wolff"
 
-    def iter_sample(self, T: float, uid: str = None, **kwargs) -> str:
+    def _update(self, T: float, ac_from="class", site: int = None) -> int:
         """
-        Iterative sampling
+        Grow and flip one cluster, nothing is recorded
 
         Parameters
         ----------
         T : float
             The temperature
-        uid : str, optional
-            The uid of the data, by default None
+        ac_from : str, optional
+            Unused, the cluster is always flipped
+        site : int, optional
+            The flat index of the seed, random by default
 
         Returns
         -------
-        str
-            The uid of the data
-
+        int
+            The size of the cluster
         """
-        uid = self._setup_uid(uid)
+        spin = self.model._flat_spin()
         cluster = set()
         neighbors = deque()
         # 随机选取一个点
-        site = tuple(np.random.randint(0, self.model.L, size=self.model.dim))
+        if site is None:
+            site = self.random.integers(self.model.N)
         neighbors.append(site)
         cluster.add(site)
+        add_probability = 1 - np.exp(-2 * self.model.J / T)
         while len(neighbors) > 0:
             neighbor = neighbors.pop()
-            total_neighbors = self.model._get_neighbor(neighbor)
-            for same_neighbor in total_neighbors:
-                b1 = self.model.spin[same_neighbor] == self.model.spin[site]
-                b2 = np.random.rand() < (1 - np.exp(-2 * self.model.J / T))
+            total_neighbors = self.model.neighbors[neighbor]
+            for same_neighbor in total_neighbors.tolist():
+                b1 = spin[same_neighbor] == spin[site]
+                b2 = self.random.random() < add_probability
                 b3 = same_neighbor not in cluster
                 if b1 and b2 and b3:
                     cluster.add(same_neighbor)
                     neighbors.append(same_neighbor)
+        # flip the cluster site by site, the delta energies add up to the boundary energy
         for clip in cluster:
-            old_site = self.model.spin[clip]
-            old_site_energy = self.model._get_site_energy(clip)
-
-            self.model.spin[clip] *= -1
+            new_site, delta_E = self.model._propose(clip)
+            self.model._accept(clip, new_site, delta_E)
+        return len(cluster)
 
-            new_site = self.model.spin[clip]
-            new_site_energy = self.model._get_site_energy(clip)
-            self.model.energy += new_site_energy - old_site_energy
-            self.model.magnetization += new_site - old_site
+    def _sweep(self, T: float, ac_from="class", order: str = "random") -> None:
+        """
+        Flip clusters until N spins are flipped, nothing is recorded
 
-        self.data = self.model._save_date(T=T, uid=uid, data=self.data)
-        return uid
+        Parameters
+        ----------
+        T : float
+            The temperature
+        ac_from : str, optional
+            Unused, the cluster is always flipped
+        order : str, optional
+            Unused, the seeds are random
+        """
+        flipped = 0
+        while flipped < self.model.N:
+            flipped += self._update(T)
 
     # def equil_sample(self, T: float, max_iter: int = 1000, uid: str = None) -> str:
     #     """
@@ -1,4 +1,4 @@
-__all__ = ["Metropolis", "Wolff", "Anneal", "Tempering", "WangLandau", "Demon", "Kawasaki"]
+__all__ = ["Metropolis", "Wolff", "Anneal", "Tempering", "WangLandau", "Demon", "Kawasaki", "RandomStream", "Session"]
 
 from .Metropolis import Metropolis
 from .Wolff import Wolff
@@ -7,5 +7,7 @@ from .Tempering import Tempering
 from .WangLandau import WangLandau
 from .Demon import Demon
 from .Kawasaki import Kawasaki
+from .RandomStream import RandomStream
+from .Session import Session
 
 # TODO: HMC 算法
@@ -0,0 +1,440 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+"""
+@文件    :archive.py
+@时间    :2026/10/17 22:41:06
+@作者    :結凪
+"""
+
+import datetime
+import json
+import os
+import pickle
+import shutil
+from typing import Any, Dict, List, Union
+import numpy as np
+from .snapshot import FlipLog, Snapshots
+from .static import StaticStore
+from .trajectory import Trajectory
+
+__all__ = ["write_archive", "read_archive", "ChunkSink", "MSDT_VERSION"]
+
+MSDT_VERSION = 2
+_MANIFEST = "manifest.json"
+
+
+def _save_array(folder: str, name: str, array: Any) -> str:
+    """
+    Save one array of a run, .npy if it is numeric, else a pickle
+
+    Returns
+    -------
+    str
+        The file name, relative to the folder
+    """
+    if not isinstance(array, np.ndarray) or array.dtype == object:
+        file = name + ".pkl"
+        with open(os.path.join(folder, file), "wb") as f:
+            pickle.dump(array, f)
+    else:
+        file = name + ".npy"
+        np.save(os.path.join(folder, file), array)
+    return file
+
+
+def _load_array(folder: str, file: str, mmap_mode: Union[str, None]) -> np.ndarray:
+    """
+    Load one array of a run, the .npy files are memory-mapped
+    """
+    path = os.path.join(folder, file)
+    if file.endswith(".pkl"):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    return np.load(path, mmap_mode=mmap_mode)
+
+
+def _jsonable(param_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{key: np.asarray(value).tolist() for key, value in item.items()} for item in param_list]
+
+
+def _write_static(path: str, static: StaticStore, written: set) -> None:
+    """
+    Write the static arrays that are not in the archive yet, one .npy per content key
+    """
+    folder = os.path.join(path, "static")
+    os.makedirs(folder, exist_ok=True)
+    for key in static:
+        if key not in written:
+            # renamed into place, a reader never sees half an array
+            np.save(os.path.join(folder, key + ".tmp.npy"), static.get(key))
+            os.replace(os.path.join(folder, key + ".tmp.npy"), os.path.join(folder, key + ".npy"))
+            written.add(key)
+
+
+def _manifest(algo: object, runs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The manifest of the archive of the algorithm, see write_archive
+    """
+    snapshots: Snapshots = getattr(algo, "snapshots", None)
+    manifest = {
+        "format": "msdt",
+        "version": MSDT_VERSION,
+        "created": datetime.datetime.now().isoformat(),
+        "name": algo.name,
+        "columns": list(algo.trajectory.columns),
+        "param_list": _jsonable(getattr(algo, "param_list", [])),
+        "snapshots": None,
+        "static": list(algo.trajectory.static),
+        "runs": runs,
+    }
+    if snapshots is not None:
+        manifest["snapshots"] = {"type": type(snapshots).__name__, "codec": snapshots.codec}
+        if isinstance(snapshots, FlipLog):
+            manifest["snapshots"]["keyframe_every"] = snapshots.keyframe_every
+    return manifest
+
+
+def _write_manifest(path: str, manifest: Dict[str, Any]) -> None:
+    """
+    Write the manifest next to its place and rename it, a reader sees the old or the new one
+    """
+    tmp = os.path.join(path, _MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, os.path.join(path, _MANIFEST))
+
+
+def _layout(snapshots: Snapshots, uid: str) -> Dict[str, Any]:
+    shape, dtype = snapshots._layout.get(uid, ((), np.dtype(object)))
+    return {"shape": list(shape), "dtype": np.dtype(dtype).str}
+
+
+def _keep_active(algo: object) -> None:
+    snapshots: Snapshots = getattr(algo, "snapshots", None)
+    if snapshots is not None and getattr(algo, "_active_uid", None) in algo.trajectory.runs:
+        # the model holds the latest state of the active run
+        snapshots.keep(algo._active_uid, algo.model.spin)
+
+
+def _concatenate(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    Join the arrays of the chunks of a run, a single part is not copied
+    """
+    arrays = {}
+    for name in dict.fromkeys(name for part in parts for name in part):
+        values = [part[name] for part in parts if name in part]
+        arrays[name] = values[0] if len(values) == 1 else np.concatenate(values)
+    return arrays
+
+
+def write_archive(algo: object, path: str) -> str:
+    """
+    Write the runs of an algorithm as a msdt v2 archive
+
+    The archive is a directory::
+
+        path/
+            manifest.json       version, name, columns, param_list and the index of the runs
+            model.pkl           the initial model
+            static/             one .npy per static array, named by its content key
+            runs/00000/         one folder per uid
+                energy.npy ...  one .npy per column
+                snapshots/      the arrays of the snapshot store
+
+    It is written next to the path and renamed into place, an existing archive
+    is replaced.
+
+    Parameters
+    ----------
+    algo : object
+        The algorithm, e.g. Metropolis
+    path : str
+        The path of the archive
+
+    Returns
+    -------
+    str
+        The path
+    """
+    snapshots: Snapshots = getattr(algo, "snapshots", None)
+    _keep_active(algo)
+    tmp = path + ".tmp"
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+    os.makedirs(os.path.join(tmp, "runs"))
+    with open(os.path.join(tmp, "model.pkl"), "wb") as f:
+        pickle.dump(algo._rowmodel, f)
+    runs = {}
+    uids = list(dict.fromkeys(algo.trajectory.uids() + ([] if snapshots is None else snapshots.uids())))
+    for index, uid in enumerate(uids):
+        folder = os.path.join("runs", "{index:05d}".format(index=index))
+        os.makedirs(os.path.join(tmp, folder, "snapshots"))
+        entry = {"folder": folder, "rows": algo.trajectory.size(uid), "columns": {}, "snapshots": {}}
+        entry["static"] = algo.trajectory.static.bindings(uid)
+        if uid in algo.trajectory:
+            for column, array in algo.trajectory.arrays(uid).items():
+                entry["columns"][column] = _save_array(os.path.join(tmp, folder), column, array)
+        if snapshots is not None and uid in snapshots:
+            entry["layout"] = _layout(snapshots, uid)
+            for name, array in snapshots.arrays(uid).items():
+                entry["snapshots"][name] = _save_array(os.path.join(tmp, folder, "snapshots"), name, array)
+        runs[uid] = entry
+    _write_static(tmp, algo.trajectory.static, set())
+    _write_manifest(tmp, _manifest(algo, runs))
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+    os.replace(tmp, path)
+    return path
+
+
+def read_archive(path: str, uids: List[str] = None, mmap_mode: Union[str, None] = "r") -> Dict[str, Any]:
+    """
+    Read a msdt v2 archive, only the requested runs are opened
+
+    The chunks of a run written by a ChunkSink are joined, a run of one chunk
+    stays memory-mapped.
+
+    Parameters
+    ----------
+    path : str
+        The path of the archive
+    uids : List[str], optional
+        The uids to open, by default every run
+    mmap_mode : Union[str, None], optional
+        The mode of np.load, by default "r", the columns are memory-mapped and
+        only the pages that are read are loaded
+
+    Returns
+    -------
+    Dict[str, Any]
+        model, data (a Trajectory), snapshots, param_list, name and version
+
+    Raises
+    ------
+    ValueError
+        The manifest is not a msdt archive of a known version.
+    KeyError
+        A requested uid is not in the archive.
+    """
+    with open(os.path.join(path, _MANIFEST), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != "msdt" or manifest.get("version", 0) > MSDT_VERSION:
+        raise ValueError("{path} is not a msdt archive of version <= {version}".format(path=path, version=MSDT_VERSION))
+    with open(os.path.join(path, "model.pkl"), "rb") as f:
+        model = pickle.load(f)
+    runs = manifest["runs"]
+    if uids is None:
+        uids = list(runs)
+    trajectory = Trajectory(columns=manifest["columns"])
+    for key in manifest.get("static", []):
+        trajectory.static.attach(key, _load_array(os.path.join(path, "static"), key + ".npy", mmap_mode))
+    snapshots = None
+    if manifest["snapshots"] is not None:
+        store = manifest["snapshots"]
+        if store["type"] == "FlipLog":
+            snapshots = FlipLog(codec=store["codec"], keyframe_every=store["keyframe_every"])
+        else:
+            snapshots = Snapshots(codec=store["codec"])
+    for uid in uids:
+        entry = runs[uid]
+        columns, arrays = [], []
+        for part in [entry] + entry.get("chunks", []):
+            folder = os.path.join(path, part["folder"])
+            columns.append({column: _load_array(folder, file, mmap_mode) for column, file in part["columns"].items()})
+            folder = os.path.join(folder, "snapshots")
+            arrays.append({name: _load_array(folder, file, mmap_mode) for name, file in part["snapshots"].items()})
+        columns, arrays = _concatenate(columns), _concatenate(arrays)
+        if columns:
+            trajectory.attach(uid, columns)
+        for column, key in entry.get("static", {}).items():
+            trajectory.static.bind(uid, column, key)
+        if snapshots is not None and arrays:
+            layout = entry["layout"]
+            snapshots.attach(uid, arrays, tuple(layout["shape"]), np.dtype(layout["dtype"]))
+    param_list = [
+        {key: value if key == "uid" else np.asarray(value) for key, value in item.items()}
+        for item in manifest["param_list"]
+    ]
+    return {
+        "model": model,
+        "data": trajectory,
+        "snapshots": snapshots,
+        "param_list": param_list,
+        "name": manifest["name"],
+        "version": manifest["version"],
+    }
+
+
+class ChunkSink(object):
+    """
+    Chunk sink
+    ==========
+
+    Example
+    -------
+    >>> import mcmc_statphys as mcsp
+    >>> f = mcsp.algorithm.Metropolis(mcsp.model.Ising(L=100))
+    >>> with mcsp.ChunkSink(f, "run.msdt", every=1000):
+    ...     f.equil_sample(T=2.0, max_iter=1000000)
+    >>> mcsp.method.read_msdt("run.msdt")
+
+    Description
+    -----------
+
+    Streams the rows of an algorithm to a msdt v2 archive, see write_archive. Every
+    ``every`` rows of a run are written as one chunk folder of the run and dropped
+    from memory, so the memory of a long run is bounded by the rows of one chunk.
+    The snapshots are written with the rows, except a FlipLog, whose log is written
+    when the sink is closed.
+
+    A chunk is written next to its place and renamed, then the manifest is
+    replaced, so the archive can be read with read_archive while the run continues,
+    it holds every chunk written so far. Closing the sink writes the remaining rows
+    and the latest states of the runs.
+
+    The sink collects the rows recorded by the sessions of the algorithm, see
+    Session. The statistics of the algorithm only see the rows still in memory,
+    read the archive for the whole run.
+    """
+
+    def __init__(self, algo: object, path: str, every: int = 1000):
+        """
+        open the archive and attach the sink to the algorithm, an existing archive is replaced
+
+        Parameters
+        ----------
+        algo : object
+            The algorithm, e.g. Metropolis
+        path : str
+            The path of the archive
+        every : int, optional
+            The number of rows of a chunk, by default 1000
+
+        Raises
+        ------
+        ValueError
+            every is not positive.
+        """
+        if every < 1:
+            raise ValueError("every must be a positive integer")
+        self.algo = algo
+        self.path: str = path
+        self.every: int = int(every)
+        self._runs: Dict[str, Dict[str, Any]] = {}
+        self._static: set = set()  # the keys of the static arrays written
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+        os.makedirs(os.path.join(path, "runs"))
+        with open(os.path.join(path, "model.pkl"), "wb") as f:
+            pickle.dump(algo._rowmodel, f)
+        _write_manifest(path, _manifest(algo, self._runs))
+        algo.sink = self
+
+    def __enter__(self) -> "ChunkSink":
+        return self
+
+    def __exit__(self, *args) -> bool:
+        self.close()
+        return False
+
+    def __repr__(self) -> str:
+        return "ChunkSink(path={path!r}, every={every})".format(path=self.path, every=self.every)
+
+    def _entry(self, uid: str) -> Dict[str, Any]:
+        entry = self._runs.get(uid)
+        if entry is None:
+            folder = os.path.join("runs", "{index:05d}".format(index=len(self._runs)))
+            os.makedirs(os.path.join(self.path, folder))
+            entry = self._runs[uid] = {"folder": folder, "rows": 0, "columns": {}, "snapshots": {}, "chunks": []}
+        return entry
+
+    def _write_chunk(self, uid: str) -> None:
+        """
+        Write the rows of the run in memory as its next chunk and drop them
+        """
+        trajectory: Trajectory = self.algo.trajectory
+        snapshots: Snapshots = getattr(self.algo, "snapshots", None)
+        entry = self._entry(uid)
+        folder = os.path.join(entry["folder"], "{index:06d}".format(index=len(entry["chunks"])))
+        tmp = os.path.join(self.path, folder + ".tmp")
+        if os.path.exists(tmp):
+            shutil.rmtree(tmp)
+        os.makedirs(os.path.join(tmp, "snapshots"))
+        chunk = {"folder": folder, "rows": trajectory.size(uid), "columns": {}, "snapshots": {}}
+        for column, array in trajectory.arrays(uid).items():
+            chunk["columns"][column] = _save_array(tmp, column, array)
+        stream = snapshots is not None and not isinstance(snapshots, FlipLog)
+        if stream and uid in snapshots.frames:
+            entry["layout"] = _layout(snapshots, uid)
+            for name, array in snapshots.frames.arrays(uid).items():
+                chunk["snapshots"][name] = _save_array(os.path.join(tmp, "snapshots"), name, array)
+        if os.path.exists(os.path.join(self.path, folder)):
+            # written after the checkpoint the sink was resumed from
+            shutil.rmtree(os.path.join(self.path, folder))
+        os.replace(tmp, os.path.join(self.path, folder))
+        trajectory.drop(uid)
+        if stream:
+            snapshots.frames.drop(uid)
+        entry["chunks"].append(chunk)
+        entry["rows"] += chunk["rows"]
+        entry["static"] = trajectory.static.bindings(uid)
+
+    def collect(self, uid: str) -> None:
+        """
+        Write the rows of the run once a chunk is full
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        """
+        if self.algo.trajectory.size(uid) >= self.every:
+            self.flush(uid)
+
+    def flush(self, uid: str = None) -> None:
+        """
+        Write the rows in memory as chunks and replace the manifest
+
+        Parameters
+        ----------
+        uid : str, optional
+            uid, by default every run
+        """
+        trajectory: Trajectory = self.algo.trajectory
+        for uid in trajectory.uids() if uid is None else [uid]:
+            if trajectory.size(uid) > 0:
+                self._write_chunk(uid)
+        _write_static(self.path, trajectory.static, self._static)
+        _write_manifest(self.path, _manifest(self.algo, self._runs))
+
+    def close(self) -> None:
+        """
+        Write the remaining rows and the latest states of the runs and detach the sink
+        """
+        if self.algo.sink is not self:
+            # already closed
+            return
+        self.flush()
+        snapshots: Snapshots = getattr(self.algo, "snapshots", None)
+        if snapshots is not None:
+            _keep_active(self.algo)
+            for uid in snapshots.uids() + list(snapshots._states):
+                if uid not in self._runs or self._runs[uid]["snapshots"]:
+                    continue
+                entry = self._runs[uid]
+                folder = os.path.join(self.path, entry["folder"], "snapshots")
+                os.makedirs(folder + ".tmp")
+                if isinstance(snapshots, FlipLog):
+                    arrays = snapshots.arrays(uid)
+                else:
+                    arrays = {} if uid not in snapshots._states else {"state": snapshots._states[uid]}
+                for name, array in arrays.items():
+                    entry["snapshots"][name] = _save_array(folder + ".tmp", name, array)
+                entry["layout"] = _layout(snapshots, uid)
+                os.replace(folder + ".tmp", folder)
+        _write_manifest(self.path, _manifest(self.algo, self._runs))
+        self.algo.sink = None
@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+"""
+@文件    :checkpoint.py
+@时间    :2026/10/18 00:12:37
+@作者    :結凪
+"""
+
+import contextlib
+import os
+import pickle
+import signal
+from typing import Any, ContextManager, Dict, Iterator, Union
+import numpy as np
+
+__all__ = ["save_checkpoint", "load_checkpoint", "Checkpointer", "Checkpointable", "CHECKPOINT_VERSION"]
+
+CHECKPOINT_VERSION = 2
+
+
+def save_checkpoint(algo: object, path: str) -> str:
+    """
+    Write the resumable state of an algorithm to a binary checkpoint
+
+    The checkpoint is one pickle of the algorithm, its model, its sampler state,
+    e.g. logG and hist of WangLandau, q and p of HamiltonianMC or the ladder of
+    Tempering, the state of its random stream, with the pending blocks, and its
+    moments, together with the state of np.random. The recorded rows and the
+    snapshots are not part of it, only the iteration and the latest state of every
+    run, see Trajectory.compact and Snapshots.compact, so its size does not grow
+    with the history. The ChunkSink of the algorithm, if any, is flushed first, so
+    the archive holds every row up to the checkpoint. It is written next to the
+    path and renamed into place, an interrupted write leaves the previous
+    checkpoint.
+
+    Parameters
+    ----------
+    algo : object
+        The algorithm, e.g. Metropolis
+    path : str
+        The path of the checkpoint
+
+    Returns
+    -------
+    str
+        The path
+    """
+    sink = getattr(algo, "sink", None)
+    if sink is not None:
+        sink.flush()
+    checkpointer = getattr(algo, "checkpointer", None)
+    algo.checkpointer = None  # the signal handlers are not part of the state
+    try:
+        with _compacted(algo):
+            payload = {"version": CHECKPOINT_VERSION, "algo": algo, "np_random": np.random.get_state()}
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        algo.checkpointer = checkpointer
+    return path
+
+
+@contextlib.contextmanager
+def _compacted(algo: object) -> Iterator[None]:
+    """
+    Swap the rows and the snapshots of the algorithm, and of the replicas of an
+    unfinished Tempering ladder, for their compact stores
+    """
+    ladder = getattr(algo, "ladder", None) or {}
+    swapped = []
+    for item in [algo] + list(ladder.get("replicas", [])):
+        for name in ["trajectory", "snapshots"]:
+            store = getattr(item, name, None)
+            if hasattr(store, "compact"):
+                swapped.append((item, name, store))
+                setattr(item, name, store.compact())
+    try:
+        yield
+    finally:
+        for item, name, store in swapped:
+            setattr(item, name, store)
+
+
+def load_checkpoint(path: str, cls: type = None) -> object:
+    """
+    Read a checkpoint, the state of np.random is restored
+
+    Parameters
+    ----------
+    path : str
+        The path of the checkpoint
+    cls : type, optional
+        The expected class of the algorithm, by default any
+
+    Returns
+    -------
+    object
+        The algorithm, sampling continues where the checkpoint was written
+
+    Raises
+    ------
+    ValueError
+        The file is not a checkpoint of a known version.
+    TypeError
+        The algorithm is not an instance of cls.
+    """
+    with open(path, "rb") as f:
+        payload: Dict[str, Any] = pickle.load(f)
+    if not isinstance(payload, dict) or payload.get("version", 0) > CHECKPOINT_VERSION or "algo" not in payload:
+        raise ValueError(
+            "{path} is not a checkpoint of version <= {version}".format(path=path, version=CHECKPOINT_VERSION)
+        )
+    algo = payload["algo"]
+    if cls is not None and not isinstance(algo, cls):
+        raise TypeError(
+            "{path} is a checkpoint of {name}, not {cls}".format(path=path, name=type(algo).__name__, cls=cls.__name__)
+        )
+    np.random.set_state(payload["np_random"])
+    return algo
+
+
+class Checkpointer(object):
+    """
+    Checkpointer
+    ============
+
+    Example
+    -------
+    >>> import mcmc_statphys as mcsp
+    >>> f = mcsp.algorithm.Metropolis(mcsp.model.Ising(L=100))
+    >>> f.checkpoint("run.ckpt", every=1000, sigterm=True)
+    >>> f.equil_sample(T=2.0, sweeps=10**6)
+    >>> # after a preemption
+    >>> f = mcsp.algorithm.Metropolis.resume("run.ckpt")
+
+    Description
+    -----------
+
+    Writes a checkpoint of the algorithm every ``every`` sweeps and, if ``sigterm``
+    is set, when the process receives SIGTERM. The signal only sets a flag, the
+    checkpoint is written at the next update boundary, where the model is
+    consistent, and the process then exits with status 128 + SIGTERM.
+
+    The sampling loops run inside ``sampling()`` and report their progress with
+    ``tick(updates)``, a sweep is model.N updates. The sessions of the algorithms,
+    WangLandau.sample and the exchange rounds of Tempering do. The SIGTERM handler
+    is only installed while a sampling loop runs, outside of one the previous
+    handler is in place and a SIGTERM is not deferred.
+    """
+
+    def __init__(self, algo: object, path: str, every: Union[int, None] = None, sigterm: bool = True):
+        """
+        attach the checkpointer to the algorithm
+
+        Parameters
+        ----------
+        algo : object
+            The algorithm, e.g. Metropolis
+        path : str
+            The path of the checkpoint
+        every : Union[int, None], optional
+            Write a checkpoint every so many sweeps, by default None, never
+        sigterm : bool, optional
+            Write a checkpoint and exit on SIGTERM, by default True. The handler is
+            only installed from the main thread, while a sampling loop runs.
+
+        Raises
+        ------
+        ValueError
+            every is not positive.
+        """
+        if every is not None and every < 1:
+            raise ValueError("every must be a positive integer")
+        self.algo = algo
+        self.path: str = path
+        self.every: Union[int, None] = every
+        self.sigterm: bool = sigterm
+        self._updates: int = 0
+        self._terminate: bool = False
+        self._depth: int = 0  # the sampling loops running
+        self._installed: bool = False
+        self._previous = None
+        algo.checkpointer = self
+
+    def __repr__(self) -> str:
+        return "Checkpointer(path={path!r}, every={every})".format(path=self.path, every=self.every)
+
+    def _handle(self, signum: int, frame: Any) -> None:
+        self._terminate = True
+
+    def _install(self) -> None:
+        if not self.sigterm or self._installed:
+            return
+        try:
+            self._previous = signal.signal(signal.SIGTERM, self._handle)
+            self._installed = True
+        except ValueError:
+            # signals are only handled by the main thread
+            pass
+
+    def _restore(self) -> None:
+        if self._installed:
+            signal.signal(signal.SIGTERM, self._previous)
+            self._installed, self._previous = False, None
+
+    def _exit(self) -> None:
+        save_checkpoint(self.algo, self.path)
+        self.close()
+        raise SystemExit(128 + signal.SIGTERM)
+
+    @contextlib.contextmanager
+    def sampling(self) -> Iterator["Checkpointer"]:
+        """
+        Install the SIGTERM handler for the duration of a sampling loop
+
+        A SIGTERM received after the last tick of the loop is handled when the loop
+        returns, the checkpoint is written and the process exits.
+
+        Raises
+        ------
+        SystemExit
+            SIGTERM was received, the checkpoint is written.
+        """
+        self._depth += 1
+        self._install()
+        try:
+            yield self
+        finally:
+            self._depth = max(self._depth - 1, 0)
+            if self._depth == 0:
+                self._restore()
+        if self._terminate:
+            self._exit()
+
+    def tick(self, updates: int = 1) -> None:
+        """
+        Count updates, write the checkpoint when it is due
+
+        Parameters
+        ----------
+        updates : int, optional
+            The number of updates since the last call, by default 1
+
+        Raises
+        ------
+        SystemExit
+            SIGTERM was received, the checkpoint is written.
+        """
+        if self._terminate:
+            self._exit()
+        if self.every is None:
+            return
+        self._updates += updates
+        if self._updates >= self.every * self.algo.model.N:
+            self._updates = 0
+            save_checkpoint(self.algo, self.path)
+
+    def close(self) -> None:
+        """
+        Detach the checkpointer and restore the previous SIGTERM handler
+        """
+        self._restore()
+        self._depth, self._terminate = 0, False
+        if getattr(self.algo, "checkpointer", None) is self:
+            self.algo.checkpointer = None
+
+
+def _sampling(algo: object) -> ContextManager:
+    """
+    The sampling() of the checkpointer of the algorithm, if any, see Checkpointer
+    """
+    checkpointer = getattr(algo, "checkpointer", None)
+    return contextlib.nullcontext() if checkpointer is None else checkpointer.sampling()
+
+
+class Checkpointable(object):
+    """
+    The checkpoint and resume methods of the algorithms, see Checkpointer
+
+    The sampling loops of the algorithm run inside ``_sampling(self)`` and call
+    ``self.checkpointer.tick(updates)``, if any.
+    """
+
+    def checkpoint(self, path: str, every: int = None, sigterm: bool = False) -> str:
+        """
+        Write the resumable state of the sampler to a checkpoint, without the rows, see save_checkpoint
+
+        Parameters
+        ----------
+        path : str
+            The path of the checkpoint
+        every : int, optional
+            Also write it every so many sweeps of the following sampling, by default None
+        sigterm : bool, optional
+            Also write it and exit when the process receives SIGTERM during the
+            following sampling, by default False
+
+        Returns
+        -------
+        str
+            The path
+
+        Example
+        -------
+        >>> f.checkpoint("run.ckpt", every=1000, sigterm=True)
+        >>> f = mcsp.algorithm.Metropolis.resume("run.ckpt")
+        """
+        if getattr(self, "checkpointer", None) is not None:
+            self.checkpointer.close()
+        if every is not None or sigterm:
+            Checkpointer(self, path, every=every, sigterm=sigterm)
+        return save_checkpoint(self, path)
+
+    @classmethod
+    def resume(cls, path: str) -> Any:
+        """
+        Read a checkpoint written by checkpoint, the sampling continues where it stopped
+
+        Parameters
+        ----------
+        path : str
+            The path of the checkpoint
+
+        Returns
+        -------
+        Any
+            The algorithm, an instance of cls
+        """
+        return load_checkpoint(path, cls)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+"""
+@文件    :histogram.py
+@时间    :2026/10/18 04:36:12
+@作者    :結凪
+"""
+
+from typing import Dict, List, Tuple, Union
+import numpy as np
+import pandas as pd
+from scipy.special import logsumexp
+from .stats import MOMENTS, acf, boltzmann_weights, derived, integrated_time
+
+__all__ = ["WHAM"]
+
+
+class WHAM(object):
+    """
+    WHAM
+    ====
+
+    Example
+    -------
+    >>> import mcmc_statphys as mcsp
+    >>> f = mcsp.algorithm.Metropolis(mcsp.model.Ising(L=16))
+    >>> runs = f.param_sample((2.0, 2.6, 7), sweeps=10000, therm_sweeps=1000)
+    >>> wham = f.wham(runs)
+    >>> wham.curves(np.linspace(2.0, 2.6, 200))
+
+    Description
+    -----------
+
+    Multiple-histogram reweighting (Ferrenberg and Swendsen) of canonical runs at
+    the temperatures T_k. The dimensionless free energies f_k = -ln Z_k solve
+
+        f_k = -ln sum_j exp(-beta_k E_j) / sum_l n_l exp(f_l - beta_l E_j)
+
+    over the pooled rows j of all runs, with f_0 = 0. The equations are binless,
+    every row is its own bin, and are solved by vectorized log-sum-exp iterations
+    or by Newton's method on the convex objective of Shirts and Chodera (MBAR).
+    With ``correlated`` the counts n_k are divided by the statistical inefficiency
+    2 tau_int of the energy of each run.
+
+    The density of states, the free energy and the mean of any moment or scalar
+    column follow at every temperature between the runs. The errors are from a
+    block jackknife: block b of every run is dropped at once and the equations are
+    solved again.
+    """
+
+    def __init__(
+        self,
+        energy: List[np.ndarray],
+        T: np.ndarray,
+        series: List[Dict[str, np.ndarray]] = None,
+        N: int = 1,
+        correlated: bool = True,
+        c: float = 6.0,
+    ):
+        """
+        Parameters
+        ----------
+        energy : List[np.ndarray]
+            The total energy of the rows of each run
+        T : np.ndarray
+            The temperature of each run
+        series : List[Dict[str, np.ndarray]], optional
+            name -> the series of each run, by default the moments of the energy only
+        N : int, optional
+            The number of sites, for the specific heat and the susceptibility, by default 1
+        correlated : bool, optional
+            Count the independent rows of each run, by default True
+        c : float, optional
+            The window factor of integrated_time, by default 6.0
+
+        Raises
+        ------
+        ValueError
+            Fewer than one run, or the runs and the temperatures differ in number.
+        """
+        if len(energy) == 0 or len(energy) != len(T):
+            raise ValueError("WHAM needs one temperature for each of at least one run")
+        if series is None:
+            series = [{"E": e, "E2": np.asarray(e, dtype=np.float64) ** 2} for e in energy]
+        self.T: np.ndarray = np.asarray(T, dtype=np.float64)
+        self.beta: np.ndarray = 1 / self.T
+        self.N: int = N
+        self.run: np.ndarray = np.concatenate([np.full(len(e), k) for k, e in enumerate(energy)])
+        self.position: np.ndarray = np.concatenate([np.arange(len(e)) / len(e) for e in energy])
+        self.energy: np.ndarray = np.concatenate([np.asarray(e, dtype=np.float64) for e in energy])
+        self.names: List[str] = list(series[0])
+        self.series: np.ndarray = np.stack(
+            [np.concatenate([np.asarray(s[name], dtype=np.float64) for s in series]) for name in self.names], axis=1
+        )
+        self.inefficiency: np.ndarray = np.ones(len(energy))
+        if correlated:
+            for k, e in enumerate(energy):
+                if len(e) > 1:
+                    tau, _, _ = integrated_time(acf(e), n=len(e), c=c)
+                    self.inefficiency[k] = 2 * tau
+        self.f: np.ndarray = np.zeros(len(energy))
+        self.iterations: int = 0
+
+    def __repr__(self) -> str:
+        return "WHAM(runs={runs}, rows={rows})".format(runs=len(self.T), rows=len(self.energy))
+
+    def _log_denominator(self, f: np.ndarray, log_n: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        # ln sum_l n_l exp(f_l - beta_l E_j) of every row
+        return logsumexp(log_n[:, None] + f[:, None] - self.beta[:, None] * self.energy[mask], axis=0)
+
+    def _solve(self, mask: np.ndarray, f: np.ndarray, method: str, tol: float, max_iter: int) -> Tuple[np.ndarray, int]:
+        counts = np.bincount(self.run[mask], minlength=len(self.T)) / self.inefficiency
+        log_n = np.log(counts)
+        energy = self.energy[mask]
+        log_r = -np.log(self.inefficiency[self.run[mask]])  # a row counts 1 / g of its run
+        f = f - f[0]
+        for iteration in range(1, max_iter + 1):
+            log_d = self._log_denominator(f, log_n, mask)
+            log_u = f[:, None] - self.beta[:, None] * energy - log_d  # (runs, rows)
+            if method == "newton":
+                # G_k = sum_j r_j u_jk - 1 = 0, J_kl = d G_k / d f_l
+                u = np.exp(log_u)
+                ru = u * np.exp(log_r)
+                total = np.sum(ru, axis=1)
+                jacobian = np.diag(total) - (ru @ u.T) * counts[None, :]
+                new = f.copy()
+                try:
+                    new[1:] -= np.linalg.solve(jacobian[1:, 1:], total[1:] - 1)
+                except np.linalg.LinAlgError:
+                    new[:] = np.nan
+            if method != "newton" or not np.all(np.isfinite(new)):
+                new = f - logsumexp(log_u + log_r, axis=1)
+            new -= new[0]
+            if np.max(np.abs(new - f)) < tol:
+                return new, iteration
+            f = new
+        return f, max_iter
+
+    def solve(self, method: str = "iterate", tol: float = 1e-10, max_iter: int = 10000) -> "WHAM":
+        """
+        Solve the WHAM equations for the free energies f_k
+
+        Parameters
+        ----------
+        method : str, optional
+            "iterate", the self-consistent log-sum-exp iteration, or "newton", by
+            default "iterate"
+        tol : float, optional
+            The largest change of f_k at convergence, by default 1e-10
+        max_iter : int, optional
+            The most iterations, by default 10000
+
+        Returns
+        -------
+        WHAM
+            self
+
+        Raises
+        ------
+        ValueError
+            Unknown method.
+        """
+        if method not in ("iterate", "newton"):
+            raise ValueError("method must be 'iterate' or 'newton'")
+        self._method, self._tol, self._max_iter = method, tol, max_iter
+        if not np.any(self.f):
+            self.f = self._guess()
+        self.f, self.iterations = self._solve(np.ones(len(self.energy), dtype=bool), self.f, method, tol, max_iter)
+        return self
+
+    def _guess(self) -> np.ndarray:
+        """
+        f_k from the single-histogram reweighting of each run to the next one
+        """
+        f = np.zeros(len(self.T))
+        for k in range(1, len(self.T)):
+            energy = self.energy[self.run == k - 1]
+            if len(energy) == 0:
+                f[k] = f[k - 1]
+                continue
+            log_w = -(self.beta[k] - self.beta[k - 1]) * energy
+            f[k] = f[k - 1] - (logsumexp(log_w) - np.log(len(energy)))
+        return f
+
+    def _log_bias(self, f: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        # the log weight of every row at beta = 0, ln (1 / g) - ln sum_l n_l exp(f_l - beta_l E_j)
+        counts = np.bincount(self.run[mask], minlength=len(self.T)) / self.inefficiency
+        return -np.log(self.inefficiency[self.run[mask]]) - self._log_denominator(f, np.log(counts), mask)
+
+    def density_of_states(self) -> pd.Series:
+        """
+        The logarithm of the density of states, ln g(E) up to a constant, min 0
+
+        Returns
+        -------
+        pd.Series
+            ln g indexed by the energy levels of the rows
+        """
+        mask = np.ones(len(self.energy), dtype=bool)
+        log_bias = self._log_bias(self.f, mask)
+        levels, level = np.unique(self.energy, return_inverse=True)
+        order = np.argsort(level, kind="stable")
+        starts = np.searchsorted(level[order], np.arange(len(levels)))
+        peak = np.max(log_bias)
+        log_g = np.log(np.add.reduceat(np.exp(log_bias[order] - peak), starts)) + peak
+        return pd.Series(log_g - np.min(log_g), index=pd.Index(levels, name="E"), name="log_g")
+
+    def _curves(self, T: np.ndarray, f: np.ndarray, mask: np.ndarray, chunk: int) -> np.ndarray:
+        log_bias = self._log_bias(f, mask)
+        energy, stacked = self.energy[mask], self.series[mask]
+        values = np.empty((len(T), len(self.names) + 1))
+        for rows, p, log_z in boltzmann_weights(energy, log_bias, 1 / T, chunk=chunk):
+            values[rows, :-1] = p @ stacked
+            values[rows, -1] = -log_z  # beta F = -ln Z
+        return values
+
+    def curves(
+        self, T: np.ndarray, observables: List[str] = None, blocks: int = 16, chunk: int = 2**22
+    ) -> pd.DataFrame:
+        """
+        The observables at every temperature, with block jackknife errors
+
+        Parameters
+        ----------
+        T : np.ndarray
+            The temperatures
+        observables : List[str], optional
+            The series, free_energy, beta F up to a constant, and specific_heat,
+            susceptibility or binder when their moments are series, by default every
+            series and the derived ones
+        blocks : int, optional
+            The jackknife blocks of each run, by default 16, no errors if 0
+        chunk : int, optional
+            The most weights held at once, see boltzmann_weights, by default 2**22
+
+        Returns
+        -------
+        pd.DataFrame
+            The observables and their errors, "<name>_err", indexed by T
+        """
+        T = np.atleast_1d(np.asarray(T, dtype=np.float64))
+        names = self.names + ["free_energy"]
+
+        def table(values: np.ndarray) -> Dict[str, np.ndarray]:
+            columns = dict(zip(names, values.T))
+            columns.update(derived({name: columns[name] for name in MOMENTS if name in columns}, self.N, T))
+            return columns
+
+        method = getattr(self, "_method", "iterate")
+        tol = getattr(self, "_tol", 1e-10)
+        max_iter = getattr(self, "_max_iter", 10000)
+        everything = np.ones(len(self.energy), dtype=bool)
+        result = table(self._curves(T, self.f, everything, chunk))
+        if observables is None:
+            observables = list(result)
+        frame = pd.DataFrame({name: result[name] for name in observables}, index=pd.Index(T, name="T"))
+        if blocks > 1:
+            block = np.minimum((self.position * blocks).astype(int), blocks - 1)
+            replicas: Dict[str, List[np.ndarray]] = {name: [] for name in observables}
+            for b in range(blocks):
+                mask = block != b
+                f, _ = self._solve(mask, self.f, method, tol, max_iter)
+                values = table(self._curves(T, f, mask, chunk))
+                for name in observables:
+                    replicas[name].append(values[name])
+            for name in observables:
+                leave = np.array(replicas[name])
+                deviation = leave - leave.mean(axis=0)
+                frame[name + "_err"] = np.sqrt((blocks - 1) / blocks * np.sum(deviation**2, axis=0))
+        return frame
+
+    def free_energy(self, T: Union[float, np.ndarray]) -> np.ndarray:
+        """
+        The dimensionless free energy beta F = -ln Z, up to a constant
+
+        Parameters
+        ----------
+        T : Union[float, np.ndarray]
+            The temperatures
+
+        Returns
+        -------
+        np.ndarray
+            beta F at every temperature
+        """
+        T = np.atleast_1d(np.asarray(T, dtype=np.float64))
+        return self._curves(T, self.f, np.ones(len(self.energy), dtype=bool), 2**22)[:, -1]
@@ -16,11 +16,11 @@ import matplotlib.animation as animation
 from matplotlib.animation import HTMLWriter
 from typing import Dict
 import pickle
-import uuid
-import statsmodels.tsa.stattools as stattools
 from jinja2 import Template
 import datetime
 import copy
+from .archive import read_archive, write_archive
+from .stats import acf, integrated_time
 
 __all__ = [
     "mean",
@@ -30,6 +30,14 @@ __all__ = [
     "diff",
     "cv",
     "u4",
+    "specific_heat",
+    "susceptibility",
+    "binder",
+    "binning",
+    "jackknife",
+    "observables",
+    "reweight",
+    "wham",
     "getcolumn",
     "curve",
     "scatter",
@@ -41,6 +49,7 @@ __all__ = [
     "read_msdt",
     "setup_uid",
     "autocorrelation",
+    "autocorrelation_time",
     "V_LJ",
     "V_hc",
     "V_sc",
@@ -81,29 +90,46 @@ def _rename(column):
     return column
 
 
+def _column(algo, uid: str, column: str, t0: int = 0) -> np.array:
+    """
+    The column of the run, read from the columnar store of the algorithm, not from data.
+    """
+    if hasattr(algo, "getcolumn"):
+        return algo.getcolumn(uid, column, t0)
+    return algo.trajectory.column(uid, column)[t0:]
+
+
+def _iters(algo, uid: str, t0: int = 0) -> np.array:
+    """
+    The iterations of the rows of the run, the index of data.
+    """
+    run = algo.trajectory.runs[uid]
+    return np.arange(run.iter - len(run) + 1, run.iter + 1)[t0:]
+
+
 def mean(algo, uid: str, column: str, t0: int = 0, n: int = 1) -> float:
     column = _rename(column)
-    return np.mean(algo.data.loc[uid][column][t0:] ** n)
+    return np.mean(_column(algo, uid, column, t0) ** n, axis=0)
 
 
 def std(algo, uid: str, column: str, t0: int = 0) -> float:
     column = _rename(column)
-    return np.std(algo.data.loc[uid][column][t0:])
+    return np.std(_column(algo, uid, column, t0), axis=0)
 
 
 def var(algo, uid: str, column: str, t0: int = 0) -> float:
     column = _rename(column)
-    return np.var(algo.data.loc[uid][column][t0:])
+    return np.var(_column(algo, uid, column, t0), axis=0)
 
 
 def norm(algo, uid: str, column: str, t0: int = 0, ord: int = 2) -> float:
     column = _rename(column)
-    return np.linalg.norm(algo.data.loc[uid][column][t0:], ord=ord)
+    return np.linalg.norm(_column(algo, uid, column, t0), ord=ord)
 
 
 def diff(algo, uid: str, column: str, t0: int = 0, n: int = 1) -> np.array:
     column = _rename(column)
-    return np.diff(algo.data.loc[uid][column][t0:], n)
+    return np.diff(_column(algo, uid, column, t0), n, axis=0)
 
 
 def cv(algo, uid: str, column: str, t0: int = 0) -> float:
@@ -115,27 +141,93 @@ def u4(algo, uid: str, t0: int = 0) -> float:
     return 1 - algo.mean(uid, "magnetization", t0=t0, n=4) / (3 * algo.mean(uid, "magnetization", t0=t0, n=2) ** 2)
 
 
+def specific_heat(algo, uid: str, T: float = None) -> float:
+    """
+    The specific heat per site from the streaming moments of the run, see stats.Moments.
+    """
+    return algo.moments[uid].specific_heat(algo.model.N, T)
+
+
+def susceptibility(algo, uid: str, T: float = None) -> float:
+    """
+    The susceptibility per site from the streaming moments of the run, see stats.Moments.
+    """
+    return algo.moments[uid].susceptibility(algo.model.N, T)
+
+
+def binder(algo, uid: str) -> float:
+    """
+    The Binder cumulant from the streaming moments of the run, see stats.Moments.
+    """
+    return algo.moments[uid].binder()
+
+
+def binning(algo, uid: str, columns: list = None, t0: int = 0, min_bins: int = 32, streaming: bool = False):
+    """
+    The standard error of the mean at every logarithmic bin level, see stats.binning.
+    """
+    return algo.binning(uid, columns=columns, t0=t0, min_bins=min_bins, streaming=streaming)
+
+
+def jackknife(algo, uid, func, moments: list, t0: int = 0, blocks: int = 32, streaming: bool = False):
+    """
+    The jackknife estimate and error of a function of the means of moments, see stats.jackknife.
+    """
+    return algo.jackknife(uid, func, moments, t0=t0, blocks=blocks, streaming=streaming)
+
+
+def observables(algo, uid, t0: int = 0, blocks: int = 32, streaming: bool = False):
+    """
+    The specific heat, the susceptibility and the Binder cumulant with jackknife errors.
+    """
+    return algo.observables(uid, t0=t0, blocks=blocks, streaming=streaming)
+
+
+def reweight(algo, uid: str, T_new, observables: list = None, t0: int = 0, min_overlap: float = 0.5):
+    """
+    Reweight the rows of a run to other temperatures, see stats.reweight.
+    """
+    return algo.reweight(uid, T_new, observables=observables, t0=t0, min_overlap=min_overlap)
+
+
+def wham(algo, uid_dict, columns: list = None, t0: int = 0, correlated: bool = True, method: str = "iterate"):
+    """
+    The multiple-histogram reweighting of the runs of a temperature sweep, see WHAM.
+    """
+    return algo.wham(uid_dict, columns=columns, t0=t0, correlated=correlated, method=method)
+
+
 def getcolumn(algo, uid: str, column: str, t0: int = 0) -> np.array:
+    """
+    The column of the run, "spin" reads the snapshots, see the getcolumn of the algorithm.
+    """
     column = _rename(column)
-    return algo.data.loc[uid][column][t0:]
+    return _column(algo, uid, column, t0)
 
 
-def autocorrelation(algo, uid: str, column: str):
+def autocorrelation(algo, uid: str, column: str, t0: int = 0, c: float = 6.0):
+    """
+    The integrated autocorrelation time and the autocorrelation, by FFT, see stats.
+    """
     column = _rename(column)
-    autocorrelation_list = stattools.acf(algo.getcolumn(uid, column), nlags=len((algo.getcolumn(uid, column))))
-    tau = np.sum(autocorrelation_list) / autocorrelation_list[0]
-    return (tau, autocorrelation_list)
+    autocorrelation_list = acf(algo.getcolumn(uid, column, t0))
+    tau, _, _ = integrated_time(autocorrelation_list, c=c)
+    return (float(tau), autocorrelation_list)
+
+
+def autocorrelation_time(algo, uid: str, columns: list = None, t0: int = 0, c: float = 6.0):
+    """
+    tau, tau_err, window and ess of every scalar column, see stats.autocorrelation_table.
+    """
+    return algo.autocorrelation_time(uid, columns=columns, t0=t0, c=c)
 
 
 def curve(algo, uid, column, t0: int = 0) -> None:
     """
     Draw a curve.
     """
-    data = algo.data
     column = _rename(column)
-    array = data.loc[uid][column][t0:]
-    index = data.loc[uid].index
-    plt.plot(index, array)
+    plt.plot(_iters(algo, uid, t0), _column(algo, uid, column, t0))
 
 
 def scatter(
@@ -158,13 +250,10 @@ def scatter(
     data=None,
     **kwargs
 ) -> None:
-    data = algo.data
     column = _rename(column)
-    array = data.loc[uid][column][t0:]
-    index = data.loc[uid].index
     plt.scatter(
-        index,
-        array,
+        _iters(algo, uid, t0),
+        _column(algo, uid, column, t0),
         s=s,
         c=c,
         marker=marker,
@@ -193,7 +282,7 @@ def param_plot(algo, uid_dict: Dict[str, np.array], column: str, per: bool = Tru
         for i in range(len(list(uid_dict.values())[0])):
             uid = list(uid_dict.values())[0][i]
             param = list(uid_dict.values())[1][i]
-            if uid not in algo.data.index.get_level_values("uid").values:
+            if uid not in algo.runs:
                 raise ValueError("Invalid uid.")
             x.append(param)
             y.append(algo.mean(uid, column))
@@ -217,7 +306,7 @@ def param_scatter(algo, uid_dict: Dict[str, np.array], column: str, per: bool =
         for i in range(len(list(uid_dict.values())[0])):
             uid = list(uid_dict.values())[0][i]
             param = list(uid_dict.values())[1][i]
-            if uid not in algo.data.index.get_level_values("uid").values:
+            if uid not in algo.runs:
                 raise ValueError("Invalid uid.")
             x.append(param)
             y.append(algo.mean(uid, column))
@@ -262,7 +351,7 @@ def imshow(
     iter : int
         The iteration of the algorithm.
     """
-    spin = algo.data.loc[(uid, iter), "spin"]
+    spin = algo.snapshots.get(uid, iter)
     plt.imshow(
         spin,
         cmap=cmap,
@@ -291,7 +380,7 @@ def animate(algo, uid: str, save: bool = False, savePath: str = None) -> None:
     Animate the spin.
     """
     fig, ax = plt.subplots(figsize=(5, 5))
-    spin_lst = algo.data.loc[uid, "spin"].tolist()
+    spin_lst = algo.snapshots.spins(uid)
 
     def init():
         ax.imshow(spin_lst[0], cmap="gray")
@@ -321,44 +410,48 @@ def animate(algo, uid: str, save: bool = False, savePath: str = None) -> None:
         os.chdir("..")
 
 
-def to_msdt(algo, path: str = ".msdt"):
+def to_msdt(algo, path: str = ".msdt", version: int = 2):
     """
     Convert the data to msdt.
+
+    Version 2 is a directory of a JSON manifest and .npy columns, see
+    archive.write_archive. Version 1 is the older single pickle.
     """
     # 检查 path 最后是否有'.msdt'后缀
     if path[-5:] != ".msdt":
         path += ".msdt"
+    if version >= 2:
+        return write_archive(algo, path)
     # 检查是否存在文件
     if os.path.exists(path):
         # 存在覆盖
         os.remove(path)
     model = algo._rowmodel
     data = algo.data
+    snapshots = algo.snapshots
     param_list = algo.param_list
     name = algo.name
-    savedata = {"model": model, "data": data, "param_list": param_list, "name": name}
+    savedata = {"model": model, "data": data, "snapshots": snapshots, "param_list": param_list, "name": name}
     open(path, "wb").write(pickle.dumps(savedata))
+    return path
 
 
-def read_msdt(path: str = None):
+def read_msdt(path: str = None, uids: list = None, mmap_mode: str = "r"):
     """
     Read the data from msdt.
+
+    A version 2 archive opens only the runs of ``uids``, their columns are
+    memory-mapped, see archive.read_archive. A version 1 file is unpickled.
     """
     if not os.path.exists(path):
         raise FileNotFoundError("File not found.")
+    if os.path.isdir(path):
+        return read_archive(path, uids=uids, mmap_mode=mmap_mode)
     return pickle.loads(open(path, "rb").read())
 
 
 def setup_uid(algo, uid):
-    if uid is None:
-        uid = (uuid.uuid1()).hex
-    else:
-        if algo.data.index.get_level_values("uid").values:
-            if uid not in algo.data.index.get_level_values("uid").values:
-                algo._reset_model()
-            else:
-                algo.model.set_spin(algo.data.loc[uid].loc[algo.data.loc[uid].index.max()].spin)
-    return uid
+    return algo._setup_uid(uid)
 
 
 def V_LJ(r0, epsilon, **kwargs):
@@ -8,9 +8,10 @@
 '''
 
 # here put the import lib
-from typing import Tuple
+from typing import Tuple, Union
 import numpy as np
 import copy
+from ..snapshot import Snapshots
 from .Ising import Ising
 
 __all__ = ["Heisenberg"]
@@ -38,19 +39,32 @@ class Heisenberg(Ising):
         self.spin = self.spin.astype(np.float32)
         self.type = type
 
-    def _change_site_spin(self, index: Tuple[int, ...]):
-        """Change the spin of the site / cn: 改变格点的自旋
+    def _init_snapshots(self) -> Snapshots:
+        """Initialize the snapshot store, the spin vectors are stored as float32 / cn: 初始化快照存储, 自旋以 float32 存储
+
+        Returns:
+            Snapshots: The snapshot store / cn: 快照存储
+        """
+        return Snapshots(codec="float32")
+
+    def _new_site_spin(self, site: int) -> np.ndarray:
+        """Draw the proposed spin of the site / cn: 生成格点的新自旋
 
         Args:
-            index (Tuple[int, ...]): The index of the site / cn: 格点的坐标
+            site (int): The flat index of the site / cn: 格点的序号
+
+        Returns:
+            np.ndarray: A random spin / cn: 随机的自旋
         """
-        self.spin[index] = 2 * np.random.rand(self.dim) - 1
+        uniform = np.random.rand(self.dim) if self.random is None else self.random.random(self.dim)
+        return (2 * uniform - 1).astype(self.spin.dtype)
 
-    def _get_site_energy(self, index: Tuple[int, ...]) -> float:
+    def _get_site_energy(self, index: Union[int, Tuple[int, ...]], value: np.ndarray = None) -> float:
         """Get the energy of the site / cn: 获取格点的能量
 
         Args:
             index (Tuple[int, ...]): The index of the site / cn: 格点的坐标
+            value (np.ndarray, optional): The spin of the site / cn: 格点的自旋 (Defaults its current spin)
 
         Raises:
             ValueError: Invalid type of spin / cn: 无效的自旋类型
@@ -58,13 +72,25 @@ class Heisenberg(Ising):
         Returns:
             float: The energy of the site / cn: 格点的能量
         """
-        neighbors_spin = super()._get_neighbor_spin(index)
-        energy = 0
-        for neighbor_spin in neighbors_spin:
-            energy -= self.Jij * np.dot(self.spin[index], neighbor_spin)
-            energy -= self.H * np.dot(self.spin[index], self.spin[index])
+        site = self._site(index)
+        spin = self._flat_spin()
+        neighbors = self.neighbors[site]
+        if value is None:
+            value = spin[site]
+        energy = -self.J * np.dot(value, np.sum(spin[neighbors], axis=0))
+        energy -= len(neighbors) * self.H * np.dot(value, value)
         return energy
 
+    def _get_total_energy(self) -> float:
+        """Get the total energy of the system / cn: 获取系统的总能量
+
+        Returns:
+            float: The total energy of the system / cn: 系统的总能量
+        """
+        field = self.z * self.H * np.sum(self.spin.astype(np.float64) ** 2)
+        self.energy = -self.J * self._get_bond_sum() - field
+        return self.energy
+
     def _max_energy(self):
         raw_spin = copy.deepcopy(self.spin)
         max_spin = np.zeros_like(self.spin)
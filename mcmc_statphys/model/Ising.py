@@ -6,14 +6,41 @@
 @作者    :結凪
 """
 
+import copy
 from typing import Any, Tuple, Union
 import numpy as np
-import copy
-import pandas as pd
+from ..snapshot import Snapshots
+from ..trajectory import Trajectory
+from .lattice import neighbor_table, sublattices
 
 __all__ = ["Ising"]
 
 
+def _exact(value: Any) -> Any:
+    """
+    An integral J or H as int64, so that the energy of integer spins is accumulated exactly
+
+    Parameters
+    ----------
+    value : Any
+        A scalar or an array, e.g. a random field
+
+    Returns
+    -------
+    Any
+        np.int64 or an int64 array if every entry is integral, else the value
+    """
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == "f" and np.all(np.mod(value, 1) == 0):
+            exact = value.astype(np.int64)
+            exact.flags.writeable = value.flags.writeable
+            return exact
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)) and float(value).is_integer():
+        return np.int64(value)
+    return value
+
+
 class Ising(object):
     """
     Ising
@@ -69,7 +96,7 @@ class Ising(object):
     Scholarpedia <http://www.scholarpedia.org/article/Ising_model>`__
     """
 
-    def __init__(self, L: int, J: float = 1, H: float = 0, dim: int = 2):
+    def __init__(self, L: int, J: float = 1, H: float = 0, dim: int = 2, local_field: bool = False):
         """
         initialize the Ising model
 
@@ -83,39 +110,90 @@ class Ising(object):
             The external magnetic field, by default 0
         dim : int, optional
             The dimension of the lattice, by default 2
+        local_field : bool, optional
+            Keep the sum of the neighbor spins of every site, by default False
         """
         L = int(L)
         self.L: int = L  # The length of the lattice
         self.dim: int = dim  # The dimension of the lattice
         self.N: int = L**dim  # The number of the lattice
-        self.J: float = J  # The interaction between the neighbor
-        self.H: float = H  # The external magnetic field
+        self.J: float = _exact(J)  # The interaction between the neighbor
+        self.H: float = _exact(H)  # The external magnetic field
         self.energy: float = 0  # The total energy of the system
         self.magnetization: float = 0  # The total magnetization of the system
+        self.neighbors: np.ndarray = neighbor_table(L, dim)  # The neighbor table of the lattice
+        self.z: int = self.neighbors.shape[1]  # The number of neighbors of a site
+        self.local_field: np.ndarray = None  # The sum of the neighbor spins of every site
+        self.random = None  # The random stream of the sampler, set by the algorithm, else np.random
 
         self._init_spin(type="ising")
+        if local_field:
+            self._init_local_field()
         self._get_total_energy()
         self._get_total_magnetization()
 
+    def __deepcopy__(self, memo: dict) -> "Ising":
+        """
+        Deep copy, the read-only arrays, e.g. the neighbor table or a quenched random
+        field, are shared with the copy
+        """
+        for value in self.__dict__.values():
+            if isinstance(value, np.ndarray) and not value.flags.writeable:
+                memo[id(value)] = value
+        other = type(self).__new__(type(self))
+        memo[id(self)] = other
+        for name, value in self.__dict__.items():
+            setattr(other, name, copy.deepcopy(value, memo))
+        return other
+
     def _init_spin(self, type="ising"):
         """
-        Initialize the spin of the system
+        Initialize the spin of the system, stored as int8
 
         Parameters
         ----------
         type : str, optional
             The type of the spin, by default "ising"
         """
-        self.spin = np.random.choice([-1, 1], size=(self.L,) * self.dim)
+        self.spin = np.random.choice(np.array([-1, 1], dtype=np.int8), size=(self.L,) * self.dim)
         self.type = type
 
-    def _get_neighbor(self, index: Tuple[int, ...]) -> Tuple[int, ...]:
+    def _site(self, index: Union[int, Tuple[int, ...]]) -> int:
+        """
+        Get the flat index of the site
+
+        Parameters
+        ----------
+        index : Union[int, Tuple[int, ...]]
+            The flat index or the index tuple of the site
+
+        Returns
+        -------
+        int
+            The flat index of the site
+        """
+        if isinstance(index, (int, np.integer)):
+            return int(index)
+        return int(np.ravel_multi_index(tuple(index), (self.L,) * self.dim))
+
+    def _flat_spin(self) -> np.ndarray:
+        """
+        Get the spin of the system as a (N, ...) view
+
+        Returns
+        -------
+        np.ndarray
+            The spin of the system, indexed by the flat index of the site
+        """
+        return self.spin.reshape((self.N,) + self.spin.shape[self.dim :])
+
+    def _get_neighbor(self, index: Union[int, Tuple[int, ...]]) -> Tuple[int, ...]:
         """
         Get the neighbor of the site
 
         Parameters
         ----------
-        index : Tuple[int, ...]
+        index : Union[int, Tuple[int, ...]]
             The index of the site
 
         Returns
@@ -123,49 +201,102 @@ class Ising(object):
         Tuple[int, ...]
             The neighbor of the site
         """
-        neighbors = []
-        for i in range(self.dim):
-            for j in [-1, 1]:
-                neighbors.append(index[:i] + ((index[i] + j) % self.L,) + index[i + 1 :])
-        neighbors = list(set(neighbors))  # remove the same neighbor
-        return neighbors
+        neighbors = self.neighbors[self._site(index)]
+        return list(zip(*np.unravel_index(neighbors, (self.L,) * self.dim)))
+
+    def _init_local_field(self) -> np.ndarray:
+        """
+        Initialize the local field, the sum of the neighbor spins of every site
+
+        The local field is kept up to date by _accept and _accept_block, so the
+        delta energy of a flip is 2 * s * (J * h + H) without reading the neighbors.
 
-    def _get_neighbor_spin(self, index: Tuple[int, ...]) -> Tuple[int, ...]:
+        Returns
+        -------
+        np.ndarray
+            The local field of every site
+        """
+        self.local_field = np.sum(self._flat_spin()[self.neighbors], axis=1)
+        return self.local_field
+
+    def _get_neighbor_sum(self, sites: Union[int, np.ndarray]) -> Union[int, np.ndarray]:
+        """
+        Get the sum of the neighbor spins of the sites
+
+        Parameters
+        ----------
+        sites : Union[int, np.ndarray]
+            The flat index of the sites
+
+        Returns
+        -------
+        Union[int, np.ndarray]
+            The sum of the neighbor spins of each site
+        """
+        if self.local_field is not None:
+            return self.local_field[sites]
+        return np.sum(self._flat_spin()[self.neighbors[sites]], axis=-1)
+
+    def _get_neighbor_spin(self, index: Union[int, Tuple[int, ...]]) -> np.ndarray:
         """
         Get the spin of the neighbor of the site
 
         Returns
         -------
-        Tuple[int, ...]
+        np.ndarray
             The spin of the neighbor of the site
         """
-        neighbors = self._get_neighbor(index)
-        neighbors_spin = []
-        for neighbor in neighbors:
-            neighbors_spin.append(self.spin[neighbor])
-        return neighbors_spin
+        return self._flat_spin()[self.neighbors[self._site(index)]]
 
-    def _get_site_energy(self, index: Tuple[int, ...]) -> float:
+    def _get_site_energy(self, index: Union[int, Tuple[int, ...]], value: Any = None) -> float:
         """
         Get the energy of the site
 
         Parameters
         ----------
-        index : Tuple[int, ...]
+        index : Union[int, Tuple[int, ...]]
             The index of the site
+        value : Any, optional
+            The spin of the site, by default its current spin
 
         Returns
         -------
         float
             The energy of the site
         """
-        neighbors_spin = self._get_neighbor_spin(index)
-        energy = 0
-        for neighbor_spin in neighbors_spin:
-            energy -= self.J * np.dot(self.spin[index], neighbor_spin)
-        energy -= self.H * self.spin[index]
+        site = self._site(index)
+        spin = self._flat_spin()
+        if value is None:
+            value = spin[site]
+        # the int64 sum first, an int8 spin times a large J or H would overflow
+        energy = -self.J * (np.sum(spin[self.neighbors[site]]) * value)
+        energy -= self.H * np.int64(value)
         return energy
 
+    def _get_bond_sum(self, bond=np.multiply) -> float:
+        """
+        Sum a bond function over every neighbor pair of the lattice once
+
+        Parameters
+        ----------
+        bond : callable, optional
+            The elementwise function of the two spins of a bond, by default np.multiply
+
+        Returns
+        -------
+        float
+            The sum of the bond function over the lattice
+        """
+        spin = self.spin
+        if np.issubdtype(spin.dtype, np.floating):
+            spin = spin.astype(np.float64)
+        if self.L > 2:
+            return sum(np.sum(bond(spin, np.roll(spin, 1, axis=axis))) for axis in range(self.dim))
+        # the neighbors coincide when L <= 2, count every pair of the table once
+        spin = spin.reshape((self.N,) + spin.shape[self.dim :])
+        total = np.sum(bond(spin[:, None], spin[self.neighbors]))
+        return total // 2 if np.issubdtype(np.asarray(total).dtype, np.integer) else total / 2
+
     def _get_total_energy(self) -> float:
         """
         Get the total energy of the system
@@ -175,10 +306,10 @@ class Ising(object):
         float
             The total energy of the system
         """
-        energy = 0
-        for index in np.ndindex(self.spin.shape):
-            energy += self._get_site_energy(index)
-        self.energy = energy / 2
+        if self.local_field is not None:
+            # the spin may have been replaced, rebuild the local field with the energy
+            self._init_local_field()
+        self.energy = -self.J * self._get_bond_sum() - np.sum(self.H * self.spin)
         return self.energy
 
     def _get_per_energy(self) -> float:
@@ -202,7 +333,8 @@ class Ising(object):
         float
             The magnetization of the system
         """
-        self.magnetization = np.sum(self.spin, axis=tuple(range(self.dim)))
+        dtype = np.int64 if self.spin.dtype.kind in "iu" else None  # a sum of uint8 states must not wrap
+        self.magnetization = np.sum(self.spin, axis=tuple(range(self.dim)), dtype=dtype)
         return self.magnetization
 
     def _get_per_magnetization(self) -> float:
@@ -216,24 +348,103 @@ class Ising(object):
         """
         return self._get_total_magnetization() / self.N
 
-    def _change_site_spin(self, index: Tuple[int, ...]) -> None:
+    def _new_site_spin(self, site: int) -> Any:
+        """
+        Draw the proposed spin of the site
+
+        Parameters
+        ----------
+        site : int
+            The flat index of the site
+
+        Returns
+        -------
+        Any
+            The proposed spin, the flipped spin for Ising
+        """
+        return -self._flat_spin()[site]
+
+    def _change_site_spin(self, index: Union[int, Tuple[int, ...]]) -> None:
         """
         Change the spin of the site.
 
         Parameters
         ----------
-        index : Tuple[int, ...]
+        index : Union[int, Tuple[int, ...]]
             The index of the site
         """
-        self.spin[index] *= -1
+        site = self._site(index)
+        self._flat_spin()[site] = self._new_site_spin(site)
 
-    def _change_delta_energy(self, index: Tuple[int, ...]) -> float:
+    def _random_site(self) -> int:
+        """
+        Get a random site
+
+        Returns
+        -------
+        int
+            The flat index of the site
+        """
+        if self.random is not None:
+            return self.random.integers(self.N)
+        return np.random.randint(0, self.N)
+
+    def _propose(self, index: Union[int, Tuple[int, ...]]) -> Tuple[Any, float]:
+        """
+        Propose a new spin for the site, without changing the system
+
+        Parameters
+        ----------
+        index : Union[int, Tuple[int, ...]]
+            The index of the site
+
+        Returns
+        -------
+        Tuple[Any, float]
+            The proposed spin and the delta energy
+        """
+        site = self._site(index)
+        if self.local_field is not None:
+            spin = self._flat_spin()[site]
+            H = self.H if np.ndim(self.H) == 0 else self.H.reshape(-1)[site]
+            return -spin, 2 * spin * (self.J * self.local_field[site] + H)
+        new_site = self._new_site_spin(site)
+        detle_energy = self._get_site_energy(site, new_site) - self._get_site_energy(site)
+        return new_site, detle_energy
+
+    def _accept(self, index: Union[int, Tuple[int, ...]], new_site: Any, delta_energy: float) -> None:
+        """
+        Accept the proposed spin of the site
+
+        Parameters
+        ----------
+        index : Union[int, Tuple[int, ...]]
+            The index of the site
+        new_site : Any
+            The proposed spin, see _propose
+        delta_energy : float
+            The delta energy, see _propose
+        """
+        site = self._site(index)
+        spin = self._flat_spin()
+        if spin.dtype.kind in "iu":
+            # int8 / uint8 spins, the change is taken as a python int so it does not wrap
+            change = int(new_site) - int(spin[site])
+        else:
+            change = new_site - spin[site]
+        self.energy += delta_energy
+        self.magnetization = self.magnetization + change
+        if self.local_field is not None:
+            self.local_field[self.neighbors[site]] += change
+        spin[site] = new_site
+
+    def _change_delta_energy(self, index: Union[int, Tuple[int, ...]]) -> float:
         """
         Change the spin of the site and get the delta energy
 
         Parameters
         ----------
-        index : Tuple[int, ...]
+        index : Union[int, Tuple[int, ...]]
             The index of the site
 
         Returns
@@ -241,14 +452,8 @@ class Ising(object):
         float
             The delta energy of the site
         """
-        old_site = self.spin[index]
-        old_site_energy = self._get_site_energy(index)
-        self._change_site_spin(index)
-        new_site = self.spin[index]
-        new_site_energy = self._get_site_energy(index)
-        detle_energy = new_site_energy - old_site_energy
-        self.energy += detle_energy
-        self.magnetization += new_site - old_site
+        new_site, detle_energy = self._propose(index)
+        self._accept(index, new_site, detle_energy)
         return detle_energy
 
     def _random_walk(self) -> float:
@@ -260,47 +465,152 @@ class Ising(object):
         float
             The delta energy of the system
         """
-        site = tuple(np.random.randint(0, self.L, size=self.dim))
-        detle_energy = self._change_delta_energy(site)
-        return detle_energy
+        return self._change_delta_energy(self._random_site())
+
+    def _sublattices(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the two sublattices of the checkerboard decomposition
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The flat indices of the even and the odd sites
+        """
+        return sublattices(self.L, self.dim)
+
+    def _delta_levels(self) -> Union[np.ndarray, None]:
+        """
+        Get every possible delta energy of a single spin flip
+
+        The level of a flip is (s > 0) * (z + 1) + (h + z) / 2, where s is the
+        spin of the site and h the sum of its z neighbor spins.
+
+        Returns
+        -------
+        Union[np.ndarray, None]
+            The delta energy of each level, None if they are not discrete
+        """
+        if self.type not in ["ising", "rfising", "replicaising"] or np.ndim(self.H) != 0:
+            return None
+        z = self.z
+        spin = np.repeat([-1, 1], z + 1)
+        field = np.tile(np.arange(-z, z + 1, 2), 2)
+        return 2 * spin * (self.J * field + self.H)
+
+    def _get_level(self, sites: Union[int, np.ndarray], new_site: Any = None) -> Union[int, np.ndarray, None]:
+        """
+        Get the level of flipping the spin of the sites
+
+        Parameters
+        ----------
+        sites : Union[int, np.ndarray]
+            The flat index of the sites
+        new_site : Any, optional
+            The proposed spin, a flip is known from the site alone
+
+        Returns
+        -------
+        Union[int, np.ndarray, None]
+            The level of each site, see _delta_levels
+        """
+        if self.type not in ["ising", "rfising", "replicaising"] or np.ndim(self.H) != 0:
+            return None
+        spin = self._flat_spin()
+        z = self.z
+        field = self._get_neighbor_sum(sites)
+        return (spin[sites] > 0) * (z + 1) + (field + z) // 2
+
+    def _propose_block(self, sites: np.ndarray) -> Tuple[np.ndarray, np.ndarray, Union[np.ndarray, None]]:
+        """
+        Propose to flip the spins of independent sites, without changing the system
+
+        Parameters
+        ----------
+        sites : np.ndarray
+            The flat indices of the sites, no two of them are neighbors
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, Union[np.ndarray, None]]
+            The proposed spins, the delta energy and the level of each site
+        """
+        spin = self._flat_spin()
+        field = self._get_neighbor_sum(sites)
+        H = self.H if np.ndim(self.H) == 0 else self.H.reshape(-1)[sites]
+        delta_energy = 2 * spin[sites] * (self.J * field + H)
+        level = None
+        if self.type in ["ising", "rfising", "replicaising"] and np.ndim(self.H) == 0:
+            z = self.z
+            level = (spin[sites] > 0) * (z + 1) + (field + z) // 2
+        return -spin[sites], delta_energy, level
+
+    def _accept_block(
+        self, sites: np.ndarray, new_spin: np.ndarray, delta_energy: np.ndarray, accept: np.ndarray
+    ) -> None:
+        """
+        Accept the proposed spins of independent sites
+
+        Parameters
+        ----------
+        sites : np.ndarray
+            The flat indices of the proposed sites
+        new_spin : np.ndarray
+            The proposed spins of the sites
+        delta_energy : np.ndarray
+            The delta energy of each site
+        accept : np.ndarray
+            Whether each proposal is accepted
+        """
+        spin = self._flat_spin()
+        sites, new_spin = sites[accept], new_spin[accept]
+        dtype = np.int64 if spin.dtype.kind in "iu" else None
+        change = np.subtract(new_spin, spin[sites], dtype=dtype)
+        self.magnetization += np.sum(change, axis=0)
+        self.energy += np.sum(delta_energy[accept])
+        if self.local_field is not None:
+            # the sites are independent, but their neighbors are shared
+            change = np.repeat(change, self.z)
+            self.local_field += np.bincount(
+                self.neighbors[sites].reshape(-1), weights=change, minlength=self.N
+            ).astype(self.local_field.dtype)
+        spin[sites] = new_spin
 
     def set_spin(self, spin: np.ndarray):
         """
-        Set the spin of the system
+        Set the spin of the system, it is stored with the dtype of the model, e.g. int8
 
         Parameters
         ----------
         spin : np.ndarray
             The spin of the system
         """
-        self.spin = spin
+        self.spin = np.asarray(spin, dtype=self.spin.dtype)
         self._get_total_energy()
         self._get_total_magnetization()
 
-    def _init_data(self) -> pd.DataFrame:
+    def _init_data(self) -> Trajectory:
         """
         Initialize the data
 
         Returns
         -------
-        pd.DataFrame
+        Trajectory
             The data
         """
-        data: pd.DataFrame = pd.DataFrame(
-            columns=[
-                "uid",
-                "iter",
-                "T",
-                "H",
-                "energy",
-                "magnetization",
-                "spin",
-            ]
-        )
-        data.set_index(["uid", "iter"], inplace=True)
-        return data
+        return Trajectory(columns=["T", "H", "energy", "magnetization"])
+
+    def _init_snapshots(self) -> Snapshots:
+        """
+        Initialize the snapshot store, the +1 / -1 spins are packed into bits
+
+        Returns
+        -------
+        Snapshots
+            The snapshot store
+        """
+        return Snapshots(codec="bits")
 
-    def _save_date(self, T: float, uid: str, data: pd.DataFrame) -> pd.DataFrame:
+    def _save_date(self, T: float, uid: str, data: Trajectory) -> Trajectory:
         """
         Save the data
 
@@ -310,31 +620,14 @@ class Ising(object):
             The temperature
         uid : str
             The uid of the data
-        data : pd.DataFrame
+        data : Trajectory
             The data
 
         Returns
         -------
-        pd.DataFrame
+        Trajectory
             The data
         """
-        if uid not in data.index.get_level_values("uid").values:
-            data.loc[(uid, 1), :] = [
-                T,
-                self.H,
-                self.energy,
-                self.magnetization,
-                0,
-            ]
-            data.at[(uid, 1), "spin"] = copy.deepcopy(self.spin)
-        else:
-            iterplus = data.loc[uid].index.max() + 1
-            data.loc[(uid, iterplus), :] = [
-                T,
-                self.H,
-                self.energy,
-                self.magnetization,
-                0,
-            ]
-            data.at[(uid, iterplus), "spin"] = copy.deepcopy(self.spin)
+        H = data.static.ref(uid, "H", self.H)  # a field array is stored once, the row keeps its key
+        data.append(uid, T=T, H=H, energy=self.energy, magnetization=self.magnetization)
         return data
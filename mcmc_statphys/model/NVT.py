@@ -1,8 +1,8 @@
 import numpy as np
-import copy
 from typing import Tuple
 from scipy.spatial.distance import pdist, squareform
-import pandas as pd
+from ..snapshot import Snapshots
+from ..trajectory import Trajectory
 
 __all__ = ["NVT"]
 
@@ -91,14 +91,42 @@ class NVT:
         self.spin[index] += np.random.uniform(-self.delta, self.delta, size=(1, len(self.spin[index])))
         self.distance = squareform(pdist(self.spin))
 
+    def _random_site(self) -> int:
+        """Get a random particle"""
+        return np.random.randint(0, self.N)
+
+    def _propose(self, index: int):
+        """Propose a move of the particle, without changing the system
+
+        Only the distances from the moved particle change, so the cost is O(N).
+        """
+        new_site = self.spin[index] + np.random.uniform(-self.delta, self.delta, size=self.spin.shape[1])
+        new_distance = np.linalg.norm(self.spin - new_site, axis=1)
+        others = np.arange(self.N) != index
+        detle_energy = np.sum(self.potential(new_distance[others])) - np.sum(
+            self.potential(self.distance[index][others])
+        )
+        return (new_site, new_distance), detle_energy
+
+    def _accept(self, index: int, new_site, delta_energy: float):
+        """Accept the proposed move of the particle, see _propose"""
+        position, new_distance = new_site
+        new_distance[index] = 0
+        self.spin[index] = position
+        self.distance[index, :] = new_distance
+        self.distance[:, index] = new_distance
+        self.energy += delta_energy
+
     def _change_delta_energy(self, index: Tuple[int, ...]):
         """Get the delta energy of the site"""
-        old_energy = copy.deepcopy(self.energy)
-        self._change_site_spin(index)
-        new_energy = self._get_total_energy()
-        detle_energy = new_energy - old_energy
+        new_site, detle_energy = self._propose(index)
+        self._accept(index, new_site, detle_energy)
         return detle_energy
 
+    def _random_walk(self) -> float:
+        """Move a random particle and get the delta energy"""
+        return self._change_delta_energy(self._random_site())
+
     def set_spin(self, spin):
         self.spin = spin
         self._get_total_energy()
@@ -106,33 +134,12 @@ class NVT:
     def get_energy(self) -> float:
         return self.energy
 
-    def _init_data(self):
-        data: pd.DataFrame = pd.DataFrame(
-            columns=[
-                "uid",
-                "iter",
-                "T",
-                "energy",
-                "spin",
-            ]
-        )
-        data.set_index(["uid", "iter"], inplace=True)
-        return data
+    def _init_data(self) -> Trajectory:
+        return Trajectory(columns=["T", "energy"])
 
-    def _save_date(self, T, uid, data):
-        if uid not in data.index.get_level_values("uid").values:
-            data.loc[(uid, 1), :] = [
-                T,
-                self.model.energy,
-                0,
-            ]
-            data.at[(uid, 1), "spin"] = copy.deepcopy(self.model.spin)
-        else:
-            iterplus = data.loc[uid].index.max() + 1
-            data.loc[(uid, iterplus), :] = [
-                T,
-                self.model.energy,
-                0,
-            ]
-            data.at[(uid, iterplus), "spin"] = copy.deepcopy(self.model.spin)
+    def _init_snapshots(self) -> Snapshots:
+        return Snapshots(codec="raw")
+
+    def _save_date(self, T, uid, data: Trajectory) -> Trajectory:
+        data.append(uid, T=T, energy=self.energy)
         return data
@@ -0,0 +1,497 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+"""
+@文件    :PackedIsing.py
+@时间    :2026/10/17 14:03:52
+@作者    :結凪
+"""
+
+from typing import Any, List, Tuple, Union
+import numpy as np
+from .Ising import Ising
+
+__all__ = ["PackedIsing"]
+
+_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+_EVEN = np.uint64(0x5555555555555555)  # the bits 0, 2, 4, ...
+_ODD = np.uint64(0xAAAAAAAAAAAAAAAA)  # the bits 1, 3, 5, ...
+
+
+def _popcount(words: np.ndarray) -> int:
+    """
+    Count the set bits of an uint64 array
+
+    Parameters
+    ----------
+    words : np.ndarray
+        The uint64 words
+
+    Returns
+    -------
+    int
+        The number of set bits
+    """
+    w = words - ((words >> np.uint64(1)) & _EVEN)
+    w = (w & np.uint64(0x3333333333333333)) + ((w >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    w = (w + (w >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    w = (w * np.uint64(0x0101010101010101)) >> np.uint64(56)
+    return int(np.sum(w, dtype=np.int64))
+
+
+def _random_words(shape: Tuple[int, ...], random: Any = None) -> np.ndarray:
+    """
+    Draw uint64 words of independent random bits
+
+    Parameters
+    ----------
+    shape : Tuple[int, ...]
+        The shape of the words
+    random : RandomStream, optional
+        The random stream of the sampler, by default np.random
+
+    Returns
+    -------
+    np.ndarray
+        The random words
+    """
+    if random is not None:
+        return random.generator.integers(0, 2**64, size=shape, dtype=np.uint64)
+    size = int(np.prod(shape))
+    return np.frombuffer(np.random.bytes(8 * size), dtype=np.uint64).reshape(shape)
+
+
+def _bernoulli_words(
+    probability: List[float], shape: Tuple[int, ...], bits: int = 24, random: Any = None
+) -> List[np.ndarray]:
+    """
+    Draw words whose bits are set with the given probabilities
+
+    Every bit compares its own bits-wide random integer U with p * 2**bits, the
+    comparison is done on the bit planes of U, most significant first, and
+    shared by all the probabilities.
+
+    Parameters
+    ----------
+    probability : List[float]
+        The probabilities, 0 < p < 1
+    shape : Tuple[int, ...]
+        The shape of the words
+    bits : int, optional
+        The resolution of the probabilities, by default 24
+    random : RandomStream, optional
+        The random stream of the sampler, by default np.random
+
+    Returns
+    -------
+    List[np.ndarray]
+        The random words of each probability
+    """
+    thresholds = [int(p * 2**bits) for p in probability]
+    less = [np.zeros(shape, dtype=np.uint64) for _ in thresholds]
+    equal = [np.full(shape, _ONES, dtype=np.uint64) for _ in thresholds]
+    for i in reversed(range(bits)):
+        plane = _random_words(shape, random)
+        for k, threshold in enumerate(thresholds):
+            if (threshold >> i) & 1:
+                less[k] |= equal[k] & ~plane
+                equal[k] &= plane
+            else:
+                equal[k] &= ~plane
+    return less
+
+
+class PackedIsing(object):
+    """
+    Packed Ising
+    ============
+
+    Example
+    -------
+    >>> import mcmc_statphys as mcsp
+    >>> m = mcsp.model.PackedIsing(L=256, J=1, H=0, dim=2)
+    >>> f = mcsp.algorithm.Metropolis(m)
+    >>> f.sweep(T=2.0, uid="test")
+
+    Description
+    -----------
+
+    The Ising model of ``mcmc_statphys.model.Ising`` with multispin coding: the
+    spins are stored as bits, 64 neighboring spins of the last axis in one uint64
+    word (1 means +1, 0 means -1). The checkerboard sweep of ``Metropolis``
+    counts the anti-aligned neighbors of 64 spins at once with bitwise adders and
+    accepts the flips of a whole word with bitwise masks, so a lattice needs 1/64
+    of the memory of an int64 spin array.
+
+    ``spin`` unpacks the lattice to an int8 array of +1 and -1, the energy and
+    magnetization API is the one of ``Ising``. L must be a multiple of 64.
+    """
+
+    def __init__(self, L: int, J: float = 1, H: float = 0, dim: int = 2):
+        """
+        initialize the packed Ising model
+
+        Parameters
+        ----------
+        L : int
+            The length of the lattice, a multiple of 64
+        J : float, optional
+            The interaction between the neighbor, by default 1
+        H : float, optional
+            The external magnetic field, by default 0
+        dim : int, optional
+            The dimension of the lattice, by default 2
+        """
+        L = int(L)
+        if L % 64 != 0:
+            raise ValueError("L must be a multiple of 64")
+        self.L: int = L  # The length of the lattice
+        self.dim: int = dim  # The dimension of the lattice
+        self.N: int = L**dim  # The number of the lattice
+        self.z: int = 2 * dim  # The number of neighbors of a site
+        self.J: float = J  # The interaction between the neighbor
+        self.H: float = H  # The external magnetic field
+        self.energy: float = 0  # The total energy of the system
+        self.magnetization: float = 0  # The total magnetization of the system
+        self.random = None  # The random stream of the sampler, set by the algorithm, else np.random
+
+        self._init_spin(type="packedising")
+        self._init_color()
+        self._get_total_energy()
+        self._get_total_magnetization()
+
+    def _init_spin(self, type="packedising"):
+        """
+        Initialize the spin of the system
+
+        Parameters
+        ----------
+        type : str, optional
+            The type of the spin, by default "packedising"
+        """
+        self.words = _random_words((self.L,) * (self.dim - 1) + (self.L // 64,), self.random).copy()
+        self.type = type
+
+    def _init_color(self):
+        """
+        Initialize the checkerboard masks of the words
+        """
+        # 64 is even, the color of bit b is the parity of b and the other coordinates
+        parity = np.indices((self.L,) * (self.dim - 1)).sum(axis=0) % 2
+        parity = np.broadcast_to(parity[..., None], self.words.shape)
+        self._color = [np.where(parity == 0, _EVEN, _ODD), np.where(parity == 0, _ODD, _EVEN)]
+
+    @property
+    def spin(self) -> np.ndarray:
+        """
+        The unpacked spin of the system, int8 of +1 and -1
+        """
+        bits = np.unpackbits(self.words.astype("<u8").view(np.uint8), bitorder="little")
+        return (2 * bits.astype(np.int8) - 1).reshape((self.L,) * self.dim)
+
+    def set_spin(self, spin: np.ndarray):
+        """
+        Set the spin of the system
+
+        Parameters
+        ----------
+        spin : np.ndarray
+            The spin of the system, +1 and -1
+        """
+        bits = (np.asarray(spin) > 0).astype(np.uint8).reshape(self.words.shape + (64,))
+        packed = np.packbits(bits, axis=-1, bitorder="little")
+        self.words = np.ascontiguousarray(packed).view("<u8").reshape(self.words.shape).astype(np.uint64)
+        self._get_total_energy()
+        self._get_total_magnetization()
+
+    def _get_neighbor_words(self, axis: int, step: int) -> np.ndarray:
+        """
+        Get the words of the neighbors along an axis
+
+        Parameters
+        ----------
+        axis : int
+            The axis of the lattice
+        step : int
+            -1 or 1
+
+        Returns
+        -------
+        np.ndarray
+            Bit b of the word holds the neighbor of the spin at bit b
+        """
+        if axis < self.dim - 1:
+            return np.roll(self.words, -step, axis=axis)
+        if step == -1:
+            carry = np.roll(self.words, 1, axis=-1) >> np.uint64(63)
+            return (self.words << np.uint64(1)) | carry
+        carry = np.roll(self.words, -1, axis=-1) << np.uint64(63)
+        return (self.words >> np.uint64(1)) | carry
+
+    def _get_total_energy(self) -> float:
+        """
+        Get the total energy of the system
+
+        Returns
+        -------
+        float
+            The total energy of the system
+        """
+        anti = 0
+        for axis in range(self.dim):
+            anti += _popcount(self.words ^ self._get_neighbor_words(axis, 1))
+        magnetization = 2 * _popcount(self.words) - self.N
+        self.energy = -self.J * (self.dim * self.N - 2 * anti) - self.H * magnetization
+        return self.energy
+
+    def _get_per_energy(self) -> float:
+        """
+        Get the per energy of the system
+
+        Returns
+        -------
+        float
+            The per energy of the system
+        """
+        self.energy = self._get_total_energy()
+        return self.energy / self.N
+
+    def _get_total_magnetization(self) -> float:
+        """
+        Get the magnetization of the system
+
+        Returns
+        -------
+        float
+            The magnetization of the system
+        """
+        self.magnetization = 2 * _popcount(self.words) - self.N
+        return self.magnetization
+
+    def _get_per_magnetization(self) -> float:
+        """
+        Get the per magnetization of the system
+
+        Returns
+        -------
+        float
+            The per magnetization of the system
+        """
+        return self._get_total_magnetization() / self.N
+
+    def _delta_levels(self) -> np.ndarray:
+        """
+        Get every possible delta energy of a single spin flip, see Ising._delta_levels
+
+        Returns
+        -------
+        np.ndarray
+            The delta energy of each level
+        """
+        z = self.z
+        spin = np.repeat([-1, 1], z + 1)
+        field = np.tile(np.arange(-z, z + 1, 2), 2)
+        return 2 * spin * (self.J * field + self.H)
+
+    def _get_site(self, index: Union[int, Tuple[int, ...]]) -> Tuple[Tuple[int, ...], int]:
+        """
+        Get the word and the bit of the site
+
+        Parameters
+        ----------
+        index : Union[int, Tuple[int, ...]]
+            The flat index or the index tuple of the site
+
+        Returns
+        -------
+        Tuple[Tuple[int, ...], int]
+            The index of the word and the bit
+        """
+        if isinstance(index, (int, np.integer)):
+            index = np.unravel_index(int(index), (self.L,) * self.dim)
+        index = tuple(int(i) for i in index)
+        return index[:-1] + (index[-1] // 64,), index[-1] % 64
+
+    def _get_site_spin(self, index: Tuple[int, ...]) -> int:
+        """
+        Get the spin of the site
+
+        Parameters
+        ----------
+        index : Tuple[int, ...]
+            The index tuple of the site
+
+        Returns
+        -------
+        int
+            +1 or -1
+        """
+        word, bit = self._get_site(index)
+        return 2 * int((self.words[word] >> np.uint64(bit)) & np.uint64(1)) - 1
+
+    def _get_site_field(self, index: Union[int, Tuple[int, ...]]) -> Tuple[int, int]:
+        """
+        Get the spin of the site and the sum of its neighbor spins
+
+        Parameters
+        ----------
+        index : Union[int, Tuple[int, ...]]
+            The index of the site
+
+        Returns
+        -------
+        Tuple[int, int]
+            The spin and the field of the site
+        """
+        if isinstance(index, (int, np.integer)):
+            index = np.unravel_index(int(index), (self.L,) * self.dim)
+        index = tuple(int(i) for i in index)
+        field = 0
+        for i in range(self.dim):
+            for j in [-1, 1]:
+                field += self._get_site_spin(index[:i] + ((index[i] + j) % self.L,) + index[i + 1 :])
+        return self._get_site_spin(index), field
+
+    def _get_level(self, sites: Union[int, Tuple[int, ...]], new_site: Any = None) -> int:
+        """
+        Get the level of flipping the spin of the site, see _delta_levels
+
+        Parameters
+        ----------
+        sites : Union[int, Tuple[int, ...]]
+            The index of the site
+        new_site : Any, optional
+            The proposed spin, a flip is known from the site alone
+
+        Returns
+        -------
+        int
+            The level of the site
+        """
+        spin, field = self._get_site_field(sites)
+        return (spin > 0) * (self.z + 1) + (field + self.z) // 2
+
+    def _random_site(self) -> int:
+        """
+        Get a random site
+
+        Returns
+        -------
+        int
+            The flat index of the site
+        """
+        if self.random is not None:
+            return self.random.integers(self.N)
+        return np.random.randint(0, self.N)
+
+    def _propose(self, index: Union[int, Tuple[int, ...]]) -> Tuple[int, float]:
+        """
+        Propose to flip the spin of the site, without changing the system
+
+        Parameters
+        ----------
+        index : Union[int, Tuple[int, ...]]
+            The index of the site
+
+        Returns
+        -------
+        Tuple[int, float]
+            The proposed spin and the delta energy
+        """
+        spin, field = self._get_site_field(index)
+        return -spin, 2 * spin * (self.J * field + self.H)
+
+    def _accept(self, index: Union[int, Tuple[int, ...]], new_site: int, delta_energy: float) -> None:
+        """
+        Accept the proposed spin of the site
+
+        Parameters
+        ----------
+        index : Union[int, Tuple[int, ...]]
+            The index of the site
+        new_site : int
+            The proposed spin, see _propose
+        delta_energy : float
+            The delta energy, see _propose
+        """
+        word, bit = self._get_site(index)
+        self.words[word] ^= np.uint64(1) << np.uint64(bit)
+        self.energy += delta_energy
+        self.magnetization += 2 * new_site
+
+    def _change_delta_energy(self, index: Union[int, Tuple[int, ...]]) -> float:
+        """
+        Change the spin of the site and get the delta energy
+
+        Parameters
+        ----------
+        index : Union[int, Tuple[int, ...]]
+            The index of the site
+
+        Returns
+        -------
+        float
+            The delta energy of the site
+        """
+        new_site, detle_energy = self._propose(index)
+        self._accept(index, new_site, detle_energy)
+        return detle_energy
+
+    def _random_walk(self) -> float:
+        """
+        Random walk of the system
+
+        Returns
+        -------
+        float
+            The delta energy of the system
+        """
+        return self._change_delta_energy(self._random_site())
+
+    def _update_sublattice(self, color: int, probability: np.ndarray) -> None:
+        """
+        Propose to flip every spin of one sublattice and accept them bitwise
+
+        Parameters
+        ----------
+        color : int
+            0 for the even sites, 1 for the odd sites
+        probability : np.ndarray
+            The acceptance probability of each level, see _delta_levels
+        """
+        words = self.words
+        planes = [np.zeros_like(words) for _ in range(self.z.bit_length())]
+        # bit-sliced count of the anti-aligned neighbors
+        for axis in range(self.dim):
+            for step in [-1, 1]:
+                carry = words ^ self._get_neighbor_words(axis, step)
+                for i in range(len(planes)):
+                    planes[i], carry = planes[i] ^ carry, planes[i] & carry
+        levels = []
+        for level in range(2 * (self.z + 1)):
+            spin = 1 if level > self.z else -1
+            anti = self.z - (level - self.z - 1) if spin > 0 else level
+            if probability[level] <= 0:
+                continue
+            mask = words if spin > 0 else ~words
+            for i, plane in enumerate(planes):
+                mask = mask & (plane if (anti >> i) & 1 else ~plane)
+            levels.append((level, mask))
+        uncertain = sorted({probability[level] for level, _ in levels if probability[level] < 1})
+        random = dict(zip(uncertain, _bernoulli_words(uncertain, words.shape, random=self.random)))
+        accept = np.zeros_like(words)
+        for level, mask in levels:
+            if probability[level] < 1:
+                mask = mask & random[probability[level]]
+            accept |= mask
+        flip = accept & self._color[color]
+        delta_levels = self._delta_levels()
+        for level, mask in levels:
+            count = _popcount(flip & mask)
+            if count:
+                self.energy += count * delta_levels[level]
+        self.magnetization += 2 * (_popcount(flip & ~words) - _popcount(flip & words))
+        self.words ^= flip
+
+    _init_data = Ising._init_data
+    _init_snapshots = Ising._init_snapshots
+    _save_date = Ising._save_date
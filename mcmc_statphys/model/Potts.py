@@ -5,8 +5,9 @@
 @时间    :2023/07/12 11:37:59
 @作者    :結凪
 """
-from typing import Tuple
+from typing import Any, Tuple, Union
 import numpy as np
+from ..snapshot import Snapshots
 from .Ising import Ising
 
 __all__ = ["Potts"]
@@ -59,48 +60,147 @@ class Potts(Ising):
         """
         self.p = p
         super().__init__(L=L, J=J, H=H, dim=dim)
-        self._init_spin(type="potts", p=p)
+        self._init_spin(type="potts")
+        self._get_total_energy()
+        self._get_total_magnetization()
 
     def _init_spin(self, type="potts"):
         """
-        init the spin of the lattice
+        init the spin of the lattice, the states are stored as uint8 (uint16 for p > 256)
 
         Parameters
         ----------
         type : str, optional
             The type of the spin, by default "potts"
         """
-        self.spin = np.random.choice(range(self.p), size=(self.L,) * self.dim)
+        states = np.arange(self.p, dtype=np.min_scalar_type(self.p - 1))
+        self.spin = np.random.choice(states, size=(self.L,) * self.dim)
         self.type = type
 
-    def _change_site_spin(self, index: Tuple[int, ...]):
+    def _new_site_spin(self, site: int) -> int:
         """
-        change the spin of the site
+        draw the proposed state of the site
 
         Parameters
         ----------
-        index : Tuple[int, ...]
-            The index of the site.
+        site : int
+            The flat index of the site.
+
+        Returns
+        -------
+        int
+            A random state.
         """
-        self.spin[index] = np.random.choice(range(self.p))
+        if self.random is not None:
+            return self.random.integers(self.p)
+        return np.random.randint(0, self.p)
 
-    def _get_site_energy(self, index: Tuple[int, ...]) -> float:
+    def _get_site_energy(self, index: Union[int, Tuple[int, ...]], value: Any = None) -> float:
         """
         get the energy of the site
 
         Parameters
         ----------
-        index : Tuple[int, ...]
+        index : Union[int, Tuple[int, ...]]
             The index of the site.
+        value : Any, optional
+            The state of the site, by default its current state.
 
         Returns
         -------
         float
             The energy of the site.
         """
-        neighbors_spin = super()._get_neighbor_spin(index)
-        energy = 0
-        for neighbor_spin in neighbors_spin:
-            if self.spin[index] == neighbor_spin:
-                energy -= self.J
-        return energy
+        site = self._site(index)
+        spin = self._flat_spin()
+        if value is None:
+            value = spin[site]
+        return -self.J * np.count_nonzero(spin[self.neighbors[site]] == value)
+
+    def _delta_levels(self) -> np.ndarray:
+        """
+        get every possible delta energy of changing the state of a site
+
+        The level of a change is n_new - n_old + z, where n is the number of
+        the z neighbors in the same state as the site.
+
+        Returns
+        -------
+        np.ndarray
+            The delta energy of each level.
+        """
+        z = self.z
+        return -self.J * np.arange(-z, z + 1)
+
+    def _get_level(self, sites: Union[int, np.ndarray], new_site: Any = None) -> Union[int, np.ndarray, None]:
+        """
+        get the level of changing the state of the sites to the proposed states, see _delta_levels
+
+        Parameters
+        ----------
+        sites : Union[int, np.ndarray]
+            The flat index of the sites.
+        new_site : Any, optional
+            The proposed states, drawn by _propose.
+
+        Returns
+        -------
+        Union[int, np.ndarray, None]
+            The level of each site, None without the proposed states.
+        """
+        if new_site is None:
+            return None
+        spin = self._flat_spin()
+        neighbors_spin = spin[self.neighbors[sites]]
+        new_same = np.sum(neighbors_spin == np.expand_dims(new_site, -1), axis=-1)
+        old_same = np.sum(neighbors_spin == np.expand_dims(spin[sites], -1), axis=-1)
+        return new_same - old_same + self.z
+
+    def _propose_block(self, sites: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        propose random states for independent sites, without changing the system
+
+        Parameters
+        ----------
+        sites : np.ndarray
+            The flat indices of the sites, no two of them are neighbors.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            The proposed states, the delta energy and the level of each site.
+        """
+        spin = self._flat_spin()
+        old_spin = spin[sites]
+        if self.random is not None:
+            new_spin = self.random.generator.integers(0, self.p, size=len(sites))
+        else:
+            new_spin = np.random.randint(0, self.p, size=len(sites))
+        neighbors_spin = spin[self.neighbors[sites]]
+        new_same = np.sum(neighbors_spin == new_spin[:, None], axis=1)
+        old_same = np.sum(neighbors_spin == old_spin[:, None], axis=1)
+        level = new_same - old_same + self.z
+        return new_spin, -self.J * (new_same - old_same), level
+
+    def _get_total_energy(self) -> float:
+        """
+        get the total energy of the system
+
+        Returns
+        -------
+        float
+            The total energy of the system.
+        """
+        self.energy = -self.J * self._get_bond_sum(np.equal)
+        return self.energy
+
+    def _init_snapshots(self) -> Snapshots:
+        """
+        Initialize the snapshot store, the states are stored as uint8
+
+        Returns
+        -------
+        Snapshots
+            The snapshot store
+        """
+        return Snapshots(codec="uint8")
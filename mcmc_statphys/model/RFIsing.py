@@ -6,11 +6,10 @@
 @作者    :結凪
 """
 
-from typing import Any, Tuple
+from typing import Any, Tuple, Union
 import numpy as np
+from ..static import freeze
 from .Ising import Ising
-import pandas as pd
-import copy
 
 __all__ = ["RFIsing"]
 
@@ -23,7 +22,16 @@ class RFIsing(Ising):
     # TODO: add the description of the model
     """
 
-    def __init__(self, L: int, J: float = 1, Hmean: float = 0, Hsigma: float = 1, Hform: str = "norm", dim: int = 2):
+    def __init__(
+        self,
+        L: int,
+        J: float = 1,
+        Hmean: float = 0,
+        Hsigma: float = 1,
+        Hform: str = "norm",
+        dim: int = 2,
+        local_field: bool = False,
+    ):
         """
         init the RFIsing model
 
@@ -41,9 +49,13 @@ class RFIsing(Ising):
             The form of the H, "norm" or "uniform", by default "norm"
         dim : int, optional
             The dimension of the lattice, by default 2
+        local_field : bool, optional
+            Keep the sum of the neighbor spins of every site, by default False
         """
-        H = self._init_H(Hmean=Hmean, Hsigma=Hsigma, Hform=Hform)
-        super().__init__(L=L, J=J, H=H, dim=dim)
+        self.L: int = int(L)
+        self.dim: int = dim
+        H = freeze(self._init_H(Hmean=Hmean, Hsigma=Hsigma, Hform=Hform))  # quenched, shared by the copies
+        super().__init__(L=L, J=J, H=H, dim=dim, local_field=local_field)
         self._init_spin(type="rfising")
         self._get_total_energy()
         self._get_total_magnetization()
@@ -79,87 +91,26 @@ class RFIsing(Ising):
             raise ValueError("Invalid Hform")
         return H
 
-    def _get_site_energy(self, index: Tuple[int, ...]) -> float:
+    def _get_site_energy(self, index: Union[int, Tuple[int, ...]], value: Any = None) -> float:
         """
         get the energy of the site
 
         Parameters
         ----------
-        index : Tuple[int, ...]
+        index : Union[int, Tuple[int, ...]]
             The index of the site.
+        value : Any, optional
+            The spin of the site, by default its current spin.
 
         Returns
         -------
         float
             The energy of the site.
         """
-        neighbors_spin = self._get_neighbor_spin(index)
-        energy = 0
-        for neighbor_spin in neighbors_spin:
-            energy -= self.J * np.dot(self.spin[index], neighbor_spin)
-        energy -= self.H[index] * self.spin[index]
+        site = self._site(index)
+        spin = self._flat_spin()
+        if value is None:
+            value = spin[site]
+        energy = -self.J * (np.sum(spin[self.neighbors[site]]) * value)
+        energy -= self.H.reshape(-1)[site] * np.int64(value)
         return energy
-
-    def _init_data(self) -> pd.DataFrame:
-        """
-        init the data
-
-        Returns
-        -------
-        pd.DataFrame
-            The data.
-        """
-        data: pd.DataFrame = pd.DataFrame(
-            columns=[
-                "uid",
-                "iter",
-                "T",
-                "H",
-                "energy",
-                "magnetization",
-                "spin",
-            ]
-        )
-        data.set_index(["uid", "iter"], inplace=True)
-        return data
-
-    def _save_date(self, T: float, uid: str, data: pd.DataFrame) -> pd.DataFrame:
-        """
-        save the data
-
-        Parameters
-        ----------
-        T : float
-            The temperature.
-        uid : str
-            The uid of the data.
-        data : pd.DataFrame
-            The data.
-
-        Returns
-        -------
-        pd.DataFrame
-            The data.
-        """
-        if uid not in data.index.get_level_values("uid").values:
-            data.loc[(uid, 1), :] = [
-                T,
-                0,
-                self.energy,
-                self.magnetization,
-                0,
-            ]
-            data.at[(uid, 1), "spin"] = copy.deepcopy(self.spin)
-            data.at[(uid, 1), "H"] = self.H
-        else:
-            iterplus = data.loc[uid].index.max() + 1
-            data.loc[(uid, iterplus), :] = [
-                T,
-                0,
-                self.energy,
-                self.magnetization,
-                0,
-            ]
-            data.at[(uid, iterplus), "spin"] = copy.deepcopy(self.spin)
-            data.at[(uid, iterplus), "H"] = self.H
-        return data
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+"""
+@文件    :ReplicaIsing.py
+@时间    :2026/10/17 16:21:08
+@作者    :結凪
+"""
+
+from typing import Any, Tuple, Union
+import numpy as np
+from .Ising import Ising
+
+__all__ = ["ReplicaIsing"]
+
+
+class ReplicaIsing(Ising):
+    """
+    Replica Ising
+    =============
+
+    Example
+    -------
+    >>> import mcmc_statphys as mcsp
+    >>> m = mcsp.model.ReplicaIsing(L=16, R=64, J=1, H=0, dim=2)
+    >>> f = mcsp.algorithm.Metropolis(m)
+    >>> f.sweep(T=2.0, uid="test")
+    >>> f.sweep(T=np.linspace(2.0, 2.5, 64), uid="ladder")
+
+    Description
+    -----------
+
+    R independent replicas of the Ising model in one array. The spin has a leading
+    replica axis, shape (R, L, ..., L), and ``energy`` and ``magnetization`` hold one
+    value per replica. The checkerboard sweep of ``Metropolis`` updates all the
+    replicas in lockstep, at one temperature or at one temperature per replica. A
+    single update of ``Metropolis`` proposes one site in every replica.
+    """
+
+    def __init__(self, L: int, R: int, J: float = 1, H: float = 0, dim: int = 2):
+        """
+        initialize the replicas
+
+        Parameters
+        ----------
+        L : int
+            The length of the lattice
+        R : int
+            The number of the replicas
+        J : float, optional
+            The interaction between the neighbor, by default 1
+        H : float, optional
+            The external magnetic field, by default 0
+        dim : int, optional
+            The dimension of the lattice, by default 2
+        """
+        self.R: int = int(R)  # The number of the replicas
+        super().__init__(L=L, J=J, H=H, dim=dim)
+
+    def _init_spin(self, type="replicaising"):
+        """
+        Initialize the spin of the replicas
+
+        Parameters
+        ----------
+        type : str, optional
+            The type of the spin, by default "replicaising"
+        """
+        self.spin = np.random.choice([-1, 1], size=(self.R,) + (self.L,) * self.dim)
+        self.type = "replicaising"  # Ising.__init__ passes type="ising"
+
+    def _flat_spin(self) -> np.ndarray:
+        """
+        Get the spin of the replicas as a (R, N) view
+
+        Returns
+        -------
+        np.ndarray
+            The spin of the replicas, indexed by the flat index of the site
+        """
+        return self.spin.reshape(self.R, self.N)
+
+    def _get_total_energy(self) -> np.ndarray:
+        """
+        Get the total energy of each replica
+
+        Returns
+        -------
+        np.ndarray
+            The total energy of each replica
+        """
+        axes = tuple(range(1, self.dim + 1))
+        if self.L > 2:
+            bond = sum(np.sum(self.spin * np.roll(self.spin, 1, axis=axis), axis=axes) for axis in axes)
+        else:
+            spin = self._flat_spin()
+            bond = np.sum(spin[:, :, None] * spin[:, self.neighbors], axis=(1, 2)) / 2
+        self.energy = -self.J * bond - self.H * np.sum(self.spin, axis=axes)
+        return self.energy
+
+    def _get_total_magnetization(self) -> np.ndarray:
+        """
+        Get the magnetization of each replica
+
+        Returns
+        -------
+        np.ndarray
+            The magnetization of each replica
+        """
+        self.magnetization = np.sum(self.spin, axis=tuple(range(1, self.dim + 1)))
+        return self.magnetization
+
+    def _get_level(self, sites: Union[int, np.ndarray], new_site: Any = None) -> np.ndarray:
+        """
+        Get the level of flipping the spin of the sites in each replica
+
+        Parameters
+        ----------
+        sites : Union[int, np.ndarray]
+            The flat index of the sites
+        new_site : Any, optional
+            The proposed spin, a flip is known from the site alone
+
+        Returns
+        -------
+        np.ndarray
+            The level of each replica and site, see Ising._delta_levels
+        """
+        spin = self._flat_spin()
+        field = np.sum(spin[:, self.neighbors[sites]], axis=-1)
+        return (spin[:, sites] > 0) * (self.z + 1) + (field + self.z) // 2
+
+    def _propose(self, index: Union[int, Tuple[int, ...]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Propose to flip the spin of the site in every replica, without changing the system
+
+        Parameters
+        ----------
+        index : Union[int, Tuple[int, ...]]
+            The index of the site
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The proposed spin and the delta energy of each replica, shape (R,)
+        """
+        new_spin, delta_energy, _ = self._propose_block(np.array([self._site(index)]))
+        return new_spin[:, 0], delta_energy[:, 0]
+
+    def _accept(self, index: Union[int, Tuple[int, ...]], new_site: np.ndarray, delta_energy: np.ndarray) -> None:
+        """
+        Accept the proposed spin of the site in every replica
+
+        Pass the old spin and a zero delta energy for the replicas that reject it.
+
+        Parameters
+        ----------
+        index : Union[int, Tuple[int, ...]]
+            The index of the site
+        new_site : np.ndarray
+            The spin of each replica, shape (R,)
+        delta_energy : np.ndarray
+            The delta energy of each replica, shape (R,)
+        """
+        accept = np.ones((self.R, 1), dtype=bool)
+        sites = np.array([self._site(index)])
+        self._accept_block(sites, np.reshape(new_site, (self.R, 1)), np.reshape(delta_energy, (self.R, 1)), accept)
+
+    def _propose_block(self, sites: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Propose to flip the spins of independent sites of every replica
+
+        Parameters
+        ----------
+        sites : np.ndarray
+            The flat indices of the sites, no two of them are neighbors
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            The proposed spins, the delta energy and the level, shape (R, len(sites))
+        """
+        spin = self._flat_spin()
+        field = np.sum(spin[:, self.neighbors[sites]], axis=-1)
+        delta_energy = 2 * spin[:, sites] * (self.J * field + self.H)
+        level = (spin[:, sites] > 0) * (self.z + 1) + (field + self.z) // 2
+        return -spin[:, sites], delta_energy, level
+
+    def _accept_block(
+        self, sites: np.ndarray, new_spin: np.ndarray, delta_energy: np.ndarray, accept: np.ndarray
+    ) -> None:
+        """
+        Accept the proposed spins of independent sites of every replica
+
+        Parameters
+        ----------
+        sites : np.ndarray
+            The flat indices of the proposed sites
+        new_spin : np.ndarray
+            The proposed spins, shape (R, len(sites))
+        delta_energy : np.ndarray
+            The delta energy, shape (R, len(sites))
+        accept : np.ndarray
+            Whether each proposal is accepted, shape (R, len(sites))
+        """
+        spin = self._flat_spin()
+        old_spin = spin[:, sites]
+        new_spin = np.where(accept, new_spin, old_spin)
+        self.magnetization = self.magnetization + np.sum(new_spin - old_spin, axis=1)
+        self.energy = self.energy + np.sum(delta_energy * accept, axis=1)
+        spin[:, sites] = new_spin
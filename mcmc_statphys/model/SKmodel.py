@@ -8,7 +8,7 @@
 
 from typing import Tuple
 import numpy as np
-import copy
+from ..static import freeze
 from .Ising import Ising
 
 __all__ = ["SKmodel"]
@@ -64,12 +64,13 @@ class SKmodel(Ising):
         H : float, optional
             The external field strength, by default 0
         """
-        super().__init__(L=N, dim=1, H=0)
         self.Jmean: float = Jmean
         self.Jsigma: float = Jsigma
+        self.N: int = N  # Ising.__init__ computes the energy, so Jij is needed first
+        self._init_Jij(Jform=Jform)
+        super().__init__(L=N, dim=1, H=0)
 
         self._init_spin(type="SK")
-        self._init_Jij(Jform=Jform)
         self._get_total_energy()
         self._get_total_magnetization()
 
@@ -94,6 +95,8 @@ class SKmodel(Ising):
             self.Jij = self.Jij + self.Jij.T
             np.fill_diagonal(self.Jij, 0)
             self.Jij = self.Jij.astype(np.float32)
+        # quenched, shared by the copies of the model
+        freeze(self.Jij)
 
     def _get_total_energy(self) -> float:
         """
@@ -108,35 +111,23 @@ class SKmodel(Ising):
         self.energy -= np.sum(self.H * self.spin)
         return self.energy
 
-    def _change_delta_energy(self, index: Tuple[int, ...]) -> float:
+    def _get_site_energy(self, index: Tuple[int, ...], value: float = None) -> float:
         """
-        change the spin of the site
+        get the energy of the site, every other spin is a neighbor
 
         Parameters
         ----------
         index : Tuple[int, ...]
             The index of the site.
+        value : float, optional
+            The spin of the site, by default its current spin.
 
         Returns
         -------
         float
-            The delta energy of the system.
-        """
-        old_energy = copy.deepcopy(self.energy)
-        self._change_site_spin(index)
-        new_energy = self._get_total_energy()
-        detle_energy = new_energy - old_energy
-        self.magnetization += 2 * self.spin[index]
-        return detle_energy
-
-    def _random_walk(self) -> float:
-        """
-        random walk
-
-        Returns
-        -------
-        float
-            The delta energy of the system.
+            The energy of the site.
         """
-        site = np.random.randint(self.N)
-        return self._change_delta_energy(site)
+        site = self._site(index)
+        if value is None:
+            value = self.spin[site]
+        return -value * (np.dot(self.Jij[site], self.spin) + self.H)
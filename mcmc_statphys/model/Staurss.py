@@ -11,7 +11,8 @@
 from typing import Any, Tuple
 import numpy as np
 import copy
-import pandas as pd
+from ..snapshot import Snapshots
+from ..trajectory import Trajectory
 import networkx as nx
 
 __all__ = ["Staurss"]
@@ -85,16 +86,61 @@ class Staurss(object):
         else:
             self.spin.add_edge(i, j)
 
+    def _random_site(self) -> Tuple[int, int]:
+        """Get a random pair of nodes / cn: 随机选取一对节点
+
+        Returns:
+            Tuple[int, int]: The pair of nodes / cn: 节点对
+        """
+        i, j = np.random.choice(self.L, size=2, replace=False)
+        return int(i), int(j)
+
+    def _propose(self, index: Tuple[int, ...]):
+        """Propose to toggle the edge, without changing the system / cn: 提议改变边, 不改变系统
+
+        Toggling the edge (i, j) changes the number of triangles by the number of
+        common neighbors of i and j.
+
+        Args:
+            index (Tuple[int, ...]): The pair of nodes / cn: 节点对
+
+        Returns:
+            Tuple[bool, float]: Whether the edge exists after the toggle and the delta energy / cn: 新的边和能量差
+        """
+        i, j = index
+        new_edge = not self.spin.has_edge(i, j)
+        triangle = len(set(self.spin[i]) & set(self.spin[j]))
+        sign = 1 if new_edge else -1
+        detle_energy = sign * (self.Jij * triangle / self.N - self.H)
+        return new_edge, detle_energy
+
+    def _accept(self, index: Tuple[int, ...], new_edge: bool, delta_energy: float):
+        """Accept the proposed edge / cn: 接受提议的边
+
+        Args:
+            index (Tuple[int, ...]): The pair of nodes / cn: 节点对
+            new_edge (bool): Whether the edge exists after the toggle / cn: 新的边
+            delta_energy (float): The delta energy / cn: 能量差
+        """
+        i, j = index
+        if new_edge:
+            self.spin.add_edge(i, j)
+            self.density += 1
+        else:
+            self.spin.remove_edge(i, j)
+            self.density -= 1
+        self.energy += delta_energy
+
     def _change_delta_energy(self, index: Tuple[int, ...]):
         """Get the delta energy of the site"""
-        old_energy = copy.deepcopy(self.energy)
-        self._change_site_spin(index)
-        new_energy = copy.deepcopy(self._get_total_energy())
-        self._get_total_density()
-        detle_energy = new_energy - old_energy
-        self.energy += detle_energy
+        new_edge, detle_energy = self._propose(index)
+        self._accept(index, new_edge, detle_energy)
         return detle_energy
 
+    def _random_walk(self) -> float:
+        """Toggle a random edge and get the delta energy / cn: 随机改变一条边"""
+        return self._change_delta_energy(self._random_site())
+
     def set_spin(self, spin):
         self.spin = spin
         self._get_total_energy()
@@ -106,17 +152,13 @@ class Staurss(object):
     def get_density(self) -> float:
         return self.density
 
-    def _init_data(self):
-        data: pd.DataFrame = pd.DataFrame(columns=["uid", "iter", "T", "H", "energy", "density", "spin"])
-        data.set_index(["uid", "iter"], inplace=True)
-        return data
+    def _init_data(self) -> Trajectory:
+        return Trajectory(columns=["T", "H", "energy", "density"])
 
-    def _save_date(self, T, uid, data: pd.DataFrame):
-        if uid not in data.index.get_level_values("uid").values:
-            data.loc[(uid, 1), :] = [T, self.H, self.energy, self.density, 0]
-            data.at[(uid, 1), "spin"] = copy.deepcopy(self.spin)
-        else:
-            iterplus = data.loc[uid].index.max() + 1
-            data.loc[(uid, iterplus), :] = [T, self.H, self.energy, self.density, 0]
-            data.at[(uid, iterplus), "spin"] = copy.deepcopy(self.spin)
+    def _init_snapshots(self) -> Snapshots:
+        # the graph is kept as an object, the store copies it
+        return Snapshots(codec="object")
+
+    def _save_date(self, T, uid, data: Trajectory) -> Trajectory:
+        data.append(uid, T=T, H=self.H, energy=self.energy, density=self.density)
         return data
@@ -6,8 +6,9 @@
 @作者    :結凪
 """
 
-from typing import Tuple
+from typing import Tuple, Union
 import numpy as np
+from ..snapshot import Snapshots
 from .Ising import Ising
 
 __all__ = ["XY"]
@@ -53,6 +54,8 @@ class XY(Ising):
     def __init__(self, L, Jij=1, H=0):
         super().__init__(L, Jij, H, dim=2)
         self._init_spin(type="XY")
+        self._get_total_energy()
+        self._get_total_magnetization()
 
     def _init_spin(self, type="XY"):
         """Initialize the spin of the system
@@ -64,22 +67,32 @@ class XY(Ising):
         self.spin = self.spin.astype(np.float32)
         self.type = type
 
-    def _change_site_spin(self, index: Tuple[int, ...]):
-        """Change the spin of the site
+    def _init_snapshots(self) -> Snapshots:
+        """Initialize the snapshot store, the spin vectors are stored as float32
+
+        Returns:
+            Snapshots: The snapshot store
+        """
+        return Snapshots(codec="float32")
+
+    def _new_site_spin(self, site: int) -> np.ndarray:
+        """Draw the proposed spin of the site
 
         Args:
-            index (Tuple[int, ...]): The index of the site
+            site (int): The flat index of the site
 
-        Raises:
-            ValueError: Invalid type of spin
+        Returns:
+            np.ndarray: A random spin
         """
-        self.spin[index] = 2 * np.random.rand(self.dim) - 1
+        uniform = np.random.rand(self.dim) if self.random is None else self.random.random(self.dim)
+        return (2 * uniform - 1).astype(self.spin.dtype)
 
-    def _get_site_energy(self, index: Tuple[int, ...]) -> float:
+    def _get_site_energy(self, index: Union[int, Tuple[int, ...]], value: np.ndarray = None) -> float:
         """Get the energy of the site
 
         Args:
             index (Tuple[int, ...]): The index of the site
+            value (np.ndarray, optional): The spin of the site (Defaults its current spin)
 
         Raises:
             ValueError: Invalid type of spin
@@ -87,9 +100,21 @@ class XY(Ising):
         Returns:
             float: The energy of the site
         """
-        neighbors_spin = super()._get_neighbor_spin(index)
-        energy = 0
-        for neighbor_spin in neighbors_spin:
-            energy -= self.Jij * np.dot(self.spin[index], neighbor_spin)
-            energy -= self.H * np.dot(self.spin[index], self.spin[index])
+        site = self._site(index)
+        spin = self._flat_spin()
+        neighbors = self.neighbors[site]
+        if value is None:
+            value = spin[site]
+        energy = -self.J * np.dot(value, np.sum(spin[neighbors], axis=0))
+        energy -= len(neighbors) * self.H * np.dot(value, value)
         return energy
+
+    def _get_total_energy(self) -> float:
+        """Get the total energy of the system
+
+        Returns:
+            float: The total energy of the system
+        """
+        field = self.z * self.H * np.sum(self.spin.astype(np.float64) ** 2)
+        self.energy = -self.J * self._get_bond_sum() - field
+        return self.energy
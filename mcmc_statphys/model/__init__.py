@@ -1,4 +1,4 @@
-__all__ = ["Ising", "Heisenberg", "XY", "Potts", "SKmodel", "RFIsing"]
+__all__ = ["Ising", "Heisenberg", "XY", "Potts", "SKmodel", "RFIsing", "PackedIsing", "ReplicaIsing"]
 
 # TODO: add Network, NVT, NPT, Ice, etc.
 
@@ -8,6 +8,8 @@ from .XY import XY
 from .Potts import Potts
 from .SKmodel import SKmodel
 from .RFIsing import RFIsing
+from .PackedIsing import PackedIsing
+from .ReplicaIsing import ReplicaIsing
 
 # from .Staurss import Staurss
 # from .Ice import Ice
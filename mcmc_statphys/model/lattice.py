@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+"""
+@文件    :lattice.py
+@时间    :2026/10/17 09:12:40
+@作者    :結凪
+"""
+
+from functools import lru_cache
+from typing import Tuple
+import numpy as np
+
+__all__ = ["neighbor_table", "sublattices"]
+
+
+@lru_cache(maxsize=None)
+def neighbor_table(L: int, dim: int) -> np.ndarray:
+    """
+    Get the nearest-neighbor table of a periodic hypercubic lattice
+
+    The table is built once per (L, dim) and shared by every model instance,
+    so it is returned read-only.
+
+    Parameters
+    ----------
+    L : int
+        The length of the lattice
+    dim : int
+        The dimension of the lattice
+
+    Returns
+    -------
+    np.ndarray
+        int32 array of shape (N, z), row ``i`` holds the flat indices of the
+        neighbors of site ``i``. z is 2*dim, or less when L <= 2 and the
+        neighbors coincide (each neighbor is kept once).
+    """
+    shape = (L,) * dim
+    coords = np.indices(shape).reshape(dim, -1)
+    columns = []
+    for i in range(dim):
+        for j in [-1, 1]:
+            shifted = coords.copy()
+            shifted[i] = (shifted[i] + j) % L
+            columns.append(np.ravel_multi_index(shifted, shape))
+    table = np.stack(columns, axis=1)
+    if L <= 2:
+        # (x - 1) % L == (x + 1) % L, remove the same neighbor
+        table = np.array([np.unique(row) for row in table])
+    table = table.astype(np.int32)
+    table.flags.writeable = False
+    return table
+
+
+@lru_cache(maxsize=None)
+def sublattices(L: int, dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get the two sublattices of the checkerboard (red-black) decomposition
+
+    No two sites of the same sublattice are neighbors, so all of them can be
+    updated at once.
+
+    Parameters
+    ----------
+    L : int
+        The length of the lattice, must be even
+    dim : int
+        The dimension of the lattice
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The flat indices of the even and the odd sites
+
+    Raises
+    ------
+    ValueError
+        The periodic lattice is not bipartite for an odd L.
+    """
+    if L % 2 != 0:
+        raise ValueError("The checkerboard decomposition needs an even L")
+    parity = np.indices((L,) * dim).sum(axis=0).reshape(-1) % 2
+    colors = []
+    for color in [0, 1]:
+        sites = np.flatnonzero(parity == color).astype(np.int32)
+        sites.flags.writeable = False
+        colors.append(sites)
+    return tuple(colors)
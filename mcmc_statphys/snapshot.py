@@ -0,0 +1,735 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+"""
+@文件    :snapshot.py
+@时间    :2026/10/17 21:48:20
+@作者    :結凪
+"""
+
+import copy
+from typing import Any, Dict, Iterator, List, Tuple
+import numpy as np
+from .trajectory import Trajectory
+
+__all__ = ["Snapshots", "FlipLog"]
+
+_CODECS = ["bits", "uint8", "float16", "float32", "raw", "object"]
+_LOG_NAMES = ["iters", "ends", "keyrows", "offsets", "iter", "site", "value"]
+
+
+class Snapshots(object):
+    """
+    Snapshot store
+    ==============
+
+    Example
+    -------
+    >>> import mcmc_statphys as mcsp
+    >>> f = mcsp.algorithm.Metropolis(mcsp.model.Ising(L=100))
+    >>> uid = f.equil_sample(T=2.0, sweeps=1000, order="checkerboard", snapshot_every=100)
+    >>> f.snapshots.iters(uid)
+    >>> f.snapshots.get(uid, 500)
+    >>> f.snapshots.nbytes
+
+    Description
+    -----------
+
+    The spin configurations of the runs, kept apart from the scalar observables of
+    the Trajectory. Every snapshot is encoded by the codec of the model and stored
+    in a dense buffer:
+
+    - "bits": +1 / -1 spins packed 8 per byte, e.g. Ising
+    - "uint8": small non-negative integers, e.g. Potts
+    - "float16", "float32": continuous spins, e.g. XY and Heisenberg
+    - "raw": the array as it is
+    - "object": a deep copy, e.g. the graph of Staurss
+
+    A 100x100 Ising snapshot takes 1250 bytes instead of 80000. Each snapshot is
+    labelled with the iteration of the last row of the run when it was taken.
+
+    The store also keeps the latest state of a run when the algorithm switches to
+    another uid, so a run is resumed from where it stopped even if no snapshot was
+    taken there.
+    """
+
+    def __init__(self, codec: str = "raw", capacity: int = 64):
+        """
+        initialize the store
+
+        Parameters
+        ----------
+        codec : str, optional
+            "bits", "uint8", "float16", "float32", "raw" or "object", by default "raw"
+        capacity : int, optional
+            The initial number of snapshots of a run, by default 64
+
+        Raises
+        ------
+        ValueError
+            Unknown codec.
+        """
+        if codec not in _CODECS:
+            raise ValueError("codec must be one of {codecs}".format(codecs=", ".join(_CODECS)))
+        self.codec: str = codec
+        self.frames: Trajectory = Trajectory(columns=["iter", "spin"], capacity=capacity)
+        self._layout: Dict[str, Tuple[Tuple[int, ...], np.dtype]] = {}
+        self._states: Dict[str, Any] = {}
+
+    def __contains__(self, uid: str) -> bool:
+        return uid in self.frames or uid in self._states
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.frames)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __repr__(self) -> str:
+        return "{name}(codec={codec!r}, snapshots={size}, nbytes={nbytes})".format(
+            name=type(self).__name__, codec=self.codec, size=len(self), nbytes=self.nbytes
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes of the encoded snapshots"""
+        if self.codec == "object":
+            return 0
+        return sum(self.frames.column(uid, "spin").nbytes for uid in self.frames)
+
+    def size(self, uid: str) -> int:
+        """
+        The number of snapshots of the run
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        int
+            The number of snapshots, 0 for an unknown uid
+        """
+        return self.frames.size(uid)
+
+    def encode(self, spin: Any) -> Any:
+        """
+        Encode one spin configuration
+
+        Parameters
+        ----------
+        spin : Any
+            The spin of the model
+
+        Returns
+        -------
+        Any
+            The encoded snapshot
+        """
+        if self.codec == "object":
+            return copy.deepcopy(spin)
+        spin = np.asarray(spin)
+        if self.codec == "bits":
+            return np.packbits(spin.reshape(-1) > 0)
+        elif self.codec == "raw":
+            return spin
+        return spin.astype(self.codec)
+
+    def decode(self, uid: str, data: Any) -> Any:
+        """
+        Decode snapshots of the run
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        data : Any
+            One encoded snapshot, or a buffer of them with a leading axis
+
+        Returns
+        -------
+        Any
+            The spin, or the spins with a leading axis
+        """
+        if self.codec == "object":
+            return data
+        shape, dtype = self._layout[uid]
+        lead = np.shape(data)[:-1] if self.codec == "bits" else np.shape(data)[: np.ndim(data) - len(shape)]
+        if self.codec == "bits":
+            bits = np.unpackbits(data, axis=-1, count=int(np.prod(shape)))
+            return (2 * bits.astype(dtype) - 1).reshape(lead + shape)
+        return np.asarray(data).astype(dtype).reshape(lead + shape)
+
+    def add(self, uid: str, iter: int, spin: Any) -> None:
+        """
+        Store one snapshot of the run
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        iter : int
+            The iteration of the last row of the run
+        spin : Any
+            The spin of the model
+        """
+        if uid not in self._layout and self.codec != "object":
+            self._layout[uid] = (np.shape(spin), np.asarray(spin).dtype)
+        self.frames.append(uid, iter=iter, spin=self.encode(spin))
+
+    def keep(self, uid: str, spin: Any) -> None:
+        """
+        Keep the latest state of the run, it is not a snapshot
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        spin : Any
+            The spin of the model
+        """
+        self._states[uid] = copy.deepcopy(spin)
+
+    def state(self, uid: str) -> Any:
+        """
+        The latest state of the run, the kept state or else the last snapshot
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        Any
+            A copy of the spin
+
+        Raises
+        ------
+        KeyError
+            Neither a state nor a snapshot of the run.
+        """
+        if uid in self._states:
+            return copy.deepcopy(self._states[uid])
+        if uid not in self.frames:
+            raise KeyError(uid)
+        return copy.deepcopy(self.decode(uid, self.frames.last(uid, "spin")))
+
+    def iters(self, uid: str) -> np.ndarray:
+        """
+        The iteration label of every snapshot of the run
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        np.ndarray
+            The iterations, non-decreasing
+        """
+        return self.frames.column(uid, "iter")
+
+    def get(self, uid: str, iter: int) -> Any:
+        """
+        The last snapshot taken at or before the iteration
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        iter : int
+            The iteration of a row of the run
+
+        Returns
+        -------
+        Any
+            The spin
+
+        Raises
+        ------
+        KeyError
+            No snapshot of the run at or before the iteration.
+        """
+        index = np.searchsorted(self.iters(uid), iter, side="right") - 1
+        if index < 0:
+            raise KeyError((uid, iter))
+        return self.decode(uid, self.frames.column(uid, "spin")[index])
+
+    def spins(self, uid: str, t0: int = 0) -> Any:
+        """
+        Every snapshot of the run, decoded at once
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        t0 : int, optional
+            The first snapshot, by default 0
+
+        Returns
+        -------
+        Any
+            The spins with a leading snapshot axis
+        """
+        return self.decode(uid, self.frames.column(uid, "spin")[t0:])
+
+    def uids(self) -> List[str]:
+        """
+        The uids of the runs with snapshots
+
+        Returns
+        -------
+        List[str]
+            uid list
+        """
+        return self.frames.uids()
+
+    def arrays(self, uid: str) -> Dict[str, np.ndarray]:
+        """
+        The stored arrays of the run, the encoded snapshots and the kept state
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            name -> array, see attach
+        """
+        arrays = self.frames.arrays(uid) if uid in self.frames else {}
+        if uid in self._states:
+            arrays["state"] = self._states[uid]
+        return arrays
+
+    def attach(self, uid: str, arrays: Dict[str, np.ndarray], shape: Tuple[int, ...], dtype: np.dtype) -> None:
+        """
+        Register the stored arrays of a new run, they are not copied
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        arrays : Dict[str, np.ndarray]
+            name -> array, as returned by arrays
+        shape : Tuple[int, ...]
+            The shape of the spin
+        dtype : np.dtype
+            The dtype of the spin
+        """
+        arrays = dict(arrays)
+        if "state" in arrays:
+            self._states[uid] = arrays.pop("state")
+        self._layout[uid] = (tuple(shape), np.dtype(dtype))
+        if arrays:
+            self.frames.attach(uid, arrays)
+
+    def compact(self) -> "Snapshots":
+        """
+        An empty store of the same kind that keeps the latest state of every run
+
+        Returns
+        -------
+        Snapshots
+            The compact store, e.g. in a checkpoint, see save_checkpoint
+        """
+        store = copy.copy(self)
+        store.frames = Trajectory(columns=["iter", "spin"], capacity=self.frames.capacity)
+        store._layout = dict(self._layout)
+        store._states = {uid: self.state(uid) for uid in dict.fromkeys(self.uids() + list(self._states))}
+        return store
+
+    def extend(self, other: "Snapshots") -> "Snapshots":
+        """
+        Append every snapshot and state of another store of the same codec
+
+        Parameters
+        ----------
+        other : Snapshots
+            The other store
+
+        Returns
+        -------
+        Snapshots
+            self
+        """
+        for uid, layout in other._layout.items():
+            self._layout.setdefault(uid, layout)
+        self.frames.extend(other.frames)
+        self._states.update(other._states)
+        return self
+
+
+class _Buffer(object):
+    """
+    A growable 1-d array, a full buffer doubles its capacity
+    """
+
+    def __init__(self, dtype: np.dtype, capacity: int = 64):
+        self._data: np.ndarray = np.zeros(capacity, dtype=dtype)
+        self.size: int = 0
+
+    def extend(self, values: np.ndarray) -> None:
+        stop = self.size + len(values)
+        if stop > len(self._data):
+            grown = np.zeros(max(2 * len(self._data), stop, 64), dtype=self._data.dtype)
+            grown[: self.size] = self._data[: self.size]
+            self._data = grown
+        self._data[self.size : stop] = values
+        self.size = stop
+
+    def append(self, value: Any) -> None:
+        if self.size == len(self._data):
+            self.extend([value])
+        else:
+            self._data[self.size] = value
+            self.size += 1
+
+    @property
+    def array(self) -> np.ndarray:
+        return self._data[: self.size]
+
+    @classmethod
+    def wrap(cls, array: np.ndarray) -> "_Buffer":
+        """
+        A full buffer of the array, it is not copied
+        """
+        buffer = cls(array.dtype, capacity=0)
+        buffer._data, buffer.size = array, len(array)
+        return buffer
+
+
+class FlipLog(Snapshots):
+    """
+    Flip log
+    ========
+
+    Example
+    -------
+    >>> import mcmc_statphys as mcsp
+    >>> f = mcsp.algorithm.Metropolis(mcsp.model.Ising(L=100))
+    >>> f.snapshots = mcsp.FlipLog(codec=f.snapshots.codec, keyframe_every=10000)
+    >>> uid = f.equil_sample(T=2.0, max_iter=100000)
+    >>> f.snapshots.state_at(uid, 54321)
+
+    Description
+    -----------
+
+    A snapshot store that keeps a keyframe every ``keyframe_every`` iterations and,
+    in between, only the (iter, site, value) events of the entries that changed
+    since the previous snapshot. Consecutive Metropolis states differ by at most
+    one spin and a rejected step by none, so a snapshot with every row costs
+    O(accepted flips) instead of O(N) per step. ``state_at`` decodes the nearest
+    keyframe at or before the iteration and replays the events up to it.
+
+    The site of an event is the flat index of an entry of the spin array, e.g.
+    one component of an XY spin. The "object" codec cannot be logged.
+    """
+
+    def __init__(self, codec: str = "raw", keyframe_every: int = 1000, capacity: int = 64):
+        """
+        initialize the log
+
+        Parameters
+        ----------
+        codec : str, optional
+            The codec of the keyframes, see Snapshots, by default "raw"
+        keyframe_every : int, optional
+            The number of iterations between two keyframes, by default 1000
+        capacity : int, optional
+            The initial number of keyframes of a run, by default 64
+
+        Raises
+        ------
+        ValueError
+            The codec is "object" or unknown, or keyframe_every is not positive.
+        """
+        if codec == "object":
+            raise ValueError("the object codec cannot be logged")
+        if keyframe_every < 1:
+            raise ValueError("keyframe_every must be a positive integer")
+        super().__init__(codec=codec, capacity=capacity)
+        self.keyframe_every: int = int(keyframe_every)
+        self._last: Dict[str, np.ndarray] = {}  # the flat spin of the latest snapshot
+        self._keyframe_iter: Dict[str, int] = {}
+        # per snapshot: iters, ends (the number of events up to it)
+        # per keyframe: keyrows (its snapshot), offsets (the number of events before it)
+        # per event: iter, site, value
+        self._logs: Dict[str, Dict[str, _Buffer]] = {}
+
+    def __contains__(self, uid: str) -> bool:
+        return uid in self._logs or uid in self._states
+
+    def __len__(self) -> int:
+        return sum(self.size(uid) for uid in self._logs)
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes of the keyframes and of the log"""
+        keyframes = sum(self.frames.column(uid, "spin").nbytes for uid in self.frames)
+        return keyframes + sum(buffer.array.nbytes for log in self._logs.values() for buffer in log.values())
+
+    def _value_dtype(self, uid: str) -> np.dtype:
+        """
+        The dtype of the values of the events, the smallest one of the codec
+        """
+        if self.codec == "bits":
+            return np.dtype(np.int8)
+        elif self.codec == "raw":
+            return self._layout[uid][1]
+        return np.dtype(self.codec)
+
+    def add(self, uid: str, iter: int, spin: Any) -> None:
+        """
+        Log one snapshot of the run, a keyframe or the changed entries
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        iter : int
+            The iteration of the last row of the run
+        spin : Any
+            The spin of the model
+        """
+        flat = np.asarray(spin).reshape(-1)
+        last = self._last.get(uid)
+        if last is None:
+            self._layout[uid] = (np.shape(spin), np.asarray(spin).dtype)
+            site_dtype = np.int32 if flat.size < 2**31 else np.int64
+            dtypes = [np.int64] * 5 + [site_dtype, self._value_dtype(uid)]
+            self._logs[uid] = {name: _Buffer(dtype) for name, dtype in zip(_LOG_NAMES, dtypes)}
+        log = self._logs[uid]
+        if last is None or iter - self._keyframe_iter[uid] >= self.keyframe_every:
+            super().add(uid, iter, spin)
+            self._last[uid] = flat.copy()
+            self._keyframe_iter[uid] = iter
+            log["keyrows"].append(log["iters"].size)
+            log["offsets"].append(log["site"].size)
+        else:
+            changed = np.flatnonzero(flat != last)
+            if len(changed) > 0:
+                last[changed] = flat[changed]
+                log["iter"].extend(np.full(len(changed), iter))
+                log["site"].extend(changed)
+                log["value"].extend(flat[changed])
+        log["iters"].append(iter)
+        log["ends"].append(log["site"].size)
+
+    def size(self, uid: str) -> int:
+        """
+        The number of snapshots of the run, keyframes included
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        int
+            The number of snapshots, 0 for an unknown uid
+        """
+        return self._logs[uid]["iters"].size if uid in self._logs else 0
+
+    def iters(self, uid: str) -> np.ndarray:
+        """
+        The iteration label of every snapshot of the run
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        np.ndarray
+            The iterations, non-decreasing
+        """
+        return self._logs[uid]["iters"].array
+
+    def uids(self) -> List[str]:
+        return list(self._logs)
+
+    def state(self, uid: str) -> Any:
+        """
+        The latest state of the run, the kept state or else the last snapshot
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        Any
+            A copy of the spin
+
+        Raises
+        ------
+        KeyError
+            Neither a state nor a snapshot of the run.
+        """
+        if uid in self._states:
+            return copy.deepcopy(self._states[uid])
+        if uid not in self._last:
+            raise KeyError(uid)
+        shape, dtype = self._layout[uid]
+        return self._last[uid].astype(dtype).reshape(shape)
+
+    def state_at(self, uid: str, iter: int) -> np.ndarray:
+        """
+        Reconstruct the spin of the last snapshot at or before the iteration
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        iter : int
+            The iteration of a row of the run
+
+        Returns
+        -------
+        np.ndarray
+            The spin
+
+        Raises
+        ------
+        KeyError
+            No snapshot of the run at or before the iteration.
+        """
+        log = self._logs[uid]
+        row = np.searchsorted(log["iters"].array, iter, side="right") - 1
+        if row < 0:
+            raise KeyError((uid, iter))
+        index = np.searchsorted(log["keyrows"].array, row, side="right") - 1
+        start, stop = log["offsets"].array[index], log["ends"].array[row]
+        shape, dtype = self._layout[uid]
+        flat = self.decode(uid, self.frames.column(uid, "spin")[index]).reshape(-1)
+        # a site may change several times, the last event wins
+        sites, first = np.unique(log["site"].array[start:stop][::-1], return_index=True)
+        flat[sites] = log["value"].array[start:stop][::-1][first]
+        return flat.reshape(shape)
+
+    def get(self, uid: str, iter: int) -> np.ndarray:
+        """
+        The last snapshot taken at or before the iteration, see state_at
+        """
+        return self.state_at(uid, iter)
+
+    def spins(self, uid: str, t0: int = 0) -> np.ndarray:
+        """
+        Every snapshot of the run, the events are replayed from each keyframe
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        t0 : int, optional
+            The first snapshot, by default 0
+
+        Returns
+        -------
+        np.ndarray
+            The spins with a leading snapshot axis
+        """
+        log = self._logs[uid]
+        shape, dtype = self._layout[uid]
+        sites, values = log["site"].array, log["value"].array
+        keyframes = dict(zip(log["keyrows"].array.tolist(), self.frames.column(uid, "spin")))
+        spins = np.empty((log["iters"].size,) + shape, dtype=dtype)
+        start = 0
+        for row, stop in enumerate(log["ends"].array.tolist()):
+            if row in keyframes:
+                flat = self.decode(uid, keyframes[row]).reshape(-1)
+            # the entries logged for one snapshot are distinct
+            flat[sites[start:stop]] = values[start:stop]
+            spins[row] = flat.reshape(shape)
+            start = stop
+        return spins[t0:]
+
+    def arrays(self, uid: str) -> Dict[str, np.ndarray]:
+        """
+        The stored arrays of the run, the keyframes, the log and the latest state
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            name -> array, see attach
+        """
+        arrays = super().arrays(uid)
+        if uid not in self._logs:
+            return arrays
+        # the keyframes, renamed apart from the events
+        arrays["keyframe_iter"], arrays["keyframe_spin"] = arrays.pop("iter"), arrays.pop("spin")
+        arrays.update({name: buffer.array for name, buffer in self._logs[uid].items()})
+        arrays["last"] = self._last[uid]
+        return arrays
+
+    def attach(self, uid: str, arrays: Dict[str, np.ndarray], shape: Tuple[int, ...], dtype: np.dtype) -> None:
+        """
+        Register the stored arrays of a new run, they are not copied
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        arrays : Dict[str, np.ndarray]
+            name -> array, as returned by arrays
+        shape : Tuple[int, ...]
+            The shape of the spin
+        dtype : np.dtype
+            The dtype of the spin
+        """
+        arrays = dict(arrays)
+        if "last" not in arrays:
+            return super().attach(uid, arrays, shape, dtype)
+        # the latest snapshot is written to, it is the only copy
+        self._last[uid] = np.array(arrays.pop("last"))
+        self._logs[uid] = {name: _Buffer.wrap(arrays.pop(name)) for name in _LOG_NAMES}
+        arrays["iter"], arrays["spin"] = arrays.pop("keyframe_iter"), arrays.pop("keyframe_spin")
+        super().attach(uid, arrays, shape, dtype)
+        keyframe_iters = self.frames.column(uid, "iter")
+        self._keyframe_iter[uid] = int(keyframe_iters[-1])
+
+    def compact(self) -> "FlipLog":
+        """
+        An empty log that keeps the latest state of every run, the next snapshot is a keyframe
+
+        Returns
+        -------
+        FlipLog
+            The compact log, e.g. in a checkpoint, see save_checkpoint
+        """
+        store = super().compact()
+        store._last, store._keyframe_iter, store._logs = {}, {}, {}
+        return store
+
+    def extend(self, other: "FlipLog") -> "FlipLog":
+        """
+        Append every snapshot and state of another log
+
+        Parameters
+        ----------
+        other : FlipLog
+            The other log, its uids are not in this one
+
+        Returns
+        -------
+        FlipLog
+            self
+        """
+        super().extend(other)
+        for uid in other._logs:
+            self._logs[uid] = copy.deepcopy(other._logs[uid])
+            self._last[uid] = other._last[uid].copy()
+            self._keyframe_iter[uid] = other._keyframe_iter[uid]
+        return self
@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+"""
+@文件    :static.py
+@时间    :2026/10/18 01:03:26
+@作者    :結凪
+"""
+
+import hashlib
+from typing import Any, Dict, Iterator, List, Tuple
+import numpy as np
+
+__all__ = ["StaticStore", "content_key", "freeze"]
+
+
+def content_key(array: np.ndarray) -> str:
+    """
+    The key of an array, a hash of its dtype, shape and content
+
+    Parameters
+    ----------
+    array : np.ndarray
+        The array
+
+    Returns
+    -------
+    str
+        The hex digest
+    """
+    array = np.ascontiguousarray(array)
+    digest = hashlib.sha1()
+    digest.update("{dtype}{shape}".format(dtype=array.dtype.str, shape=array.shape).encode())
+    digest.update(array.view(np.uint8).reshape(-1) if array.size else b"")
+    return digest.hexdigest()
+
+
+def freeze(array: np.ndarray) -> np.ndarray:
+    """
+    Mark a quenched array, e.g. a random field or couplings, read-only
+
+    A frozen array is shared by the deep copies of its model and stored once in
+    a StaticStore.
+
+    Parameters
+    ----------
+    array : np.ndarray
+        The array
+
+    Returns
+    -------
+    np.ndarray
+        The array
+    """
+    array.flags.writeable = False
+    return array
+
+
+class StaticStore(object):
+    """
+    Static store
+    ============
+
+    Example
+    -------
+    >>> import mcmc_statphys as mcsp
+    >>> f = mcsp.algorithm.Metropolis(mcsp.model.RFIsing(L=10))
+    >>> uid = f.equil_sample(T=2.0, max_iter=100)
+    >>> f.trajectory.static.of(uid)["H"]
+
+    Description
+    -----------
+
+    Holds the static values of the runs, e.g. the random field of RFIsing. An array
+    is stored once under its content key, see content_key, whichever run and row
+    refer to it. The rows keep the key, a string, instead of the array. Each run
+    binds a column to the key of its value, so ``of(uid)`` returns the realization
+    of the disorder of the run.
+
+    The key of a frozen array, see freeze, is computed on its first row only and
+    the array itself is stored, it is not copied.
+    """
+
+    def __init__(self):
+        self._blobs: Dict[str, np.ndarray] = {}
+        self._runs: Dict[str, Dict[str, str]] = {}
+        self._frozen: Dict[int, Tuple[np.ndarray, str]] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._blobs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._blobs)
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    def __repr__(self) -> str:
+        return "StaticStore(blobs={blobs}, runs={runs})".format(blobs=len(self._blobs), runs=len(self._runs))
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes of the stored arrays"""
+        return sum(blob.nbytes for blob in self._blobs.values())
+
+    def put(self, array: np.ndarray) -> str:
+        """
+        Store an array once
+
+        Parameters
+        ----------
+        array : np.ndarray
+            The array
+
+        Returns
+        -------
+        str
+            The content key
+        """
+        if not array.flags.writeable:
+            cached = self._frozen.get(id(array))
+            if cached is not None and cached[0] is array:
+                return cached[1]
+        key = content_key(array)
+        if key not in self._blobs:
+            self._blobs[key] = array if not array.flags.writeable else freeze(np.array(array))
+        if not array.flags.writeable:
+            self._frozen[id(array)] = (array, key)
+        return key
+
+    def ref(self, uid: str, column: str, value: Any) -> Any:
+        """
+        The value of a column of a row, an array is replaced by its key
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        column : str
+            column, e.g. "H"
+        value : Any
+            The value
+
+        Returns
+        -------
+        Any
+            The key of an array of more than one entry, else the value
+        """
+        if not isinstance(value, np.ndarray) or value.size <= 1 or value.dtype == object:
+            return value
+        key = self.put(value)
+        self._runs.setdefault(uid, {})[column] = key
+        return key
+
+    def get(self, key: str) -> np.ndarray:
+        """
+        The array of a key
+
+        Parameters
+        ----------
+        key : str
+            The content key
+
+        Returns
+        -------
+        np.ndarray
+            The array, read-only
+
+        Raises
+        ------
+        KeyError
+            Unknown key.
+        """
+        return self._blobs[key]
+
+    def bindings(self, uid: str) -> Dict[str, str]:
+        """
+        The keys of the static columns of the run
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        Dict[str, str]
+            column -> the key of its latest value
+        """
+        return dict(self._runs.get(uid, {}))
+
+    def of(self, uid: str) -> Dict[str, np.ndarray]:
+        """
+        The static values of the run
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            column -> its latest value
+        """
+        return {column: self._blobs[key] for column, key in self._runs.get(uid, {}).items()}
+
+    def uids(self) -> List[str]:
+        """
+        The uids with static values
+
+        Returns
+        -------
+        List[str]
+            uid list
+        """
+        return list(self._runs)
+
+    def attach(self, key: str, array: np.ndarray) -> None:
+        """
+        Register the array of a key, e.g. read from an archive, it is not copied
+
+        Parameters
+        ----------
+        key : str
+            The content key
+        array : np.ndarray
+            The array, may be memory-mapped
+        """
+        self._blobs.setdefault(key, array)
+
+    def bind(self, uid: str, column: str, key: str) -> None:
+        """
+        Bind a column of the run to a stored key
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        column : str
+            column
+        key : str
+            The content key
+
+        Raises
+        ------
+        KeyError
+            Unknown key.
+        """
+        if key not in self._blobs:
+            raise KeyError(key)
+        self._runs.setdefault(uid, {})[column] = key
+
+    def extend(self, other: "StaticStore") -> "StaticStore":
+        """
+        Add the arrays and the bindings of another store
+
+        Parameters
+        ----------
+        other : StaticStore
+            The other store
+
+        Returns
+        -------
+        StaticStore
+            self
+        """
+        for key, blob in other._blobs.items():
+            self._blobs.setdefault(key, blob)
+        for uid, bindings in other._runs.items():
+            self._runs.setdefault(uid, {}).update(bindings)
+        return self
@@ -0,0 +1,775 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+"""
+@文件    :stats.py
+@时间    :2026/10/18 02:17:45
+@作者    :結凪
+"""
+
+import copy
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
+import numpy as np
+import pandas as pd
+from scipy import fft
+from scipy.special import logsumexp
+
+__all__ = [
+    "acf",
+    "integrated_time",
+    "autocorrelation_table",
+    "standard_error",
+    "binning",
+    "jackknife",
+    "moment_series",
+    "derived",
+    "boltzmann_weights",
+    "reweight",
+    "Moments",
+    "MOMENTS",
+    "DERIVED",
+]
+
+MOMENTS = ("E", "E2", "M", "|M|", "M2", "M4")
+
+
+def acf(series: np.ndarray) -> np.ndarray:
+    """
+    Normalized autocorrelation function of every lag, by FFT
+
+    The series is zero-padded to a fast length of at least 2n, so the circular
+    correlation of the FFT equals the linear one. The cost is O(n log n) instead
+    of the O(n^2) of a direct sum over every lag.
+
+    Parameters
+    ----------
+    series : np.ndarray
+        The series, (n,) or (n, k) for k columns at once
+
+    Returns
+    -------
+    np.ndarray
+        rho(t) for t = 0 ... n - 1, the shape of the series, rho(0) = 1. A constant
+        column has rho = 0 after lag 0.
+    """
+    x = np.asarray(series, dtype=np.float64)
+    n = len(x)
+    # a constant column, e.g. T, would otherwise correlate its rounding errors
+    x = np.where(np.all(x == x[:1], axis=0), 0, x - np.mean(x, axis=0))
+    size = fft.next_fast_len(2 * n)
+    spectrum = fft.rfft(x, n=size, axis=0)
+    covariance = fft.irfft(spectrum * np.conj(spectrum), n=size, axis=0)[:n]
+    variance = covariance[0]
+    rho = covariance / np.where(variance > 0, variance, 1)
+    rho[0] = 1
+    return rho
+
+
+def integrated_time(rho: np.ndarray, n: int = None, c: float = 6.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Integrated autocorrelation time with Sokal's automatic window
+
+    tau_int(M) = 1/2 + sum_{t=1}^{M} rho(t), the window M is the first M with
+    M >= c * tau_int(M). The statistical error of tau_int is
+    tau_int * sqrt(2 (2M + 1) / n) (Madras and Sokal).
+
+    Parameters
+    ----------
+    rho : np.ndarray
+        The autocorrelation function, (n,) or (n, k), see acf
+    n : int, optional
+        The length of the series, by default len(rho)
+    c : float, optional
+        The window factor, by default 6.0, larger for slowly decaying rho
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        tau_int, its error and the window M, one per column. With
+        tau_int = 1/2 the samples are independent, and the variance of the mean
+        is 2 tau_int var / n.
+    """
+    rho = np.asarray(rho, dtype=np.float64)
+    if n is None:
+        n = len(rho)
+    taus = np.cumsum(rho, axis=0) - 0.5  # tau_int(M) for every M
+    lags = np.arange(len(rho)).reshape((-1,) + (1,) * (rho.ndim - 1))
+    inside = lags < c * taus
+    # the first M with M >= c * tau_int(M), else the last lag
+    window = np.where(np.any(~inside, axis=0), np.argmin(inside, axis=0), len(rho) - 1)
+    tau = np.take_along_axis(taus, np.expand_dims(window, 0), axis=0)[0]
+    tau = np.maximum(tau, 0.5)
+    error = tau * np.sqrt(2 * (2 * window + 1) / n)
+    return tau, error, window
+
+
+def autocorrelation_table(data: Dict[str, np.ndarray], c: float = 6.0) -> pd.DataFrame:
+    """
+    tau_int, its error, the window and the effective sample size of every column
+
+    The scalar columns are stacked and their autocorrelation functions are
+    computed in one FFT.
+
+    Parameters
+    ----------
+    data : Dict[str, np.ndarray]
+        column -> the series, the same length; columns that are not numeric or not
+        scalar are skipped
+    c : float, optional
+        The window factor, by default 6.0
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed by column, with tau, tau_err, window and ess = n / (2 tau)
+    """
+    columns: List[str] = []
+    series: List[np.ndarray] = []
+    for column, values in data.items():
+        values = np.asarray(values)
+        if values.ndim == 1 and values.dtype.kind in "biuf" and len(values) > 1:
+            columns.append(column)
+            series.append(values.astype(np.float64))
+    table = pd.DataFrame(columns=["tau", "tau_err", "window", "ess"], index=pd.Index(columns, name="column"))
+    if not columns:
+        return table
+    stacked = np.stack(series, axis=1)
+    n = len(stacked)
+    tau, error, window = integrated_time(acf(stacked), n=n, c=c)
+    table["tau"], table["tau_err"], table["window"], table["ess"] = tau, error, window, n / (2 * tau)
+    return table.astype({"tau": float, "tau_err": float, "window": int, "ess": float})
+
+
+def standard_error(series: np.ndarray, c: float = 6.0) -> Union[float, np.ndarray]:
+    """
+    Standard error of the mean of a correlated series, sqrt(var / ess)
+
+    Parameters
+    ----------
+    series : np.ndarray
+        The series, (n,) or (n, k)
+    c : float, optional
+        The window factor of integrated_time, by default 6.0
+
+    Returns
+    -------
+    Union[float, np.ndarray]
+        The standard error, one per column
+    """
+    x = np.asarray(series, dtype=np.float64)
+    n = len(x)
+    tau, _, _ = integrated_time(acf(x), n=n, c=c)
+    return np.sqrt(np.var(x, axis=0) * 2 * tau / n)
+
+
+def binning(series: np.ndarray, min_bins: int = 32) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Standard error of the mean at every logarithmic bin level
+
+    Level l averages bins of 2^l consecutive rows, each level is built from the
+    previous one by averaging pairs, so all levels together cost O(n). The error
+    grows with the bin size and reaches a plateau, the error of the correlated
+    mean, once the bins are longer than the autocorrelation time; then
+    tau_int = (error_l / error_0)^2 / 2.
+
+    Parameters
+    ----------
+    series : np.ndarray
+        The series, (n,) or (n, k) for k columns at once
+    min_bins : int, optional
+        The last level keeps at least so many bins, by default 32
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The bin sizes, (levels,), and the errors, (levels,) or (levels, k)
+    """
+    x = np.asarray(series, dtype=np.float64)
+    sizes: List[int] = []
+    errors: List[np.ndarray] = []
+    size = 1
+    while len(x) >= max(min_bins, 2):
+        sizes.append(size)
+        errors.append(np.std(x, axis=0, ddof=1) / np.sqrt(len(x)))
+        half = len(x) // 2
+        x = 0.5 * (x[: 2 * half : 2] + x[1 : 2 * half : 2])
+        size *= 2
+    return np.array(sizes, dtype=np.int64), np.array(errors).reshape((len(sizes),) + x.shape[1:])
+
+
+def _jackknife(func: Callable, sums: List[np.ndarray], size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Jackknife of func over the block sums of its arguments, blocks of size rows
+    """
+    blocks = len(sums[0])
+    if blocks < 2:
+        raise ValueError("the jackknife needs at least 2 blocks")
+    totals = [np.sum(block, axis=0) for block in sums]
+    full = np.asarray(func(*[total / (blocks * size) for total in totals]))
+    # the means without one block, all blocks at once along the first axis
+    leave = np.asarray(func(*[(total - block) / ((blocks - 1) * size) for total, block in zip(totals, sums)]))
+    mean = np.mean(leave, axis=0)
+    estimate = blocks * full - (blocks - 1) * mean  # bias-corrected
+    error = np.sqrt((blocks - 1) / blocks * np.sum((leave - mean) ** 2, axis=0))
+    return estimate, error
+
+
+def jackknife(func: Callable, *series: np.ndarray, blocks: int = 32) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Jackknife estimate and error of a function of means, e.g. the Binder cumulant
+
+    The rows are cut into blocks, the function is evaluated on the means without
+    each block, all blocks at once, so func must accept arrays whose first axis is
+    the block. The blocks should be longer than the autocorrelation time. The
+    first n % blocks rows are dropped.
+
+    Parameters
+    ----------
+    func : Callable
+        f(mean_1, mean_2, ...), e.g. lambda m2, m4: 1 - m4 / (3 * m2**2)
+    *series : np.ndarray
+        The series whose means are the arguments, the same length n
+    blocks : int, optional
+        The number of blocks, by default 32
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The bias-corrected estimate and its standard error
+
+    Raises
+    ------
+    ValueError
+        Fewer rows than blocks.
+    """
+    arrays = [np.asarray(x, dtype=np.float64) for x in series]
+    n = len(arrays[0])
+    size = n // blocks
+    if size == 0:
+        raise ValueError("{n} rows can not be cut into {blocks} blocks".format(n=n, blocks=blocks))
+    start = n - blocks * size
+    sums = [x[start:].reshape((blocks, size) + x.shape[1:]).sum(axis=1) for x in arrays]
+    return _jackknife(func, sums, size)
+
+
+def moment_series(energy: np.ndarray, magnetization: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    The series of E, E^2, M, |M|, M^2 and M^4, see MOMENTS
+
+    A magnetization with more entries than the energy, e.g. the components of a
+    vector spin, is replaced by its norm.
+
+    Parameters
+    ----------
+    energy : np.ndarray
+        The total energy, a value or a series
+    magnetization : np.ndarray
+        The total magnetization, a value or a series
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        moment -> its value or series, float64
+    """
+    energy = np.asarray(energy, dtype=np.float64)
+    magnetization = np.asarray(magnetization, dtype=np.float64)
+    if magnetization.size > energy.size:
+        magnetization = np.linalg.norm(magnetization.reshape(energy.shape + (-1,)), axis=-1)
+    m2 = magnetization * magnetization
+    return {
+        "E": energy,
+        "E2": energy * energy,
+        "M": magnetization,
+        "|M|": np.abs(magnetization),
+        "M2": m2,
+        "M4": m2 * m2,
+    }
+
+
+DERIVED = ("specific_heat", "susceptibility", "binder")
+
+
+def derived(means: Dict[str, np.ndarray], N: int, T: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    The specific heat, the susceptibility and the Binder cumulant from the means of
+    the moments, see MOMENTS
+
+    Parameters
+    ----------
+    means : Dict[str, np.ndarray]
+        moment -> its mean, E, E2, |M|, M2 and M4 are used when present
+    N : int
+        The number of sites
+    T : np.ndarray
+        The temperature of the means
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        specific_heat, susceptibility and binder, those whose moments are present
+    """
+    T = np.asarray(T, dtype=np.float64)
+    values: Dict[str, np.ndarray] = {}
+    if "E" in means and "E2" in means:
+        values["specific_heat"] = (means["E2"] - means["E"] ** 2) / (N * T**2)
+    if "|M|" in means and "M2" in means:
+        values["susceptibility"] = (means["M2"] - means["|M|"] ** 2) / (N * T)
+    if "M2" in means and "M4" in means:
+        values["binder"] = 1 - means["M4"] / (3 * means["M2"] ** 2)
+    return values
+
+
+def boltzmann_weights(
+    energy: np.ndarray, log_bias: np.ndarray, beta: np.ndarray, chunk: int = 2**22
+) -> Iterator[Tuple[slice, np.ndarray, np.ndarray]]:
+    """
+    The normalized weights p_i(beta) of pooled rows, p_i ~ exp(log_bias_i - beta E_i)
+
+    The weights of every beta are normalized with log-sum-exp. The betas are
+    processed in chunks of at most ``chunk`` weights at once.
+
+    Parameters
+    ----------
+    energy : np.ndarray
+        The energy of every row, (n,)
+    log_bias : np.ndarray
+        The log weight of every row at beta = 0, (n,), e.g. E / T of a canonical run
+    beta : np.ndarray
+        The inverse temperatures, (m,)
+    chunk : int, optional
+        The most weights held at once, by default 2**22
+
+    Returns
+    -------
+    Iterator[Tuple[slice, np.ndarray, np.ndarray]]
+        The betas of the chunk, their weights, (chunk, n), and log normalizations
+    """
+    beta = np.atleast_1d(np.asarray(beta, dtype=np.float64))
+    step = max(1, chunk // max(len(energy), 1))
+    for start in range(0, len(beta), step):
+        rows = slice(start, start + step)
+        log_w = log_bias - beta[rows, None] * energy
+        log_z = logsumexp(log_w, axis=1, keepdims=True)
+        yield rows, np.exp(log_w - log_z), log_z[:, 0]
+
+
+def reweight(
+    energy: np.ndarray, T: float, T_new: np.ndarray, series: Dict[str, np.ndarray], chunk: int = 2**22
+) -> pd.DataFrame:
+    """
+    Single-histogram (Ferrenberg-Swendsen) reweighting of a canonical run to other temperatures
+
+    <O>(T') = sum_i O_i w_i / sum_i w_i with w_i = exp(-(1/T' - 1/T) E_i). The
+    weights of every new temperature are normalized with log-sum-exp, the
+    temperatures are processed in chunks of at most ``chunk`` weights at once.
+
+    The result is reliable while the reweighted energy histogram overlaps the
+    sampled one. The overlap is sum_E min(p(E), p'(E)) over the energy levels, 1 at
+    T, and ess = 1 / sum_i p_i^2 is the Kish effective number of rows.
+
+    Parameters
+    ----------
+    energy : np.ndarray
+        The total energy of every row, (n,)
+    T : float
+        The temperature of the run
+    T_new : np.ndarray
+        The new temperatures, (m,)
+    series : Dict[str, np.ndarray]
+        name -> the series to average, (n,)
+    chunk : int, optional
+        The most weights held at once, by default 2**22
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed by T, the mean of every series, overlap and ess
+    """
+    energy = np.asarray(energy, dtype=np.float64)
+    T_new = np.atleast_1d(np.asarray(T_new, dtype=np.float64))
+    n = len(energy)
+    levels, level = np.unique(energy, return_inverse=True)
+    order = np.argsort(level, kind="stable")
+    starts = np.searchsorted(level[order], np.arange(len(levels)))
+    sampled = np.bincount(level, minlength=len(levels)) / n
+    names = list(series)
+    stacked = np.stack([np.asarray(series[name], dtype=np.float64) for name in names], axis=1)
+    shift = energy - np.mean(energy)  # only the differences of the energies matter
+    means = np.empty((len(T_new), len(names)))
+    overlap = np.empty(len(T_new))
+    ess = np.empty(len(T_new))
+    for rows, p, _ in boltzmann_weights(shift, shift / T, 1 / T_new, chunk=chunk):
+        means[rows] = p @ stacked
+        reweighted = np.add.reduceat(p[:, order], starts, axis=1)
+        overlap[rows] = np.sum(np.minimum(reweighted, sampled), axis=1)
+        ess[rows] = 1 / np.sum(p * p, axis=1)
+    table = pd.DataFrame(means, index=pd.Index(T_new, name="T"), columns=names)
+    table["overlap"], table["ess"] = overlap, ess
+    return table
+
+
+def _pool(n: int, mean: np.ndarray, m2: np.ndarray, m: int, other_mean: np.ndarray, other_m2: np.ndarray):
+    """
+    The mean and the squared deviations of two pooled samples of n and m rows
+    """
+    delta = other_mean - mean
+    return mean + delta * m / (n + m), m2 + other_m2 + delta**2 * n * m / (n + m)
+
+
+class Moments(object):
+    """
+    Moments
+    =======
+
+    Example
+    -------
+    >>> import mcmc_statphys as mcsp
+    >>> f = mcsp.algorithm.Metropolis(mcsp.model.Ising(L=10))
+    >>> f.burn_in = 100
+    >>> uid = f.equil_sample(T=2.0, max_iter=1000)
+    >>> f.moments[uid]
+    >>> f.specific_heat(uid), f.susceptibility(uid), f.binder(uid)
+
+    Description
+    -----------
+
+    Streaming moments of the energy E and the magnetization M of one run, updated
+    with every recorded row, so the specific heat, the susceptibility and the Binder
+    cumulant are O(1) queries that need neither the rows nor a second pass.
+
+    The means and the squared deviations of E, M and |M| are updated by Welford's
+    algorithm, the variances are not the difference of two large sums. The sums of
+    M^2 and M^4 are Kahan-compensated. The first ``burn_in`` rows are skipped.
+
+    For the error bars the moments of MOMENTS are also kept in logarithmic bin
+    levels, see binning, and in at most 2 * ``blocks`` blocks whose size doubles as
+    the run grows, see jackknife. Both take O(log n + blocks) memory.
+
+    The energy and the magnetization may be arrays, e.g. one per replica, the
+    moments are elementwise. A magnetization with more entries than the energy, e.g.
+    the components of a vector spin, is replaced by its norm.
+    """
+
+    def __init__(self, burn_in: int = 0, blocks: int = 32):
+        """
+        Parameters
+        ----------
+        burn_in : int, optional
+            The number of rows skipped before accumulating, by default 0
+        blocks : int, optional
+            The least number of jackknife blocks once there are enough rows, by default 32
+
+        Raises
+        ------
+        ValueError
+            burn_in is negative or blocks is less than 2.
+        """
+        if burn_in < 0:
+            raise ValueError("burn_in must be a non-negative integer")
+        if blocks < 2:
+            raise ValueError("blocks must be at least 2")
+        self.burn_in: int = burn_in
+        self.blocks: int = blocks
+        self.seen: int = 0  # the rows pushed, with the skipped ones
+        self.n: int = 0  # the rows accumulated
+        self.T = None  # the temperature of the latest row
+        self._mean: Union[np.ndarray, None] = None  # E, M, |M|
+        self._m2: Union[np.ndarray, None] = None  # the sums of squared deviations of E, M, |M|
+        self._sum: Union[np.ndarray, None] = None  # M^2, M^4
+        self._compensation: Union[np.ndarray, None] = None
+        # bin level l: the number, mean and squared deviations of its bins of 2^l rows,
+        # and the first half of its next bin
+        self._level_n: List[int] = []
+        self._level_mean: List[np.ndarray] = []
+        self._level_m2: List[np.ndarray] = []
+        self._level_carry: List[Union[np.ndarray, None]] = []
+        # the sums of the full jackknife blocks of block_size rows and of the current one
+        self._block_size: int = 1
+        self._block_sums: List[np.ndarray] = []
+        self._block: Union[np.ndarray, None] = None
+        self._block_fill: int = 0
+
+    def __repr__(self) -> str:
+        return "Moments(n={n}, burn_in={burn_in})".format(n=self.n, burn_in=self.burn_in)
+
+    def push(self, energy: Union[float, np.ndarray], magnetization: Union[float, np.ndarray], T: Any = None) -> None:
+        """
+        Accumulate one row
+
+        Parameters
+        ----------
+        energy : Union[float, np.ndarray]
+            The total energy
+        magnetization : Union[float, np.ndarray]
+            The total magnetization
+        T : Any, optional
+            The temperature of the row, by default None
+        """
+        self.seen += 1
+        if self.seen <= self.burn_in:
+            return
+        moments = moment_series(energy, magnetization)
+        v = np.stack([moments[name] for name in MOMENTS])
+        x, y = v[[0, 2, 3]], v[[4, 5]]
+        if self.n == 0:
+            self._mean = np.zeros_like(x)
+            self._m2 = np.zeros_like(x)
+            self._sum = np.zeros_like(y)
+            self._compensation = np.zeros_like(y)
+        self.n += 1
+        self.T = T
+        delta = x - self._mean
+        self._mean += delta / self.n
+        self._m2 += delta * (x - self._mean)
+        y = y - self._compensation
+        total = self._sum + y
+        self._compensation = (total - self._sum) - y
+        self._sum = total
+        self._push_levels(v)
+        self._push_block(v)
+
+    def _push_levels(self, v: np.ndarray) -> None:
+        level = 0
+        while True:
+            if level == len(self._level_n):
+                self._level_n.append(0)
+                self._level_mean.append(np.zeros_like(v))
+                self._level_m2.append(np.zeros_like(v))
+                self._level_carry.append(None)
+            self._level_n[level] += 1
+            delta = v - self._level_mean[level]
+            self._level_mean[level] += delta / self._level_n[level]
+            self._level_m2[level] += delta * (v - self._level_mean[level])
+            carry = self._level_carry[level]
+            if carry is None:
+                self._level_carry[level] = v
+                return
+            self._level_carry[level] = None
+            v = 0.5 * (carry + v)
+            level += 1
+
+    def _push_block(self, v: np.ndarray) -> None:
+        self._block = v if self._block_fill == 0 else self._block + v
+        self._block_fill += 1
+        if self._block_fill < self._block_size:
+            return
+        self._block_sums.append(self._block)
+        self._block, self._block_fill = None, 0
+        if len(self._block_sums) == 2 * self.blocks:
+            # merge pairs, the blocks double
+            self._block_sums = [a + b for a, b in zip(self._block_sums[::2], self._block_sums[1::2])]
+            self._block_size *= 2
+
+    def merge(self, other: "Moments") -> "Moments":
+        """
+        Add the rows of another run of the same ensemble (Chan et al.)
+
+        The bin levels are pooled level by level, the jackknife blocks are brought
+        to the larger block size, the incomplete bins and blocks are dropped.
+
+        Parameters
+        ----------
+        other : Moments
+            The other moments
+
+        Returns
+        -------
+        Moments
+            self
+        """
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            burn_in, seen, blocks = self.burn_in, self.seen, self.blocks
+            self.__dict__.update(copy.deepcopy(other.__dict__))
+            self.burn_in, self.seen, self.blocks = burn_in, seen + other.seen, blocks
+            return self
+        self._mean, self._m2 = _pool(self.n, self._mean, self._m2, other.n, other._mean, other._m2)
+        self._sum = self._sum + other._sum
+        self._compensation = self._compensation + other._compensation
+        self.n += other.n
+        self.seen += other.seen
+        for level in range(min(len(self._level_n), len(other._level_n))):
+            n, m = self._level_n[level], other._level_n[level]
+            self._level_mean[level], self._level_m2[level] = _pool(
+                n, self._level_mean[level], self._level_m2[level], m, other._level_mean[level], other._level_m2[level]
+            )
+            self._level_n[level] = n + m
+            self._level_carry[level] = None
+        del self._level_n[len(other._level_n) :], self._level_mean[len(other._level_n) :]
+        del self._level_m2[len(other._level_n) :], self._level_carry[len(other._level_n) :]
+        mine, theirs, size = self._block_sums, list(other._block_sums), other._block_size
+        while self._block_size < size:
+            mine = [a + b for a, b in zip(mine[::2], mine[1::2])]
+            self._block_size *= 2
+        while size < self._block_size:
+            theirs = [a + b for a, b in zip(theirs[::2], theirs[1::2])]
+            size *= 2
+        self._block_sums = mine + theirs
+        while len(self._block_sums) >= 2 * self.blocks:
+            self._block_sums = [a + b for a, b in zip(self._block_sums[::2], self._block_sums[1::2])]
+            self._block_size *= 2
+        self._block, self._block_fill = None, 0
+        return self
+
+    def binning(self, names: List[str] = None, min_bins: int = 32) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Standard error of the mean of the moments at every bin level, see binning
+
+        Parameters
+        ----------
+        names : List[str], optional
+            The moments, by default MOMENTS
+        min_bins : int, optional
+            The last level keeps at least so many bins, by default 32
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The bin sizes, (levels,), and the errors, (levels, len(names)) or
+            (levels, len(names), ...) for array moments
+        """
+        index = [MOMENTS.index(name) for name in (MOMENTS if names is None else names)]
+        levels = [level for level, n in enumerate(self._level_n) if n >= max(min_bins, 2)]
+        errors = []
+        for level in levels:
+            n = self._level_n[level]
+            errors.append(np.sqrt(self._level_m2[level][index] / ((n - 1) * n)))
+        shape = (len(levels), len(index)) + (() if self._mean is None else self._mean.shape[1:])
+        return np.array([2**level for level in levels], dtype=np.int64), np.array(errors).reshape(shape)
+
+    def jackknife(self, func: Callable, names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Jackknife estimate and error of a function of the means of the moments
+
+        Uses the full blocks only, see jackknife.
+
+        Parameters
+        ----------
+        func : Callable
+            f(mean_1, mean_2, ...), the means of names in order, e.g.
+            lambda m2, m4: 1 - m4 / (3 * m2**2) for names ["M2", "M4"]
+        names : List[str]
+            The moments, see MOMENTS
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The bias-corrected estimate and its standard error
+
+        Raises
+        ------
+        ValueError
+            Fewer than 2 full blocks.
+        """
+        if len(self._block_sums) < 2:
+            raise ValueError("the jackknife needs at least 2 full blocks")
+        sums = np.stack(self._block_sums)
+        return _jackknife(func, [sums[:, MOMENTS.index(name)] for name in names], self._block_size)
+
+    def mean(self, name: str) -> Union[float, np.ndarray]:
+        """
+        The mean of a moment
+
+        Parameters
+        ----------
+        name : str
+            "E", "E2", "M", "|M|", "M2" or "M4"
+
+        Returns
+        -------
+        Union[float, np.ndarray]
+            The mean, nan before the first accumulated row
+
+        Raises
+        ------
+        KeyError
+            Unknown moment.
+        """
+        if name not in ("E", "E2", "M", "|M|", "M2", "M4"):
+            raise KeyError(name)
+        if self.n == 0:
+            return np.nan
+        if name == "E":
+            return self._mean[0]
+        elif name == "E2":
+            return self._m2[0] / self.n + self._mean[0] ** 2
+        elif name == "M":
+            return self._mean[1]
+        elif name == "|M|":
+            return self._mean[2]
+        elif name == "M2":
+            return (self._sum[0] - self._compensation[0]) / self.n
+        return (self._sum[1] - self._compensation[1]) / self.n
+
+    def var(self, name: str) -> Union[float, np.ndarray]:
+        """
+        The variance of E, M or |M|
+
+        Parameters
+        ----------
+        name : str
+            "E", "M" or "|M|"
+
+        Returns
+        -------
+        Union[float, np.ndarray]
+            The variance, nan before the first accumulated row
+
+        Raises
+        ------
+        KeyError
+            Unknown moment.
+        """
+        index = {"E": 0, "M": 1, "|M|": 2}[name]
+        if self.n == 0:
+            return np.nan
+        return self._m2[index] / self.n
+
+    def specific_heat(self, N: int, T: Any = None) -> Union[float, np.ndarray]:
+        """
+        The specific heat per site, (<E^2> - <E>^2) / (N T^2)
+
+        Parameters
+        ----------
+        N : int
+            The number of sites
+        T : Any, optional
+            The temperature, by default the one of the latest row
+
+        Returns
+        -------
+        Union[float, np.ndarray]
+            The specific heat
+        """
+        T = self.T if T is None else T
+        return self.var("E") / (N * np.asarray(T, dtype=np.float64) ** 2)
+
+    def susceptibility(self, N: int, T: Any = None) -> Union[float, np.ndarray]:
+        """
+        The susceptibility per site, (<M^2> - <|M|>^2) / (N T)
+
+        Parameters
+        ----------
+        N : int
+            The number of sites
+        T : Any, optional
+            The temperature, by default the one of the latest row
+
+        Returns
+        -------
+        Union[float, np.ndarray]
+            The susceptibility
+        """
+        T = self.T if T is None else T
+        return self.var("|M|") / (N * np.asarray(T, dtype=np.float64))
+
+    def binder(self) -> Union[float, np.ndarray]:
+        """
+        The Binder cumulant, U4 = 1 - <M^4> / (3 <M^2>^2)
+
+        Returns
+        -------
+        Union[float, np.ndarray]
+            U4
+        """
+        return 1 - self.mean("M4") / (3 * self.mean("M2") ** 2)
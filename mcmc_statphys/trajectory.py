@@ -0,0 +1,537 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+"""
+@文件    :trajectory.py
+@时间    :2026/10/17 20:14:52
+@作者    :結凪
+"""
+
+from typing import Any, Dict, Iterator, List, Union
+import numpy as np
+import pandas as pd
+from .static import StaticStore
+
+__all__ = ["Trajectory", "RunRegistry"]
+
+
+class Run(object):
+    """
+    The bookkeeping of one run, see RunRegistry
+
+    Attributes
+    ----------
+    uid : str
+        uid
+    iter : int
+        The iteration of the last row, 0 before the first row
+    start, stop : int
+        The row range of the run in its buffers
+    state : int
+        The row of the latest recorded state, -1 before the first row
+    """
+
+    def __init__(self, uid: str):
+        self.uid: str = uid
+        self.iter: int = 0
+        self.start: int = 0
+        self.stop: int = 0
+        self.state: int = -1
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __repr__(self) -> str:
+        return "Run(uid={uid!r}, iter={iter}, rows={start}:{stop})".format(
+            uid=self.uid, iter=self.iter, start=self.start, stop=self.stop
+        )
+
+
+class RunRegistry(object):
+    """
+    Run registry
+    ============
+
+    Example
+    -------
+    >>> import mcmc_statphys as mcsp
+    >>> f = mcsp.algorithm.Metropolis(mcsp.model.Ising(L=10))
+    >>> uid = f.equil_sample(T=2.0, max_iter=100)
+    >>> f.runs[uid].iter
+    >>> f.runs[uid].state
+
+    Description
+    -----------
+
+    Maps every uid to its last iteration, its row range and the row of its latest
+    state. Resolving a uid and appending a row are dictionary operations, they do
+    not depend on the length of the history.
+    """
+
+    def __init__(self):
+        self._runs: Dict[str, Run] = {}
+        self._rows: int = 0
+
+    def __contains__(self, uid: str) -> bool:
+        return uid in self._runs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._runs)
+
+    def __getitem__(self, uid: str) -> Run:
+        return self._runs[uid]
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+    @property
+    def rows(self) -> int:
+        """The number of rows of every run"""
+        return self._rows
+
+    def get(self, uid: str, default: Any = None) -> Union[Run, Any]:
+        """
+        The run of the uid
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        default : Any, optional
+            Returned for an unknown uid, by default None
+
+        Returns
+        -------
+        Union[Run, Any]
+            The run
+        """
+        return self._runs.get(uid, default)
+
+    def record(self, uid: str, rows: int = 1) -> Run:
+        """
+        Register more rows of the run, the run is created on its first row
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        rows : int, optional
+            The number of new rows, by default 1
+
+        Returns
+        -------
+        Run
+            The run, its stop - 1 is the last new row
+        """
+        run = self._runs.get(uid)
+        if run is None:
+            run = self._runs[uid] = Run(uid)
+        run.stop += rows
+        run.state = run.stop - 1
+        run.iter += rows
+        self._rows += rows
+        return run
+
+    def release(self, uid: str) -> Run:
+        """
+        Forget the rows of the run, its iteration is kept
+
+        The store keeps the latest state as row 0 of its buffers, the rows start
+        after it.
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        Run
+            The run, without rows
+        """
+        run = self._runs[uid]
+        self._rows -= len(run)
+        run.start = run.stop = 1
+        run.state = 0
+        return run
+
+
+class Trajectory(object):
+    """
+    Trajectory
+    ==========
+
+    Example
+    -------
+    >>> import mcmc_statphys as mcsp
+    >>> t = mcsp.Trajectory(columns=["T", "energy"])
+    >>> t.append("test", T=1.0, energy=-2.0)
+    >>> t.column("test", "energy")
+    >>> t.to_dataframe()
+
+    Description
+    -----------
+
+    Columnar store of the recorded rows of every run. Each uid has one NumPy buffer
+    per column, the first axis is the row and the other axes the shape of the value,
+    e.g. (rows, L, L) for the spin. A full buffer doubles its capacity, so recording
+    n rows costs O(n). The row range of every uid is kept in ``runs``, a
+    RunRegistry. Static arrays, e.g. a random field, are kept once in ``static``, a
+    StaticStore, and the rows hold their keys. ``to_dataframe`` exports the (uid, iter) indexed DataFrame of the
+    older versions.
+    """
+
+    def __init__(self, columns: List[str], capacity: int = 64):
+        """
+        initialize the store
+
+        Parameters
+        ----------
+        columns : List[str]
+            The names of the columns
+        capacity : int, optional
+            The initial number of rows of a run, by default 64
+        """
+        self.columns: List[str] = list(columns)
+        self.capacity: int = max(int(capacity), 1)
+        self._buffers: Dict[str, Dict[str, np.ndarray]] = {}
+        self.runs: RunRegistry = RunRegistry()
+        self.static: StaticStore = StaticStore()
+        self._version: int = 0
+        self._frame: pd.DataFrame = None
+        self._frame_version: int = -1
+
+    def __contains__(self, uid: str) -> bool:
+        return uid in self.runs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.runs)
+
+    def __len__(self) -> int:
+        return self.runs.rows
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def uids(self) -> List[str]:
+        """
+        The uids of the runs, in the order they were first recorded
+
+        Returns
+        -------
+        List[str]
+            uid list
+        """
+        return list(self.runs)
+
+    def size(self, uid: str) -> int:
+        """
+        The number of rows of the run
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        int
+            The number of rows, 0 for an unknown uid
+        """
+        run = self.runs.get(uid)
+        return 0 if run is None else len(run)
+
+    @staticmethod
+    def _numeric(value: Any) -> Union[np.ndarray, None]:
+        """
+        The value as a numeric array, None if it is not numeric, e.g. a graph
+        """
+        if isinstance(value, (np.ndarray, np.generic, int, float, complex, bool)):
+            array = np.asarray(value)
+            if array.dtype.kind in "biufc":
+                return array
+        return None
+
+    def _put(self, uid: str, column: str, row: int, value: Any) -> None:
+        """
+        Write the value of a column, growing or widening the buffer if needed
+        """
+        buffers = self._buffers[uid]
+        buffer = buffers.get(column)
+        array = self._numeric(value)
+        if buffer is None:
+            # a column that first shows up late is sized for the rows before it
+            size = max(self.capacity, row + 1)
+            if array is None:
+                buffer = np.empty(size, dtype=object)
+            else:
+                buffer = np.zeros((size,) + array.shape, dtype=array.dtype)
+            buffers[column] = buffer
+        if row >= len(buffer):
+            # amortized doubling
+            grown = np.empty((max(2 * len(buffer), row + 1),) + buffer.shape[1:], dtype=buffer.dtype)
+            grown[: len(buffer)] = buffer
+            buffer = buffers[column] = grown
+        if buffer.dtype != object:
+            if array is None or array.shape != buffer.shape[1:]:
+                # the shape changed, e.g. a scalar and an array H, keep the rows as objects
+                widened = np.empty(len(buffer), dtype=object)
+                widened[:row] = list(buffer[:row])
+                buffer = buffers[column] = widened
+            elif np.result_type(buffer.dtype, array.dtype) != buffer.dtype:
+                buffer = buffers[column] = buffer.astype(np.result_type(buffer.dtype, array.dtype))
+        if buffer.dtype == object:
+            buffer[row] = np.copy(value) if isinstance(value, np.ndarray) else value
+        else:
+            buffer[row] = array
+
+    def append(self, uid: str, **values: Any) -> int:
+        """
+        Append one row to the run, the values are copied
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        **values : Any
+            The value of each column
+
+        Returns
+        -------
+        int
+            The iteration of the row, starting from 1
+        """
+        if uid not in self.runs:
+            self._buffers[uid] = {}
+        run = self.runs.get(uid)
+        row = 0 if run is None else run.stop
+        for column, value in values.items():
+            if column not in self.columns:
+                self.columns.append(column)
+            self._put(uid, column, row, value)
+        run = self.runs.record(uid)
+        self._version += 1
+        return run.iter
+
+    def column(self, uid: str, column: str) -> np.ndarray:
+        """
+        The recorded values of a column of the run
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        column : str
+            column
+
+        Returns
+        -------
+        np.ndarray
+            A view of the buffer, one entry per row
+
+        Raises
+        ------
+        KeyError
+            Unknown uid or column.
+        """
+        run = self.runs.get(uid)
+        if run is None:
+            raise KeyError(uid)
+        buffer = self._buffers[uid].get(column)
+        if buffer is None:
+            raise KeyError(column)
+        return buffer[run.start : run.stop]
+
+    def last(self, uid: str, column: str) -> Any:
+        """
+        The value of a column at the latest state of the run, see Run.state
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        column : str
+            column
+
+        Returns
+        -------
+        Any
+            The value
+        """
+        run = self.runs.get(uid)
+        if run is None:
+            raise KeyError(uid)
+        return self._buffers[uid][column][run.state]
+
+    def arrays(self, uid: str) -> Dict[str, np.ndarray]:
+        """
+        The recorded values of every column of the run
+
+        Parameters
+        ----------
+        uid : str
+            uid
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            column -> a view of its buffer, one entry per row
+        """
+        return {column: self.column(uid, column) for column in self.columns if column in self._buffers[uid]}
+
+    def attach(self, uid: str, arrays: Dict[str, np.ndarray]) -> None:
+        """
+        Register the arrays of a new run as its buffers, they are not copied
+
+        The arrays may be read-only, e.g. memory-mapped. A later append copies them
+        into a larger buffer.
+
+        Parameters
+        ----------
+        uid : str
+            uid, not in the store
+        arrays : Dict[str, np.ndarray]
+            column -> the values of the rows, the same length for every column
+
+        Raises
+        ------
+        ValueError
+            The uid is in the store, or the arrays have different lengths.
+        """
+        if uid in self.runs:
+            raise ValueError("uid {uid} is already in the store".format(uid=uid))
+        rows = {len(array) for array in arrays.values()}
+        if len(rows) > 1:
+            raise ValueError("the columns of a run must have the same length")
+        for column in arrays:
+            if column not in self.columns:
+                self.columns.append(column)
+        self._buffers[uid] = dict(arrays)
+        if rows and rows.pop() > 0:
+            self.runs.record(uid, rows=len(next(iter(arrays.values()))))
+        self._version += 1
+
+    def drop(self, uid: str) -> None:
+        """
+        Drop the rows of the run from memory, e.g. after they were written out
+
+        The latest state is kept for last(), the iteration of the next row follows
+        the dropped rows.
+
+        Parameters
+        ----------
+        uid : str
+            uid
+        """
+        run = self.runs.get(uid)
+        if run is None or len(run) == 0:
+            return
+        buffers = self._buffers[uid]
+        for column, buffer in buffers.items():
+            kept = np.empty((self.capacity,) + buffer.shape[1:], dtype=buffer.dtype)
+            kept[0] = buffer[run.state]
+            buffers[column] = kept
+        self.runs.release(uid)
+        self._version += 1
+
+    def compact(self) -> "Trajectory":
+        """
+        A store without the rows, it keeps the latest state and the iteration of every run
+
+        The runs continue as after drop, e.g. in a checkpoint, see save_checkpoint. The
+        static arrays are shared.
+
+        Returns
+        -------
+        Trajectory
+            The compact store
+        """
+        store = Trajectory(self.columns, capacity=self.capacity)
+        store.static = self.static
+        for uid in self.runs:
+            run = self.runs[uid]
+            buffers = store._buffers[uid] = {}
+            for column, buffer in self._buffers[uid].items():
+                kept = np.empty((store.capacity,) + buffer.shape[1:], dtype=buffer.dtype)
+                kept[0] = buffer[run.state]
+                buffers[column] = kept
+            store.runs.record(uid, rows=run.iter)
+            store.runs.release(uid)
+        return store
+
+    def extend(self, other: "Trajectory") -> "Trajectory":
+        """
+        Append every row of another store
+
+        Parameters
+        ----------
+        other : Trajectory
+            The other store
+
+        Returns
+        -------
+        Trajectory
+            self
+        """
+        for uid in other:
+            columns = [column for column in other.columns if column in other._buffers[uid]]
+            for row in range(other.runs[uid].start, other.runs[uid].stop):
+                self.append(uid, **{column: other._buffers[uid][column][row] for column in columns})
+        self.static.extend(other.static)
+        return self
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Export the rows as a DataFrame indexed by (uid, iter)
+
+        The frame is cached until the next append.
+
+        Returns
+        -------
+        pd.DataFrame
+            The data
+        """
+        if self._frame_version == self._version:
+            return self._frame
+        frames = []
+        for uid in self.runs:
+            run = self.runs[uid]
+            size = len(run)
+            iters = np.arange(run.iter - size + 1, run.iter + 1)
+            index = pd.MultiIndex.from_arrays([[uid] * size, iters], names=["uid", "iter"])
+            values = {}
+            for column in self.columns:
+                buffer = self._buffers[uid].get(column)
+                if buffer is None:
+                    values[column] = np.full(size, np.nan)
+                elif buffer.ndim == 1:
+                    values[column] = buffer[run.start : run.stop]
+                else:
+                    values[column] = list(buffer[run.start : run.stop])
+            frames.append(pd.DataFrame(values, index=index, columns=self.columns))
+        if frames:
+            frame = pd.concat(frames)
+        else:
+            frame = pd.DataFrame(columns=["uid", "iter"] + self.columns).set_index(["uid", "iter"])
+        self._frame, self._frame_version = frame, self._version
+        return frame
+
+    @classmethod
+    def from_dataframe(cls, data: pd.DataFrame) -> "Trajectory":
+        """
+        Build a store from a DataFrame indexed by (uid, iter)
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            The data
+
+        Returns
+        -------
+        Trajectory
+            The store
+        """
+        trajectory = cls(columns=list(data.columns))
+        for (uid, _), row in zip(data.index, data.itertuples(index=False)):
+            trajectory.append(uid, **dict(zip(data.columns, row)))
+        return trajectory
@@ -1,12 +1,20 @@
 #!/usr/bin/env python
 """Tests for `mcmc_statphys` package."""
 
+import copy
+import os
+import signal
+import sys
+import tempfile
 import unittest
+import numpy as np
 from click.testing import CliRunner
 
+import mcmc_statphys
 from mcmc_statphys import algorithm
 from mcmc_statphys import model
 from mcmc_statphys import cli
+from mcmc_statphys.model.Staurss import Staurss
 
 
 class TestMcmc_statphys(unittest.TestCase):
@@ -21,6 +29,454 @@ class TestMcmc_statphys(unittest.TestCase):
     def test_000_something(self):
         """Test something."""
 
+    def test_neighbor_table(self):
+        """Test the shared neighbor table of the lattice."""
+        table = model.lattice.neighbor_table(5, 2)
+        assert table.shape == (25, 4) and table.dtype == np.int32
+        assert sorted(table[0].tolist()) == [1, 4, 5, 20]
+        assert model.lattice.neighbor_table(2, 3).shape == (8, 3)
+        assert model.Ising(L=5, dim=2).neighbors is table
+
+    def test_total_energy(self):
+        """Test the vectorized total energy against the site energies."""
+        for L in [2, 3, 6]:
+            m = model.Ising(L=L, J=1, H=0.5, dim=2)
+            field = np.sum(m.H * m.spin)
+            sites = sum(m._get_site_energy(site) for site in range(m.N))
+            assert np.isclose(m.energy, (sites + field) / 2 - field)
+            p = model.Potts(L=L, p=3)
+            assert np.isclose(p.energy, sum(p._get_site_energy(site) for site in range(p.N)) / 2)
+
+    def test_checkerboard_sweep(self):
+        """Test that the checkerboard sweep keeps the energy consistent."""
+        for m in [model.Ising(L=8), model.Potts(L=8, p=3)]:
+            algo = algorithm.Metropolis(m)
+            for ac_from in ["class", "bath"]:
+                for _ in range(5):
+                    algo.sweep(T=2.0, uid="test", ac_from=ac_from)
+            energy = algo.model.energy
+            assert np.isclose(energy, algo.model._get_total_energy())
+
+    def test_delta_levels(self):
+        """Test that the level of a flip indexes its delta energy."""
+        m = model.Ising(L=4, J=1, H=0.3, dim=2)
+        levels = m._delta_levels()
+        for site in range(m.N):
+            delta_E = m._change_delta_energy(site)
+            m._change_delta_energy(site)
+            assert np.isclose(levels[m._get_level(site)], delta_E)
+        potts = model.Potts(L=4, p=3)
+        levels = potts._delta_levels()
+        for site in range(potts.N):
+            new_site, delta_E = potts._propose(site)
+            assert np.isclose(levels[potts._get_level(site, new_site)], delta_E)
+        metropolis = sys.modules[algorithm.Metropolis.__module__]
+        for T in np.linspace(1.0, 3.0, metropolis._ACCEPTANCE_TABLES_SIZE + 10):
+            metropolis._acceptance_table(m, T)
+        assert len(metropolis._acceptance_tables) <= metropolis._ACCEPTANCE_TABLES_SIZE
+
+    def test_packed_ising(self):
+        """Test that the packed Ising model matches the Ising model."""
+        m = model.PackedIsing(L=64, J=1, H=0.5, dim=2)
+        ising = model.Ising(L=64, J=1, H=0.5, dim=2)
+        ising.set_spin(m.spin.astype(np.int64))
+        assert np.isclose(m.energy, ising.energy) and m.magnetization == ising.magnetization
+        algo = algorithm.Metropolis(m)
+        for _ in range(5):
+            algo.sweep(T=2.0, uid="test")
+        energy, magnetization = algo.model.energy, algo.model.magnetization
+        assert np.isclose(energy, algo.model._get_total_energy())
+        assert magnetization == algo.model._get_total_magnetization()
+
+    def test_replica_ising(self):
+        """Test that the replicas keep their own energy and magnetization."""
+        m = model.ReplicaIsing(L=8, R=4, J=1, H=0.2, dim=2)
+        ising = model.Ising(L=8, J=1, H=0.2, dim=2)
+        ising.set_spin(m.spin[2].copy())
+        assert np.isclose(m.energy[2], ising.energy)
+        algo = algorithm.Metropolis(m)
+        for _ in range(5):
+            algo.sweep(T=np.array([1.0, 2.0, 3.0, 4.0]), uid="test")
+        energy = algo.model.energy
+        assert energy.shape == (4,) and np.allclose(energy, algo.model._get_total_energy())
+        algo.equil_sample(T=2.0, max_iter=50)  # one site proposed in every replica
+        algo.sweep(T=np.array([1.0, 2.0, 3.0, 4.0]), order="random")
+        assert np.allclose(algo.model.energy, algo.model._get_total_energy())
+        assert np.array_equal(algo.model.magnetization, algo.model._get_total_magnetization())
+
+    def test_sweep_schedule(self):
+        """Test that rows are only recorded at the measurement points."""
+        for order in ["sequential", "permutation", "random", "checkerboard"]:
+            algo = algorithm.Metropolis(model.Ising(L=4, dim=2))
+            uid = algo.equil_sample(T=2.0, sweeps=6, therm_sweeps=3, measure_every=2, order=order)
+            assert len(algo.data.loc[uid]) == 3
+            assert algo.model.energy == algo.model._get_total_energy()
+        uid = algo.equil_sample(T=2.0, max_iter=20, measure_every=5)
+        assert len(algo.data.loc[uid]) == 4
+
+    def test_checkerboard_fallback(self):
+        """Test that the default checkerboard sweep falls back to random proposals without sublattices."""
+        for m in [model.Ising(L=5), model.XY(L=4)]:
+            algo = algorithm.Metropolis(m)
+            assert not algo._bipartite()
+            uid = algo.sweep(T=2.0)
+            algo.equil_sample(T=2.0, sweeps=2, order="checkerboard", uid=uid)
+            assert len(algo.data.loc[uid]) == 3
+        with self.assertRaises(ValueError):
+            algo._checkerboard(T=2.0)
+
+    def test_kawasaki_species(self):
+        """Test that the exchanges keep the magnetization and the site lists of each species."""
+        with self.assertRaises(ValueError):
+            algorithm.Kawasaki(model.Ising(L=4), M=16)
+        algo = algorithm.Kawasaki(model.Ising(L=8), M=60)
+        algo.equil_sample(T=2.0, max_iter=500)
+        up, down = algo._sites()
+        spin = algo.model._flat_spin()
+        assert algo.model.magnetization == 60 and np.all(spin[up] == 1) and np.all(spin[down] == -1)
+        assert algo.model.energy == algo.model._get_total_energy()
+
+    def test_propose_accept(self):
+        """Test that a proposal leaves the model unchanged until it is accepted."""
+        for m in [model.Ising(L=4, H=0.5), model.Potts(L=4), model.XY(L=4, H=0.2), model.SKmodel(N=16)]:
+            spin, energy = m.spin.copy(), m.energy
+            new_site, delta_E = m._propose(3)
+            assert np.array_equal(spin, m.spin) and m.energy == energy
+            m._accept(3, new_site, delta_E)
+            assert np.isclose(m.energy, m._get_total_energy(), rtol=1e-5)
+
+    def test_local_field(self):
+        """Test that the local field follows the spin through every update."""
+        m = model.RFIsing(L=6, local_field=True)
+        for algo in [algorithm.Metropolis(m), algorithm.Wolff(m)]:
+            algo._sweep(T=2.0, order="checkerboard")
+            algo._sweep(T=2.0, order="permutation")
+            local_field = algo.model.local_field.copy()
+            assert np.isclose(algo.model.energy, algo.model._get_total_energy())
+            assert np.array_equal(local_field, algo.model.local_field)
+
+    def test_random_stream(self):
+        """Test that the block random stream refills and is reproducible."""
+        stream = algorithm.RandomStream(seed=7, block_size=3)
+        sites = [stream.integers(5) for _ in range(10)]
+        uniforms = [stream.random() for _ in range(10)]
+        assert all(0 <= site < 5 for site in sites) and all(0 <= u < 1 for u in uniforms)
+        energies = []
+        for _ in range(2):
+            m = model.Ising(L=4)
+            m.set_spin(np.ones((4, 4), dtype=int))
+            algo = algorithm.Metropolis(m, block_size=16, seed=11)
+            algo._sweep(T=3.0)
+            energies.append(algo.model.energy)
+        assert energies[0] == energies[1]
+        potts = model.Potts(L=6, p=3)
+        spins = []
+        for _ in range(2):
+            algo = algorithm.Metropolis(copy.deepcopy(potts), seed=7)
+            algo.equil_sample(T=1.5, max_iter=200)
+            algo.sweep(T=1.5, uid="test")
+            spins.append(algo.model.spin)
+        assert np.array_equal(spins[0], spins[1])
+        packed = model.PackedIsing(L=64)
+        words = []
+        for _ in range(2):
+            algo = algorithm.Metropolis(copy.deepcopy(packed), seed=5)
+            for _ in range(3):
+                algo._sweep(T=2.5, order="checkerboard")
+            words.append(algo.model.words)
+        assert np.array_equal(words[0], words[1])
+        algo = algorithm.Metropolis(Staurss(L=4), seed=7)
+        algo.equil_sample(T=2.0, max_iter=20)
+
+    def test_trajectory(self):
+        """Test the columnar store and its DataFrame export."""
+        store = mcmc_statphys.Trajectory(columns=["T", "energy", "spin"], capacity=2)
+        for i in range(5):
+            store.append("a", T=1.0, energy=i, spin=np.full(3, i))
+        store.append("a", T=1.0, energy=0.5, spin=np.zeros(3))
+        assert store.size("a") == 6 and store.column("a", "energy").dtype == np.float64
+        assert store.column("a", "spin").shape == (6, 3)
+        late = mcmc_statphys.Trajectory(columns=["E"], capacity=4)
+        for i in range(20):
+            late.append("u", E=i)
+        late.append("u", E=1, X=2.0)  # a column that first shows up after the capacity
+        assert late.column("u", "X").shape == (21,) and late.column("u", "X")[-1] == 2.0
+        data = store.to_dataframe()
+        assert data.loc[("a", 2), "energy"] == 1 and np.array_equal(data.loc[("a", 5), "spin"], np.full(3, 4))
+        algo = algorithm.Metropolis(model.Ising(L=4))
+        uid = algo.equil_sample(T=2.0, max_iter=10)
+        algo.equil_sample(T=2.0, max_iter=10, uid=uid)
+        assert algo.data.loc[uid].shape == (20, 4) and algo.getcolumn(uid, "E").shape == (20,)
+        assert np.isclose(mcmc_statphys.method.mean(algo, uid, "E", t0=5), algo.data.loc[uid]["energy"][5:].mean())
+
+    def test_run_registry(self):
+        """Test that the registry follows the iterations and the latest state of each run."""
+        algo = algorithm.Metropolis(model.Ising(L=4))
+        first = algo.equil_sample(T=2.0, max_iter=5)
+        second = algo.equil_sample(T=2.0, max_iter=3)
+        algo.equil_sample(T=2.0, max_iter=4, uid=first)
+        assert algo.runs[first].iter == 9 and len(algo.runs[second]) == 3
+        assert algo.runs[first].state == 8 and algo.runs.rows == 12
+        assert np.array_equal(algo.model.spin, algo.getcolumn(first, "spin")[-1])
+        assert np.array_equal(algo.model.spin, mcmc_statphys.method.getcolumn(algo, first, "spin")[-1])
+
+    def test_run_session(self):
+        """Test that a session restores its state once and resumes after another uid."""
+        algo = algorithm.Metropolis(model.Ising(L=4))
+        with algo.run(T=2.0, uid="a") as r:
+            r.step(10)
+            r.sweep(2, order="checkerboard")
+        algo.model.set_spin = None  # a restore of the active uid would fail
+        algo.iter_sample(T=2.0, uid="a")
+        del algo.model.set_spin
+        algo.equil_sample(T=2.0, max_iter=5, uid="b")
+        r.thermalize(1)
+        assert algo.runs["a"].iter == 13 and len(algo.runs["b"]) == 5
+        assert np.isclose(algo.model.energy, algo.model._get_total_energy())
+        demon = algorithm.Demon(model.Ising(L=4))
+        with demon.run() as r:
+            r.sweep(3)
+        assert np.isclose(demon.Es, demon.model._get_total_energy())
+
+    def test_snapshots(self):
+        """Test the encoded snapshots and their interval."""
+        for m in [model.Ising(L=5), model.Potts(L=5, p=3), model.XY(L=5)]:
+            algo = algorithm.Metropolis(m)
+            uid = algo.equil_sample(T=2.0, sweeps=6, measure_every=2, snapshot_every=3)
+            assert len(algo.runs[uid]) == 3 and algo.snapshots.iters(uid).tolist() == [1, 3]
+            assert np.array_equal(algo.getcolumn(uid, "spin")[-1], algo.model.spin)
+            assert algo.getcolumn(uid, "spin").dtype == m.spin.dtype
+        assert model.Ising(L=100)._init_snapshots().encode(np.ones((100, 100))).nbytes == 1250
+        algo = algorithm.Metropolis(model.Ising(L=4))
+        first = algo.equil_sample(T=2.0, max_iter=10, snapshot_every=0)
+        spin = algo.model.spin.copy()
+        algo.equil_sample(T=2.0, max_iter=10)
+        algo.run(T=2.0, uid=first)
+        assert algo.snapshots.size(first) == 0 and np.array_equal(algo.model.spin, spin)
+
+    def test_flip_log(self):
+        """Test that the flip log reconstructs every recorded state."""
+        for m in [model.Ising(L=6), model.XY(L=4)]:
+            algo = algorithm.Metropolis(m)
+            algo.snapshots = mcmc_statphys.FlipLog(codec=algo.snapshots.codec, keyframe_every=7)
+            states = []
+            with algo.run(T=2.0) as r:
+                for _ in range(30):
+                    r.step(1)
+                    states.append(algo.model.spin.copy())
+                r.step(3, measure_every=3, snapshot_every=1)
+            states.append(algo.model.spin.copy())
+            for iter in [1, 7, 8, 15, 29, 31]:
+                assert np.array_equal(algo.snapshots.state_at(r.uid, iter), states[iter - 1])
+            assert np.array_equal(algo.getcolumn(r.uid, "spin")[:30], np.array(states[:30]))
+            assert algo.snapshots.size(r.uid) == 33
+        assert algo.snapshots.nbytes < np.array(states).nbytes
+
+    def test_msdt_archive(self):
+        """Test that the msdt archive opens only the requested runs, memory-mapped."""
+        algo = algorithm.Metropolis(model.Ising(L=4))
+        algo.param_sample((2.0, 3.0, 2), max_iter=10)
+        uids = algo.param_list[0]["uid"]
+        with tempfile.TemporaryDirectory() as folder:
+            path = mcmc_statphys.method.to_msdt(algo, os.path.join(folder, "run"))
+            archive = mcmc_statphys.method.read_msdt(path, uids=uids[1:])
+            data = archive["data"]
+            assert data.uids() == uids[1:] and isinstance(data.column(uids[1], "energy"), np.memmap)
+            assert np.array_equal(data.column(uids[1], "energy"), algo.getcolumn(uids[1], "energy"))
+            assert np.array_equal(archive["snapshots"].state(uids[1]), algo.model.spin)
+            assert np.array_equal(archive["param_list"][0]["T"], algo.param_list[0]["T"])
+            other = algorithm.Metropolis(archive["model"])
+            other.data, other.snapshots = data, archive["snapshots"]
+            other.equil_sample(T=3.0, max_iter=5, uid=uids[1])
+            assert len(other.runs[uids[1]]) == 15
+
+    def test_chunk_sink(self):
+        """Test that the sink bounds the rows in memory and the archive is readable while it runs."""
+        algo = algorithm.Metropolis(model.Ising(L=4))
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "run.msdt")
+            with mcmc_statphys.ChunkSink(algo, path, every=5):
+                uid = algo.equil_sample(T=2.0, max_iter=23)
+                energy = mcmc_statphys.method.read_msdt(path)["data"].column(uid, "energy")
+                assert algo.trajectory.size(uid) == 3 and len(energy) == 20
+                spin = algo.model.spin.copy()
+            archive = mcmc_statphys.method.read_msdt(path)
+            assert archive["data"].size(uid) == 23 and np.array_equal(archive["data"].column(uid, "energy")[:20], energy)
+            assert np.array_equal(archive["snapshots"].state(uid), spin) and algo.sink is None
+            algo.equil_sample(T=2.0, max_iter=2, uid=uid)
+            assert algo.data.index[-1] == (uid, 25)
+
+    def test_checkpoint(self):
+        """Test that a checkpoint written every few sweeps or on SIGTERM resumes the same chain."""
+        algo = algorithm.Metropolis(model.Potts(L=4, p=3))
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "run.ckpt")
+            handler = signal.getsignal(signal.SIGTERM)
+            algo.checkpoint(path, every=2, sigterm=True)
+            uid = algo.equil_sample(T=2.0, sweeps=3)
+            assert algorithm.Metropolis.resume(path).runs[uid].iter == 2
+            assert signal.getsignal(signal.SIGTERM) is handler  # only installed while sampling
+
+            class Kill:  # SIGTERM in the middle of a sweep
+                def collect(self, uid):
+                    algo.sink = None
+                    os.kill(os.getpid(), signal.SIGTERM)
+
+            algo.sink = Kill()
+            with self.assertRaises(SystemExit):
+                algo.sweep(T=2.0, uid=uid)
+            assert signal.getsignal(signal.SIGTERM) is handler
+            algo.equil_sample(T=2.0, max_iter=20, uid=uid)
+            resumed = algorithm.Metropolis.resume(path)  # also restores np.random
+            assert resumed.runs[uid].iter == 4 and algo.checkpointer is None
+            assert len(resumed.runs[uid]) == 0  # only the latest state, not the rows
+            resumed.equil_sample(T=2.0, max_iter=20, uid=uid)
+            assert np.array_equal(resumed.model.spin, algo.model.spin)
+            assert np.array_equal(resumed.getcolumn(uid, "energy"), algo.getcolumn(uid, "energy")[-20:])
+
+    def test_checkpoint_sink(self):
+        """Test that a checkpoint keeps no rows and the archive of the sink holds them."""
+        algo = algorithm.Metropolis(model.Ising(L=4))
+        with tempfile.TemporaryDirectory() as folder:
+            path, checkpoint = os.path.join(folder, "run.msdt"), os.path.join(folder, "run.ckpt")
+            mcmc_statphys.ChunkSink(algo, path, every=50)
+            uid = algo.equil_sample(T=2.0, max_iter=23)
+            energy = algo.getcolumn(uid, "energy").copy()
+            algo.checkpoint(checkpoint)
+            size = os.path.getsize(checkpoint)
+            algo.equil_sample(T=2.0, max_iter=2000, uid=uid)
+            algo.checkpoint(checkpoint)
+            assert os.path.getsize(checkpoint) < size + 16 * 1024  # the moments grow as log(rows)
+            resumed = algorithm.Metropolis.resume(checkpoint)
+            resumed.equil_sample(T=2.0, max_iter=10, uid=uid)
+            resumed.sink.close()
+            archive = mcmc_statphys.method.read_msdt(path)
+            assert archive["data"].size(uid) == 2033
+            assert np.array_equal(archive["data"].column(uid, "energy")[:23], energy)
+
+    def test_tempering_checkpoint(self):
+        """Test that a checkpoint written between the exchange rounds resumes the ladder."""
+        algo = algorithm.Tempering(model.Ising(L=4))
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "run.ckpt")
+            algo.checkpoint(path, every=6)  # every 2 rounds of 3 replicas * 16 updates
+            result = algo.param_sample(T=(2.0, 3.0, 3), max_iter=3, eq_iter=16)
+            assert algo.ladder is None
+            resumed = algorithm.Tempering.resume(path)
+            assert resumed.ladder["iter"] == 2
+            assert resumed.param_sample()["uid"] == result["uid"]
+            for uid in result["uid"]:  # the rows of the last round
+                energy = resumed.getcolumn(uid, "energy")
+                assert len(energy) == 16 and np.array_equal(energy, algo.getcolumn(uid, "energy")[-16:])
+            with self.assertRaises(ValueError):
+                resumed.param_sample()
+
+    def test_static_store(self):
+        """Test that a quenched random field is stored once and shared by the copies."""
+        m = model.RFIsing(L=8)
+        algo = algorithm.Metropolis(m)
+        assert algo._rowmodel.H is m.H and not m.H.flags.writeable
+        first = algo.equil_sample(T=2.0, max_iter=10)
+        second = algo.equil_sample(T=2.0, max_iter=10)
+        static = algo.trajectory.static
+        keys = set(algo.getcolumn(first, "H")) | set(algo.getcolumn(second, "H"))
+        assert len(static) == 1 and keys == {mcmc_statphys.content_key(m.H)}
+        assert static.of(second)["H"] is m.H and static.nbytes == m.H.nbytes
+
+    def test_compact_spins(self):
+        """Test the int8 / uint8 spins and the exact int64 energy of integer couplings."""
+        for m, dtype in [(model.Ising(L=8, J=1.0, H=1), np.int8), (model.Potts(L=8, p=3), np.uint8)]:
+            assert m.spin.dtype == dtype and isinstance(m.J, np.int64)
+            algo = algorithm.Metropolis(m)
+            for order in ["checkerboard", "random"]:
+                for _ in range(10):
+                    algo._sweep(T=2.0, order=order)
+            energy, magnetization = algo.model.energy, algo.model.magnetization
+            assert isinstance(energy, np.int64) and energy == algo.model._get_total_energy()
+            assert magnetization == algo.model._get_total_magnetization()
+        m = model.Ising(L=4)
+        m.set_spin(np.ones((4, 4)))
+        assert m.spin.dtype == np.int8 and m.energy == -32
+
+    def test_autocorrelation_time(self):
+        """Test the FFT autocorrelation and tau_int against an AR(1) series."""
+        rng = np.random.default_rng(1)
+        phi, noise = 0.8, rng.normal(size=200000)
+        series = np.empty(len(noise))
+        series[0] = noise[0]
+        for i in range(1, len(noise)):
+            series[i] = phi * series[i - 1] + noise[i]
+        rho = mcmc_statphys.stats.acf(series)
+        assert np.isclose(rho[1], phi, atol=0.01) and np.isclose(rho[2], phi**2, atol=0.01)
+        tau, error, _ = mcmc_statphys.stats.integrated_time(rho)
+        assert abs(tau - (1 + phi) / (1 - phi) / 2) < 3 * error
+        algo = algorithm.Metropolis(model.Ising(L=4))
+        uid = algo.equil_sample(T=2.0, max_iter=200)
+        table = algo.autocorrelation_time(uid)
+        assert table.loc["T", "tau"] == 0.5 and table.loc["T", "ess"] == 200
+        assert np.isclose(algo.autocorrelation(uid, "E")[0], table.loc["energy", "tau"])
+
+    def test_streaming_moments(self):
+        """Test the streaming moments against the recorded rows, with a burn-in."""
+        algo = algorithm.Metropolis(model.Ising(L=4))
+        algo.burn_in = 50
+        uid = algo.equil_sample(T=2.5, max_iter=300)
+        E = np.asarray(algo.getcolumn(uid, "energy", 50), dtype=float)
+        M = np.asarray(algo.getcolumn(uid, "magnetization", 50), dtype=float)
+        assert algo.moments[uid].n == 250
+        assert np.isclose(algo.specific_heat(uid), np.var(E) / (16 * 2.5**2))
+        assert np.isclose(algo.susceptibility(uid), np.var(np.abs(M)) / (16 * 2.5))
+        assert np.isclose(algo.binder(uid), 1 - np.mean(M**4) / (3 * np.mean(M**2) ** 2))
+        half = mcmc_statphys.stats.Moments()
+        other = mcmc_statphys.stats.Moments()
+        for i in range(len(E)):
+            (half if i < 100 else other).push(E[i], M[i], 2.5)
+        assert np.isclose(half.merge(other).var("E"), np.var(E))
+
+    def test_binning_jackknife(self):
+        """Test the bin levels and the jackknife on the rows and on the streaming moments."""
+        rng = np.random.default_rng(2)
+        x = rng.normal(size=4096)
+        sizes, errors = mcmc_statphys.stats.binning(x)
+        assert sizes[-1] == 128 and np.isclose(errors[0], np.std(x, ddof=1) / 64)
+        value, error = mcmc_statphys.stats.jackknife(lambda a, b: b - a**2, x, x**2)
+        assert np.isclose(value, np.var(x), atol=2e-3) and 0 < error < 0.1
+        moments = mcmc_statphys.stats.Moments()
+        for e in x:
+            moments.push(e, 0.0)
+        assert np.allclose(moments.binning(["E"])[1][:, 0], errors)
+        assert np.isclose(moments.jackknife(lambda a, b: b - a**2, ["E", "E2"])[0], value, atol=1e-2)
+        algo = algorithm.Metropolis(model.Ising(L=4))
+        uid = algo.equil_sample(T=2.5, max_iter=640)
+        table = algo.observables([uid], streaming=False)
+        assert np.isclose(table.loc[uid, "binder"], algo.u4(uid), atol=3 * table.loc[uid, "binder_err"])
+        assert list(algo.observables({"uid": [uid]}, streaming=True).index) == [uid]
+
+    def test_reweight(self):
+        """Test the single-histogram reweighting against the plain means and its overlap."""
+        algo = algorithm.Metropolis(model.Ising(L=4))
+        uid = algo.equil_sample(T=2.5, max_iter=2000)
+        table = algo.reweight(uid, [2.0, 2.5, 3.0, 9.0], ["E", "energy", "binder"], t0=100)
+        assert np.isclose(table.loc[2.5, "energy"], algo.mean(uid, "energy", 100))
+        assert np.isclose(table.loc[2.5, "binder"], algo.u4(uid, 100))
+        assert np.isclose(table.loc[2.5, "overlap"], 1)
+        assert table.loc[2.0, "E"] < table.loc[2.5, "E"] < table.loc[3.0, "E"]
+        assert table.loc[2.5, "reliable"] and not table.loc[9.0, "reliable"]
+
+    def test_wham(self):
+        """Test the multiple-histogram solvers against each other and against one run."""
+        algo = algorithm.Metropolis(model.Ising(L=4))
+        runs = algo.param_sample((2.0, 3.0, 3), max_iter=3000)
+        wham = algo.wham(runs)
+        newton = algo.wham(runs, method="newton")
+        assert np.allclose(wham.f, newton.f, atol=1e-8) and newton.iterations < wham.iterations
+        assert np.allclose(wham.free_energy(wham.T) - wham.free_energy(wham.T[0]), wham.f)
+        curves = wham.curves(np.linspace(2.0, 3.0, 5), ["E", "specific_heat"], blocks=4)
+        assert np.all(np.diff(curves["E"]) > 0) and np.all(curves["E_err"] > 0)
+        single = algo.wham([runs["uid"][1]], correlated=False)
+        assert np.isclose(single.curves([2.5], ["E"], blocks=0).loc[2.5, "E"], algo.mean(runs["uid"][1], "E"))
+        assert len(single.density_of_states()) == len(np.unique(algo.getcolumn(runs["uid"][1], "E")))
+
     def test_command_line_interface(self):
         """Test the CLI."""
         runner = CliRunner()